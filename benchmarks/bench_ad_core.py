@@ -0,0 +1,241 @@
+"""Benchmark suite of the forward mode core: auto_diff, Functions.Jacobian and the overLoad primitives.
+
+Sweeps the number of inputs n, the number of outputs m and the expression depth over
+representative workloads (Rosenbrock, neural network layers, sparse chains), and records
+for every case the best wall time, the peak memory traced by tracemalloc and the number
+of memory blocks the run allocates. The results are written as JSON, and can be compared
+with a stored baseline: the cases slower, larger or allocating more than the thresholds
+are flagged and the exit status is 1.
+
+Usage (from the repository root):
+    PYTHONPATH=. python benchmarks/bench_ad_core.py --output baseline.json
+    PYTHONPATH=. python benchmarks/bench_ad_core.py --baseline baseline.json [--threshold 0.2]
+    PYTHONPATH=. python benchmarks/bench_ad_core.py --quick --filter rosenbrock
+"""
+import argparse
+import functools
+import gc
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from zapnAD import overLoad
+from zapnAD.dualNumbers import Variables, Functions, auto_diff
+
+
+# Primitives and a value in their domain
+PRIMITIVES = {
+    'sin': 0.3, 'cos': 0.3, 'tan': 0.3, 'arcsin': 0.3, 'arccos': 0.3, 'arctan': 0.3,
+    'exp': 0.3, 'log': 0.3, 'log2': 0.3, 'log10': 0.3, 'sqrt': 0.3,
+    'sinh': 0.3, 'cosh': 0.3, 'tanh': 0.3,
+}
+
+
+def rosenbrock(n):
+    """Scalar Rosenbrock function of n variables."""
+    def f(v):
+        return sum(100 * (v[i + 1] - v[i] ** 2) ** 2 + (1 - v[i]) ** 2 for i in range(n - 1))
+    return [f], np.full(n, 0.5)
+
+
+def layer(n, m):
+    """m outputs tanh(W x + b) of a dense layer of n inputs."""
+    rng = np.random.default_rng(0)
+    W, b = rng.standard_normal((m, n)) / np.sqrt(n), rng.standard_normal(m)
+
+    def output(i):
+        return lambda v: overLoad.tanh(sum(W[i, j] * v[j] for j in range(n)) + b[i])
+    return [output(i) for i in range(m)], rng.random(n)
+
+
+def chain(n, depth):
+    """n outputs, each a chain of depth links of two neighbouring inputs (sparse Jacobian)."""
+    def output(i):
+        def f(v):
+            y = v[i]
+            for _ in range(depth):
+                y = overLoad.sin(y) * v[(i + 1) % n] + 0.5
+            return y
+        return f
+    return [output(i) for i in range(n)], np.linspace(0.1, 0.9, n)
+
+
+def evaluated(functions, values):
+    """Returns the output Variables of functions at values, to time Functions.Jacobian alone."""
+    variables = Variables(n_inputs=len(values))
+    variables.set_values(values)
+    inputs = [variables[i] for i in range(len(values))]
+    return Functions([f(inputs) for f in functions])
+
+
+def auto_diff_case(functions, values, **options):
+    """Returns a function computing auto_diff of functions at values."""
+    return lambda: auto_diff(functions, values, **options)
+
+
+def jacobian_case(functions, values):
+    """Evaluates functions at values, and returns their Functions.Jacobian to time it alone."""
+    return evaluated(functions, values).Jacobian
+
+
+def primitive_case(name, n, depth):
+    """Applies the primitive depth times to a Variable of n derivatives."""
+    f, value = getattr(overLoad, name), PRIMITIVES[name]
+    variables = Variables(n_inputs=n)
+    variables.set_values(np.full(n, value))
+    x = variables[0]
+
+    def run():
+        for _ in range(depth):
+            y = f(x)
+        return y
+    return run
+
+
+def cases(quick):
+    """Returns a dict of the benchmark name to (parameters, setup), where setup() returns the function
+    without arguments to time. The setups run only for the cases selected by --filter."""
+    depth = 200 if quick else 2000
+    sizes = (10, 100) if quick else (10, 100, 1000)
+    layers = ((10, 10), (50, 20)) if quick else ((10, 10), (50, 20), (200, 50))
+    chains = ((10, 10), (100, 10)) if quick else ((10, 10), (100, 10), (100, 100), (1000, 10))
+
+    benchmarks = {}
+    for name in PRIMITIVES:
+        for n in (1, 100):
+            benchmarks[f'primitive/{name}/n={n}'] = \
+                (dict(n=n, depth=depth), functools.partial(primitive_case, name, n, depth))
+
+    for n in sizes:
+        functions, values = rosenbrock(n)
+        params = dict(n=n, m=1)
+        auto_diff_setup = functools.partial(auto_diff_case, functions, values)
+        jacobian_setup = functools.partial(jacobian_case, functions, values)
+        benchmarks[f'rosenbrock/auto_diff/n={n}'] = (params, auto_diff_setup)
+        benchmarks[f'rosenbrock/jacobian/n={n}'] = (params, jacobian_setup)
+
+    for n, m in layers:
+        functions, values = layer(n, m)
+        params = dict(n=n, m=m)
+        auto_diff_setup = functools.partial(auto_diff_case, functions, values)
+        jacobian_setup = functools.partial(jacobian_case, functions, values)
+        benchmarks[f'layer/auto_diff/n={n},m={m}'] = (params, auto_diff_setup)
+        benchmarks[f'layer/jacobian/n={n},m={m}'] = (params, jacobian_setup)
+
+    for n, d in chains:
+        functions, values = chain(n, d)
+        params = dict(n=n, m=n, depth=d)
+        auto_diff_setup = functools.partial(auto_diff_case, functions, values)
+        jacobian_setup = functools.partial(jacobian_case, functions, values)
+        benchmarks[f'chain/auto_diff/n={n},depth={d}'] = (params, auto_diff_setup)
+        benchmarks[f'chain/sparse/n={n},depth={d}'] = \
+            (params, functools.partial(auto_diff_case, functions, values, sparse=True))
+        benchmarks[f'chain/jacobian/n={n},depth={d}'] = (params, jacobian_setup)
+    return benchmarks
+
+
+def count_allocations(run):
+    """Returns the number of memory blocks allocated by run, as the change of sys.getallocatedblocks
+    with the garbage collector disabled, so that no block allocated by the run is reclaimed by a
+    collection before it is counted. Blocks freed by reference counting during the run (e.g. the
+    temporaries of an expression) are not counted."""
+    gc.collect()
+    gc.disable()
+    try:
+        before = sys.getallocatedblocks()
+        result = run()
+        allocated = sys.getallocatedblocks() - before
+    finally:
+        gc.enable()
+    del result
+    return allocated
+
+
+def measure(run, repeat):
+    """Returns the best wall time in seconds, the peak traced memory and the blocks allocated."""
+    seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+    allocated = count_allocations(run)
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': seconds, 'peak_bytes': peak, 'allocated_blocks': allocated}
+
+
+def compare(results, baseline, threshold, memory_threshold, allocation_threshold, min_seconds):
+    """Prints the ratios to the baseline and returns the names of the regressed cases."""
+    regressions = []
+    print(f"{'case':<40} {'time ratio':>10} {'memory ratio':>13} {'allocation ratio':>17}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<40} {'new':>10}")
+            continue
+        time_ratio = result['seconds'] / base['seconds']
+        memory_ratio = result['peak_bytes'] / max(base['peak_bytes'], 1)
+        slower = time_ratio > 1 + threshold and result['seconds'] - base['seconds'] > min_seconds
+        larger = memory_ratio > 1 + memory_threshold
+        allocation_ratio = result['allocated_blocks'] / max(base['allocated_blocks'], 1)
+        # A few blocks more are noise (e.g. the interpreter caches), as are a few microseconds
+        allocating = (allocation_ratio > 1 + allocation_threshold
+                      and result['allocated_blocks'] - base['allocated_blocks'] > 10)
+        flag = '  REGRESSION' if slower or larger or allocating else ''
+        print(f"{name:<40} {time_ratio:>9.2f}x {memory_ratio:>12.2f}x {allocation_ratio:>16.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='smaller sweep, for a fast check')
+    parser.add_argument('--filter', default='', help='only run the cases whose name contains this string')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timings, the best is kept')
+    parser.add_argument('--output', help='path of the JSON file to write the results to')
+    parser.add_argument('--baseline', help='path of a JSON file of results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown flagged as a regression')
+    parser.add_argument('--memory-threshold', type=float, default=0.1,
+                        help='relative peak memory increase flagged as a regression')
+    parser.add_argument('--allocation-threshold', type=float, default=0.1,
+                        help='relative increase of the allocated blocks flagged as a regression')
+    parser.add_argument('--min-seconds', type=float, default=1e-4,
+                        help='slowdowns smaller than this many seconds are ignored as noise')
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'case':<40} {'time (ms)':>10} {'peak (KiB)':>11} {'allocated':>10}")
+    for name, (params, setup) in cases(args.quick).items():
+        if args.filter not in name:
+            continue
+        result = dict(params, **measure(setup(), args.repeat))
+        results[name] = result
+        print(f"{name:<40} {result['seconds'] * 1e3:>10.3f} {result['peak_bytes'] / 1024:>11.1f} "
+              f"{result['allocated_blocks']:>10}")
+
+    if args.output:
+        report = {'meta': {'python': platform.python_version(), 'numpy': np.__version__,
+                           'platform': platform.platform(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                           'quick': args.quick, 'repeat': args.repeat},
+                  'results': results}
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+        print()
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold,
+                              args.allocation_threshold, args.min_seconds)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""Benchmark harness of the optimizers on standard test problems.
+
+Runs every optimizer of zapnAD.optimizers on Rosenbrock, Rastrigin, ill-conditioned
+quadratic and logistic regression problems at several dimensions, and reports for each
+run the iterations, the function and gradient evaluations (and Hessian-vector products),
+the wall time and the final gap to the known optimal value. A run is solved when the gap
+is within --gap. The results are printed as a table and can be written as JSON, and
+compared with stored results: the slower runs and the runs no longer solved are flagged
+and the exit status is 1.
+
+Usage (from the repository root):
+    PYTHONPATH=. python benchmarks/bench_optimizers.py --output baseline.json
+    PYTHONPATH=. python benchmarks/bench_optimizers.py --baseline baseline.json
+    PYTHONPATH=. python benchmarks/bench_optimizers.py --dims 2 10 --filter LBFGS
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from zapnAD import overLoad
+from zapnAD.optimizers import (GradientDescentOptimizer, MomentumOptimizer, AdaGradOptimizer,
+                               AdamOptimizer, NewtonCGOptimizer, LBFGSOptimizer)
+
+
+# Optimizers and the hyperparameters they are run with on every problem
+OPTIMIZERS = {
+    'GradientDescent': (GradientDescentOptimizer, dict(learning_rate=1e-3)),
+    'Momentum': (MomentumOptimizer, dict(learning_rate=1e-3, momentum=0.9)),
+    'AdaGrad': (AdaGradOptimizer, dict(learning_rate=0.5)),
+    'Adam': (AdamOptimizer, dict(learning_rate=0.05)),
+    'NewtonCG': (NewtonCGOptimizer, dict()),
+    'LBFGS': (LBFGSOptimizer, dict()),
+}
+
+
+def rosenbrock(n):
+    """Rosenbrock function, minimum 0 at (1, ..., 1), from (-1.2, 1, -1.2, 1, ...)."""
+    def f(v):
+        return sum(100 * (v[i + 1] - v[i] ** 2) ** 2 + (1 - v[i]) ** 2 for i in range(n - 1))
+    return f, np.resize([-1.2, 1.0], n), 0.0
+
+
+def rastrigin(n):
+    """Rastrigin function, minimum 0 at 0, from a point of its central basin."""
+    def f(v):
+        return 10 * n + sum(x * x - 10 * overLoad.cos(2 * np.pi * x) for x in v)
+    return f, np.random.default_rng(n).uniform(-0.4, 0.4, n), 0.0
+
+
+def quadratic(n, condition=1e3):
+    """Quadratic with eigenvalues from 1 to condition, minimum 0 at 0, from (1, ..., 1)."""
+    scales = np.geomspace(1, condition, n) / condition
+    def f(v):
+        return sum(c * x * x for c, x in zip(scales, v))
+    return f, np.ones(n), 0.0
+
+
+def logistic(n, n_samples=40, l2=1e-2):
+    """L2 regularized logistic regression on n features, from 0.
+    The optimal value is computed with Newton's method on plain arrays."""
+    rng = np.random.default_rng(n)
+    X = rng.standard_normal((n_samples, n))
+    y = np.sign(X @ rng.standard_normal(n) + 0.5 * rng.standard_normal(n_samples))
+
+    def f(v):
+        losses = (overLoad.log(1 + overLoad.exp(-y[k] * sum(X[k, j] * v[j] for j in range(n))))
+                  for k in range(n_samples))
+        return sum(losses) / n_samples + l2 * sum(x * x for x in v)
+
+    w = np.zeros(n)
+    for _ in range(50):
+        p = 1 / (1 + np.exp(y * (X @ w)))
+        grad = -X.T @ (y * p) / n_samples + 2 * l2 * w
+        hess = X.T @ (X * (p * (1 - p))[:, None]) / n_samples + 2 * l2 * np.eye(n)
+        w -= np.linalg.solve(hess, grad)
+    optimum = np.mean(np.log1p(np.exp(-y * (X @ w)))) + l2 * w @ w
+    return f, np.zeros(n), optimum
+
+
+PROBLEMS = {'rosenbrock': rosenbrock, 'rastrigin': rastrigin, 'quadratic': quadratic, 'logistic': logistic}
+
+
+def run(optimizer_class, hyperparameters, problem, max_iter):
+    """Runs one optimizer on one problem and returns the summary of the run."""
+    function, init_variables, optimum = problem
+    opt = optimizer_class(**dict(hyperparameters, max_iter=max_iter, history='none'))
+    begin = time.perf_counter()
+    try:
+        with np.errstate(all='ignore'):
+            val, _ = opt.optimize(function, init_variables)
+        value, error = float(np.sum(val)), None
+    # A diverging run does not stop the others
+    except Exception as exception:
+        value, error = np.inf, repr(exception)
+    seconds = time.perf_counter() - begin
+    # Failures before the first iteration leave no iteration count
+    return {'n_iter': getattr(opt, 'i', 0), 'n_values': opt.n_values, 'n_gradients': opt.n_gradients,
+            'n_hvp': getattr(opt, 'n_hvp', 0), 'seconds': seconds, 'value': value,
+            'gap': value - optimum if np.isfinite(value) else np.inf, 'error': error}
+
+
+def compare(results, baseline, threshold, min_seconds):
+    """Prints the time ratios to the baseline and returns the names of the regressed runs."""
+    regressions = []
+    print(f"{'run':<40} {'time ratio':>10} {'solved':>14}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<40} {'new':>10}")
+            continue
+        ratio = result['seconds'] / base['seconds']
+        slower = ratio > 1 + threshold and result['seconds'] - base['seconds'] > min_seconds
+        unsolved = base['solved'] and not result['solved']
+        flag = '  REGRESSION' if slower or unsolved else ''
+        print(f"{name:<40} {ratio:>9.2f}x {str(base['solved']):>6} -> {str(result['solved']):<5}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dims', type=int, nargs='+', default=[2, 10, 30], help='problem dimensions')
+    parser.add_argument('--max-iter', type=int, default=2000, help='max iterations of every run')
+    parser.add_argument('--gap', type=float, default=1e-4, help='gap to the optimal value of a solved run')
+    parser.add_argument('--filter', default='', help='only run the runs whose name contains this string')
+    parser.add_argument('--output', help='path of the JSON file to write the results to')
+    parser.add_argument('--baseline', help='path of a JSON file of results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown flagged as a regression')
+    parser.add_argument('--min-seconds', type=float, default=1e-2,
+                        help='slowdowns smaller than this many seconds are ignored as noise')
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'run':<40} {'iters':>6} {'f evals':>8} {'g evals':>8} {'hvp':>6} {'time (s)':>9} "
+          f"{'gap':>10} {'solved':>6}")
+    for problem_name, make_problem in PROBLEMS.items():
+        for n in args.dims:
+            problem = None
+            for optimizer_name, (optimizer_class, hyperparameters) in OPTIMIZERS.items():
+                name = f'{problem_name}/n={n}/{optimizer_name}'
+                if args.filter not in name:
+                    continue
+                problem = problem or make_problem(n)
+                result = run(optimizer_class, hyperparameters, problem, args.max_iter)
+                result.update(problem=problem_name, n=n, optimizer=optimizer_name,
+                              solved=bool(result['gap'] <= args.gap))
+                results[name] = result
+                print(f"{name:<40} {result['n_iter']:>6} {result['n_values']:>8} {result['n_gradients']:>8} "
+                      f"{result['n_hvp']:>6} {result['seconds']:>9.3f} {result['gap']:>10.2e} "
+                      f"{str(result['solved']):>6}")
+
+    if args.output:
+        report = {'meta': {'python': platform.python_version(), 'numpy': np.__version__,
+                           'platform': platform.platform(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                           'max_iter': args.max_iter, 'gap': args.gap},
+                  'results': results}
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+        print()
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Microbenchmark of the per-operation overhead of Variable on deep expression chains.
+
+Compares the current Variable with a copy of the previous implementation, which
+dispatched on AttributeError, built temporaries for subtraction and negation and
+carried a per-instance __dict__.
+
+Usage (from the repository root):
+    PYTHONPATH=. python benchmarks/bench_variable_ops.py [--depth 2000] [--repeat 5]
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from zapnAD.dualNumbers import Variable
+
+
+class LegacyVariable:
+    """The exception-driven Variable operators, kept as the baseline."""
+
+    def __init__(self, value, derivatives=None):
+        self.val = value
+        self.der = derivatives
+
+    def __mul__(self, other):
+        try:
+            new_f = LegacyVariable(self.val * other.val)
+            new_f.der = self.der * other.val + self.val * other.der
+        except AttributeError:
+            new_f = LegacyVariable(self.val * other)
+            new_f.der = self.der * other
+        return new_f
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __add__(self, other):
+        try:
+            new_f = LegacyVariable(self.val + other.val)
+            new_f.der = self.der + other.der
+        except AttributeError:
+            new_f = LegacyVariable(self.val + other)
+            new_f.der = self.der
+        return new_f
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __neg__(self):
+        return LegacyVariable(-1*self.val, -1*self.der)
+
+    def __sub__(self, other):
+        return self + (-1*other)
+
+    def __rsub__(self, other):
+        return other + (-1*self)
+
+    def __pow__(self, p):
+        new_f = LegacyVariable(self.val ** p)
+        new_f.der = p * self.val ** (p - 1) * self.der
+        return new_f
+
+    def __truediv__(self, other):
+        # The previous Variable had no division, users wrote x * y**-1
+        if isinstance(other, LegacyVariable):
+            return self * other ** -1
+        return self * (1 / other)
+
+
+# Number of Variable operations per link of each chain
+CHAINS = {
+    'constants': (lambda x, y: 2.0 - (x * 0.999 + 0.001) / 1.001, 5),
+    'variables': (lambda x, y: (x * y + x) - y, 3),
+    'mixed': (lambda x, y: -(x - y) * 0.5 + y / 1.5, 6),
+}
+
+
+def run_chain(cls, link, n, depth):
+    der_x, der_y = np.zeros(n), np.zeros(n)
+    der_x[0], der_y[-1] = 1, 1
+    x, y = cls(0.5, der_x), cls(0.25, der_y)
+    for _ in range(depth):
+        x = link(x, y)
+    return x
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--depth', type=int, default=2000, help='number of links per chain')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timings, the best is kept')
+    args = parser.parse_args()
+
+    print(f"{'chain':<10} {'n':>4} {'legacy ns/op':>14} {'Variable ns/op':>16} {'speedup':>8}")
+    for name, (link, ops) in CHAINS.items():
+        for n in (1, 10, 100):
+            times = []
+            for cls in (LegacyVariable, Variable):
+                best = min(timeit.repeat(lambda: run_chain(cls, link, n, args.depth),
+                                         number=1, repeat=args.repeat))
+                times.append(best / (args.depth * ops) * 1e9)
+            print(f"{name:<10} {n:>4} {times[0]:>14.0f} {times[1]:>16.0f} {times[0] / times[1]:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,19 @@
 tests=(
     test_dualNumber.py
     test_overload.py
-    test_optimizers.py)
+    test_optimizers.py
+    test_reverseMode.py
+    test_sparseDerivative.py
+    test_tensorVariable.py
+    test_tracing.py
+    test_codegen.py
+    test_sparsity.py
+    test_hyperDual.py
+    test_taylor.py
+    test_lineSearch.py
+    test_diffCache.py
+    test_profiling.py
+    test_callbacks.py)
 
 # decide what driver to use (depending on arguments given)
 unit='-m unittest'
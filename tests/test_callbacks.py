@@ -0,0 +1,93 @@
+import io
+import csv
+import json
+import pytest
+import numpy as np
+from zapnAD.optimizers import *
+from zapnAD.callbacks import *
+
+class TestCallbacks():
+
+    @classmethod
+    def setup_class(TestCallbacks):
+        """Set up a function to use in many test cases."""
+        return lambda v: 100 * (v[1] - v[0]**2)**2 + (1 - v[0])**2
+
+    def test_one(self):
+        """Test the telemetry of every iteration matches the history"""
+        f = self.setup_class()
+        infos = []
+        opt = LBFGSOptimizer(callbacks=infos.append)
+        val, w = opt.optimize(f, [-1.2, 1.0])
+
+        assert [info['iteration'] for info in infos] == list(range(1, opt.i + 1))
+        assert [info['value'] for info in infos] == pytest.approx(opt.get_values()[1:, 0])
+        assert [info['gradient_norm'] for info in infos] == pytest.approx(np.linalg.norm(opt.get_jacobians()[1:], axis=1))
+        assert [info['step_norm'] for info in infos] == pytest.approx(np.linalg.norm(opt.get_step_deltas()[1:], axis=1))
+        assert infos[-1]['variables'] == pytest.approx(w)
+        assert infos[-1]['n_gradients'] == opt.n_gradients
+        assert all(info['eval_time'] + info['step_time'] == pytest.approx(info['time']) for info in infos)
+        assert not opt.stopped
+
+    def test_two(self):
+        """Test callbacks requesting early termination"""
+        f = self.setup_class()
+        for optimizer_class in (GradientDescentOptimizer, NewtonCGOptimizer):
+            opt = optimizer_class(learning_rate=1e-3, callbacks=lambda info: info['iteration'] == 3)
+            opt.optimize(f, [-1.2, 1.0])
+            assert opt.i == 3
+            assert opt.stopped
+
+        stopping = EarlyStopping(patience=3, min_delta=1.0)
+        opt = GradientDescentOptimizer(learning_rate=1e-3, callbacks=stopping)
+        opt.optimize(f, [-1.2, 1.0])
+        assert opt.stopped and opt.i < 1000
+        # Reused for a new optimization
+        opt.optimize(f, [-1.2, 1.0])
+        assert opt.stopped and opt.i < 1000
+
+        opt = GradientDescentOptimizer(learning_rate=1e-3, callbacks=[TimeLimit(0.0)])
+        opt.optimize(f, [-1.2, 1.0])
+        assert opt.i == 1
+        with pytest.raises(ValueError):
+            GradientDescentOptimizer(callbacks=[1])
+
+    def test_three(self):
+        """Test the in-memory counter and the loggers"""
+        f = self.setup_class()
+        counter, rows, lines = TelemetryCounter(), io.StringIO(), io.StringIO()
+        opt = AdamOptimizer(callbacks=[counter, CSVLogger(rows),
+                                       JSONLinesLogger(lines, fields=('iteration', 'value', 'variables'))])
+        opt.optimize(f, [-1.2, 1.0])
+
+        summary = counter.summary()
+        assert summary['iterations'] == opt.i
+        assert summary['eval_time'] + summary['step_time'] == pytest.approx(summary['time'])
+        assert summary['best_value'] == pytest.approx(opt.get_values().min())
+
+        table = list(csv.DictReader(io.StringIO(rows.getvalue())))
+        assert len(table) == opt.i
+        assert float(table[-1]['value']) == pytest.approx(opt.get_values()[-1, 0])
+        records = [json.loads(line) for line in lines.getvalue().splitlines()]
+        assert records[-1]['variables'] == pytest.approx(opt.curr_w)
+
+    def test_four(self, tmp_path):
+        """Test logging to a path, and callbacks of stochastic optimization"""
+        data = np.random.default_rng(0).random((100, 2))
+        loss = lambda v, batch: (v[0] * batch[:, 0] - batch[:, 1])**2
+        path = str(tmp_path / 'log.jsonl')
+        with JSONLinesLogger(path) as logger:
+            opt = GradientDescentOptimizer(callbacks=[logger, lambda info: info['epoch'] == 1])
+            opt.optimize_stochastic(loss, [0.0], data, epochs=5, batch_size=10)
+
+        records = [json.loads(line) for line in open(path)]
+        assert len(records) == opt.i == 11
+        assert len(opt.epoch_values) == 2
+        assert records[-1]['n_gradients'] == 11
+
+    def test_five(self):
+        """Test callbacks are rejected by optimize_batch, which would never call them"""
+        f = self.setup_class()
+        opt = GradientDescentOptimizer(callbacks=TelemetryCounter())
+        with pytest.raises(ValueError):
+            opt.optimize_batch(f, np.array([[1.0, 1.0], [2.0, 0.5]]))
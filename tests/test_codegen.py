@@ -0,0 +1,116 @@
+import os
+import sys
+import subprocess
+import threading
+import pytest
+import numpy as np
+import zapnAD
+from zapnAD.dualNumbers import *
+from zapnAD.overLoad import *
+from zapnAD.tracing import *
+from zapnAD.codegen import *
+
+WEIGHTS = np.array([[1.0, 2.0, -0.5], [0.3, -1.0, 2.0]])
+
+class TestCodegen:
+
+    @classmethod
+    def setup_class(TestCodegen):
+        """Set up functions to use in many test cases."""
+        f1 = lambda v: tanh(WEIGHTS[0, 0] * v[0] + WEIGHTS[0, 1] * v[1] + WEIGHTS[0, 2] * v[2])
+        f2 = lambda v: exp(v[0] * v[1]) / sqrt(v[2]) - v[1] ** 3 + 2.0
+        return [f1, f2], np.array([0.1, 0.2, 0.3])
+
+    def test_one(self, tmp_path):
+        """Test the generated module computes the values and Jacobian of auto_diff"""
+        functions, x = self.setup_class()
+        module = compile_functions(functions, 3, cache_dir=str(tmp_path))
+        values, J = module.diff(x)
+        expected_values, expected_J = auto_diff(functions, x)
+
+        assert values == pytest.approx(expected_values)
+        assert J == pytest.approx(expected_J)
+        assert module.values(x) == pytest.approx(expected_values)
+        points = np.random.default_rng(0).random((5, 3)) + 0.1
+        batch_values, batch_J = module.diff(points)
+        assert batch_J.shape == (5, 2, 3)
+        assert batch_J[3] == pytest.approx(auto_diff(functions, points[3])[1])
+
+    def test_two(self, tmp_path):
+        """Test the modules are cached on disk by key, and imported without tracing again"""
+        functions, x = self.setup_class()
+        key = function_key(functions, 3)
+        assert key == function_key(functions, 3)
+        assert key != function_key(functions, 4)
+        assert key != function_key(functions[::-1], 3)
+
+        module = compile_functions(functions, 3, cache_dir=str(tmp_path))
+        assert module.KEY == key
+        assert compile_functions(functions, 3, cache_dir=str(tmp_path)) is module
+        files = [name for name in os.listdir(tmp_path) if name.endswith('.py')]
+        assert files == [f'zapnad_{key[:32]}.py']
+
+        # Another key is another module, even in the same directory
+        other = compile_functions([lambda v: v[0] * v[1]], 2, cache_dir=str(tmp_path), key='custom')
+        assert other.diff([2.0, 3.0])[1] == pytest.approx(np.array([[3.0, 2.0]]))
+
+    def test_three(self):
+        """Test the key depends on the values the functions refer to"""
+        scale = np.array([1.0, 2.0])
+        f = lambda v: scale[0] * v[0] + scale[1] * v[1]
+        g = lambda v, c=3.0: c * sin(v[0])
+        key_f, key_g = function_key([f], 2), function_key([g], 2)
+
+        scale[1] = 5.0
+        assert function_key([f], 2) != key_f
+        h = lambda v, c=4.0: c * sin(v[0])
+        assert function_key([h], 2) != key_g
+
+    def test_four(self, tmp_path):
+        """Test the generated module runs without zapnAD"""
+        functions, x = self.setup_class()
+        source = generate_source(functions, 3)
+        path = tmp_path / 'generated.py'
+        path.write_text(source)
+        script = ("import sys, runpy; sys.modules['zapnAD'] = None; "
+                  f"module = runpy.run_path({str(path)!r}); print(module['diff']([0.1, 0.2, 0.3])[0][1])")
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+        assert float(output.stdout) == pytest.approx(auto_diff(functions, x)[0][1])
+
+        with pytest.raises(TracingError):
+            generate_source([lambda v: v[0] if v[0] > 0 else -v[0]], 1)
+
+    def test_five(self, tmp_path):
+        """Test the key depends on the contents of objects, and not on their address"""
+        class Model:
+            def __init__(self, w):
+                self.w = w
+
+            def __call__(self, v):
+                return self.w[0] * v[0] + self.w[1] * v[1]
+
+        model = Model(np.array([1.0, 2.0]))
+        f = lambda v: model(v)
+        module = compile_functions([f], 2, cache_dir=str(tmp_path))
+        assert module.diff([1.0, 1.0])[1] == pytest.approx(np.array([[1.0, 2.0]]))
+        model.w = np.array([10.0, 20.0])
+        module = compile_functions([f], 2, cache_dir=str(tmp_path))
+        assert module.diff([1.0, 1.0])[1] == pytest.approx(auto_diff([f], [1.0, 1.0])[1])
+
+        # Callable objects, partials, bound methods and numpy functions give the same key in every process
+        script = tmp_path / 'keys.py'
+        script.write_text(
+            "import functools\nimport numpy as np\nfrom numpy import sum\nfrom zapnAD.codegen import function_key\n"
+            "class Model:\n    def __init__(self):\n        self.w = np.array([1.0, 2.0])\n"
+            "    def __call__(self, v):\n        return sum(self.w * np.array(v))\n"
+            "model = Model()\nscale = functools.partial(np.multiply, 2.0)\n"
+            "print(function_key([model, model.__call__, lambda v: scale(v[0]) + np.sum(v)], 2))\n")
+        root = os.path.dirname(os.path.dirname(zapnAD.__file__))
+        keys = [subprocess.run([sys.executable, str(script)], capture_output=True, text=True, check=True,
+                               env=dict(os.environ, PYTHONPATH=root, PYTHONHASHSEED=str(seed))).stdout
+                for seed in (1, 2)]
+        assert keys[0] == keys[1]
+
+        lock = threading.Lock()
+        with pytest.raises(ValueError):
+            function_key([lambda v: v[0] if lock else v[1]], 2)
@@ -0,0 +1,91 @@
+import pytest
+import numpy as np
+from zapnAD.dualNumbers import *
+from zapnAD.overLoad import *
+from zapnAD.diffCache import *
+from zapnAD.optimizers import *
+
+class TestDiffCache:
+
+    @classmethod
+    def setup_class(TestDiffCache):
+        """Set up functions to use in many test cases."""
+        f1 = lambda v: v[0] * sin(v[1])
+        f2 = lambda v: v[0] ** 2 + v[1]
+        return f1, f2
+
+    def test_one(self):
+        """Test a repeated evaluation is a hit with the same result as auto_diff"""
+        f1, f2 = self.setup_class()
+        cache = DiffCache()
+        values, J = cache([f1, f2], [1.0, 2.0])
+        values_hit, J_hit = cache([f1, f2], np.array([1.0, 2.0]))
+        values_fwd, J_fwd = auto_diff([f1, f2], [1.0, 2.0])
+
+        assert (values_hit == values_fwd).all()
+        assert (J_hit == J_fwd).all()
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+        assert cache.stats()['hit_rate'] == 0.5
+        with pytest.raises(ValueError):
+            J_hit[0, 0] = 0
+
+    def test_two(self):
+        """Test the keys distinguish functions, values and modes"""
+        f1, f2 = self.setup_class()
+        cache = DiffCache()
+        cache([f1], [1.0, 2.0])
+        cache([f2], [1.0, 2.0])
+        cache([f1], [1.0, 2.5])
+        values, J = cache([f1], [1.0, 2.0], mode='reverse')
+        assert cache.stats()['misses'] == 4
+        assert len(cache) == 4
+        assert J == pytest.approx(auto_diff([f1], [1.0, 2.0])[1])
+
+    def test_three(self):
+        """Test least recently used eviction by number of entries and by bytes"""
+        f1, f2 = self.setup_class()
+        cache = DiffCache(max_entries=2)
+        cache([f1], [1.0, 1.0])
+        cache([f1], [2.0, 2.0])
+        cache([f1], [1.0, 1.0])
+        cache([f1], [3.0, 3.0])
+        assert cache.stats()['evictions'] == 1
+        # [2, 2] was the least recently used
+        cache([f1], [1.0, 1.0])
+        assert cache.stats()['hits'] == 2
+        cache([f1], [2.0, 2.0])
+        assert cache.stats()['misses'] == 4
+
+        cache = DiffCache(max_entries=None, max_bytes=100)
+        for k in range(10):
+            cache([f1], [float(k), 1.0])
+        assert 0 < cache.stats()['bytes'] <= 100
+        assert len(cache) < 10
+
+    def test_four(self):
+        """Test invalidating entries"""
+        f1, f2 = self.setup_class()
+        cache = DiffCache()
+        cache([f1], [1.0, 1.0])
+        cache([f1], [2.0, 2.0])
+        cache([f2], [1.0, 1.0])
+        assert cache.invalidate([f1], [2.0, 2.0], tag='forward') == 1
+        assert cache.invalidate([f1]) == 1
+        assert len(cache) == 1
+        cache.clear()
+        assert cache.stats() == {'hits': 0, 'misses': 0, 'evictions': 0, 'hit_rate': 0.0, 'entries': 0, 'bytes': 0}
+
+    def test_five(self):
+        """Test optimizers reuse a shared cache"""
+        f1, f2 = self.setup_class()
+        cache = DiffCache(max_entries=10000)
+        opt = AdamOptimizer(cache=cache)
+        r1, r2 = opt.optimize(f2, [1, 1])
+        misses = cache.stats()['misses']
+        # Restarting the same optimization only hits the cache
+        opt_again = AdamOptimizer(cache=cache)
+        r1_again, r2_again = opt_again.optimize(f2, [1, 1])
+        assert (r2_again == r2).all()
+        assert cache.stats()['misses'] == misses
+        assert opt_again.n_gradients == 0
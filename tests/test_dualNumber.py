@@ -176,6 +176,46 @@ class TestVariable:
         """Test __ne__"""
         v1, v2 = self.setup_class()
         assert v1 != v2
+
+    def test_twenty_four(self):
+        """Test division with two dual numbers."""
+        v1, v2 = self.setup_class()
+        res = v1 / v2
+
+        assert res.val == 1.25
+        assert res.der == pytest.approx(np.array([(1.5*4 - 5*2)/16]))
+
+    def test_twenty_five(self):
+        """Test __truediv__ with real on the right hand side."""
+        v1, v2 = self.setup_class()
+        res = v1 / 2
+
+        assert res.val == 2.5
+        assert res.der == np.array([0.75])
+
+    def test_twenty_six(self):
+        """Test __rtruediv__: division with real on the left hand side."""
+        v1, v2 = self.setup_class()
+        res = 10 / v1
+
+        assert res.val == 2
+        assert res.der == pytest.approx(np.array([-10*1.5/25]))
+
+    def test_twenty_seven(self):
+        """Test operations with unsupported types raise TypeError."""
+        v1, v2 = self.setup_class()
+        with pytest.raises(TypeError):
+            v1 + "a"
+        with pytest.raises(TypeError):
+            v1 * [1, 2]
+        with pytest.raises(TypeError):
+            "a" - v1
+
+    def test_twenty_eight(self):
+        """Test Variable instances have no __dict__."""
+        v1, v2 = self.setup_class()
+        with pytest.raises(AttributeError):
+            v1.name = "x"
         
 
 class TestVariables:
@@ -212,6 +252,17 @@ class TestVariables:
         with pytest.raises(AssertionError):
             v_const.set_values([5, 5])
 
+    def test_five(self):
+        """Test setting values of variables with given derivative seeds."""
+        v_const = Variables(3)
+        seeds = np.array([[1, 0], [0, 1], [1, 0]])
+        v_objs = v_const.set_values([1, 2, 3], seeds=seeds)
+
+        for v, seed in zip(v_objs, seeds):
+            assert (v.der == seed).all()
+        with pytest.raises(AssertionError):
+            v_const.set_values([1, 2, 3], seeds=seeds[:2])
+
 
 class TestFunctions:
    
@@ -243,6 +294,17 @@ class TestFunctions:
 
         assert (function.Jacobian() == np.array([[1, 3]])).all()
 
+    def test_four(self):
+        """Test assembling the Jacobian of a chunk of seed directions in place"""
+        variables = Variables(n_inputs=3)
+        variables.set_values([3, 1, 2], seeds=[np.zeros(1), np.ones(1), np.zeros(1)])
+        x, y, z = variables[0], variables[1], variables[2]
+        function = Functions(Fs=[x*y, y*z])
+        J = np.zeros((2, 3))
+        function.Jacobian(out=J, columns=slice(1, 2))
+
+        assert (J == np.array([[0, 3, 0], [0, 2, 0]])).all()
+
 
 class TestAutoDiff:
 
@@ -256,4 +318,99 @@ class TestAutoDiff:
         """Test Auto Diff Jacobian"""
         function1 = lambda v: v[0]*v[1]
         values, J = auto_diff([function1], variable_values=[3,1])
-        assert (J == np.array([[1, 3]])).all()
\ No newline at end of file
+        assert (J == np.array([[1, 3]])).all()
+
+    def test_three(self):
+        """Test chunked Auto Diff matches a single pass for every chunk size"""
+        function1 = lambda v: v[0]*v[1] + v[2]**2 - v[3]
+        function2 = lambda v: v[4] / v[0]
+        point = [3, 1, 2, -1, 5]
+        values, J = auto_diff([function1, function2], point)
+        for chunk_size in range(1, 7):
+            values_k, J_k = auto_diff([function1, function2], point, chunk_size=chunk_size)
+            assert (values_k == values).all()
+            assert np.allclose(J_k, J)
+
+    def test_four(self):
+        """Test the automatic chunk size from a memory budget"""
+        n = 200
+        function1 = lambda v: sum(v[i] * v[i + 1] for i in range(n - 1))
+        point = np.linspace(0, 1, n)
+        chunk_size = chunk_size_for([function1], point, memory_budget=8 * n * 50)
+
+        assert 1 <= chunk_size < n
+        assert chunk_size_for([function1], point[:10]) == 10
+        values, J = auto_diff([function1], point)
+        values_k, J_k = auto_diff([function1], point, memory_budget=8 * n * 50)
+        assert np.allclose(J_k, J)
+        values_k, J_k = auto_diff([function1], point, chunk_size='auto')
+        assert np.allclose(J_k, J)
+
+    def test_five(self):
+        """Test invalid chunk sizes"""
+        function1 = lambda v: v[0]*v[1]
+        with pytest.raises(ValueError):
+            auto_diff([function1], [3, 1], chunk_size=0)
+        with pytest.raises(ValueError):
+            auto_diff([function1], [3, 1], chunk_size=1, sparse=True)
+
+class TestJvp:
+
+    def test_one(self):
+        """Test the Jacobian-vector product matches the Jacobian"""
+        function1 = lambda v: v[0]*v[1] + v[2]**2
+        function2 = lambda v: v[2] / v[0]
+        v = np.array([1.0, -2.0, 0.5])
+        values, product = jvp([function1, function2], [3, 1, 2], v)
+        values_J, J = auto_diff([function1, function2], [3, 1, 2])
+
+        assert (values == values_J).all()
+        assert product.shape == (2, )
+        assert np.allclose(product, J @ v)
+
+    def test_two(self):
+        """Test the Jacobian-vector product of several directions at once"""
+        function1 = lambda v: v[0]*v[1]
+        function2 = lambda v: v[1]
+        V = np.array([[1.0, 0.0, 2.0], [0.0, 1.0, 3.0]])
+        values, product = jvp([function1, function2], [3, 1], V)
+
+        assert product.shape == (2, 3)
+        assert np.allclose(product, np.array([[1, 3], [0, 1]]) @ V)
+
+    def test_three(self):
+        """Test a direction with the wrong number of variables"""
+        with pytest.raises(AssertionError):
+            jvp([lambda v: v[0]], [3, 1], [1.0])
+
+class TestBatchAutoDiff:
+
+    def test_one(self):
+        """Test setting batch values of variables"""
+        variables = Variables(n_inputs=2)
+        variables.set_batch_values([[3, 1], [2, 5], [0, 4]])
+        x, y = variables[0], variables[1]
+
+        assert (x.val == np.array([3, 2, 0])).all()
+        assert (y.val == np.array([1, 5, 4])).all()
+        assert (x.der == np.array([[1], [0]])).all()
+
+    def test_two(self):
+        """Test setting batch values of variables with incorrect dimension."""
+        variables = Variables(n_inputs=2)
+        with pytest.raises(AssertionError):
+            variables.set_batch_values([[3, 1, 2]])
+
+    def test_three(self):
+        """Test Batch Auto Diff matches Auto Diff at each point"""
+        function1 = lambda v: v[0]*v[1] + v[1]**3
+        function2 = lambda v: v[0]
+        points = np.array([[3, 1], [2, 5], [0, 4], [-1, 2]])
+        values, J = batch_auto_diff([function1, function2], points)
+
+        assert values.shape == (4, 2)
+        assert J.shape == (4, 2, 2)
+        for k, point in enumerate(points):
+            values_k, J_k = auto_diff([function1, function2], point)
+            assert (values[k] == values_k).all()
+            assert (J[k] == J_k).all()
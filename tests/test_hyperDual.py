@@ -0,0 +1,112 @@
+import pytest
+import numpy as np
+from zapnAD.dualNumbers import *
+from zapnAD.overLoad import *
+from zapnAD.hyperDual import *
+
+def fd_hessian(function, x, eps=1e-6):
+    """Hessian by central differences of the forward mode gradient."""
+    rows = []
+    for e in np.eye(len(x)):
+        _, J_plus = auto_diff([function], x + eps * e)
+        _, J_minus = auto_diff([function], x - eps * e)
+        rows.append((J_plus[0] - J_minus[0]) / (2 * eps))
+    return np.array(rows)
+
+
+class TestHyperDual:
+
+    def test_one(self):
+        """Test the product rule up to second order."""
+        x = HyperDual(3.0, 1.0, 0.0)
+        y = HyperDual(2.0, 0.0, 1.0)
+        f = x * y
+
+        assert f.real == 6.0
+        assert f.eps1 == 2.0
+        assert f.eps2 == 3.0
+        assert f.eps12 == 1.0
+
+    def test_two(self):
+        """Test the second derivative of a power."""
+        x = HyperDual(2.0, 1.0, 1.0)
+        f = x ** 3
+
+        assert f.real == 8.0
+        assert f.eps1 == 12.0
+        assert f.eps12 == 12.0
+
+    def test_three(self):
+        """Test the overLoad functions use the HyperDual methods."""
+        x = HyperDual(0.5, 1.0, 1.0)
+        for func, d2 in [(sin, -np.sin(0.5)), (exp, np.exp(0.5)), (log, -4.0),
+                         (sqrt, -0.25 * 0.5 ** -1.5), (cosh, np.cosh(0.5))]:
+            assert func(x).eps12 == pytest.approx(d2)
+
+    def test_four(self):
+        """Test square root of a negative number."""
+        with pytest.raises(ValueError):
+            sqrt(HyperDual(-1.0, 1.0, 1.0))
+
+
+    def test_five(self):
+        """Test powers at zero."""
+        value, gradient, H = hessian(lambda v: v[0] ** 1 + v[1] ** 2 + v[1] ** 0, [0.0, 0.0])
+        assert value == 1.0
+        assert (gradient == np.array([1, 0])).all()
+        assert (H == np.diag([0, 2])).all()
+        value, gradient, H = hessian(lambda v: sqrt(v[0]), [0.0])
+        assert value == 0.0
+        assert gradient[0] == np.inf
+
+
+class TestHessian:
+
+    @classmethod
+    def setup_class(TestHessian):
+        """Set up a function using every elementary function."""
+        function = lambda v: sin(v[0]) * exp(v[1]) + log(v[0]) * v[1] ** 3 + sqrt(v[0] * v[1]) \
+            - arctan(v[1]) + tanh(v[0]) * cos(v[1]) + arcsin(v[1] / 4) + log10(v[0]) \
+            - tan(v[0]) * cosh(v[1]) + sinh(v[0]) / v[1] + arccos(v[0] / 3) + log2(v[1]) \
+            + 3 - v[0] + 1 / v[1]
+        return function, np.array([0.7, 1.3])
+
+    def test_one(self):
+        """Test the Hessian matches finite differences of the gradient."""
+        function, x = self.setup_class()
+        value, gradient, H = hessian(function, x)
+        values, J = auto_diff([function], x)
+
+        assert value == pytest.approx(values[0])
+        assert gradient == pytest.approx(J[0])
+        assert H.shape == (2, 2)
+        assert H == pytest.approx(fd_hessian(function, x), abs=1e-6)
+
+    def test_two(self):
+        """Test the Hessian of variable exponents."""
+        function = lambda v: 2 ** v[1] + v[0] ** v[1]
+        value, gradient, H = hessian(function, [0.7, 1.3])
+
+        assert H[0, 0] == pytest.approx(1.3 * 0.3 * 0.7 ** -0.7)
+        assert H[0, 1] == pytest.approx(0.7 ** 0.3 * (1 + 1.3 * np.log(0.7)))
+        assert H[1, 0] == pytest.approx(H[0, 1])
+
+    def test_three(self):
+        """Test Hessian-vector products with one and several directions."""
+        function, x = self.setup_class()
+        value, gradient, H = hessian(function, x)
+        V = np.array([[1.0, -2.0, 0.5], [0.5, 1.0, 3.0]])
+        value_v, gradient_v, HV = hvp(function, x, V)
+
+        assert HV.shape == (2, 3)
+        assert HV == pytest.approx(H @ V)
+        assert gradient_v == pytest.approx(gradient)
+        assert hvp(function, x, V[:, 0])[2] == pytest.approx(H @ V[:, 0])
+
+    def test_four(self):
+        """Test the Hessian of a constant and of a linear function."""
+        value, gradient, H = hessian(lambda v: 2.0, [1.0, 2.0])
+        assert (H == 0).all()
+        value, gradient, H = hessian(lambda v: 2 * v[0] - v[1], [1.0, 2.0])
+        assert (gradient == np.array([2, -1])).all()
+        assert (H == 0).all()
@@ -0,0 +1,122 @@
+import pytest
+import numpy as np
+from zapnAD.lineSearch import *
+from zapnAD.optimizers import *
+
+class Quadratic:
+    """phi(t) = (t - 2)**2 with counters of the evaluations."""
+
+    def __init__(self):
+        self.n_values = 0
+        self.n_slopes = 0
+
+    def value(self, t):
+        self.n_values += 1
+        return (t - 2)**2
+
+    def slope(self, t):
+        self.n_slopes += 1
+        return (t - 2)**2, 2 * (t - 2)
+
+
+class TestArmijoLineSearch:
+
+    def test_one(self):
+        """Test the first step is accepted when it decreases enough"""
+        phi = Quadratic()
+        t = ArmijoLineSearch().search(phi, 4.0, -4.0)
+        assert t == 1.0
+        assert phi.n_values == 1
+        assert phi.n_slopes == 0
+
+    def test_two(self):
+        """Test backtracking from a too long step with interpolation"""
+        phi = Quadratic()
+        t = ArmijoLineSearch(initial=10.0).search(phi, 4.0, -4.0)
+        assert phi.value(t) <= 4.0 - 1e-4 * 4 * t
+        assert t < 10.0
+        assert phi.n_slopes == 0
+
+    def test_three(self):
+        """Test no step is taken when no trial step decreases enough"""
+        phi = Quadratic()
+        t = ArmijoLineSearch(max_iter=5).search(phi, 0.0, -4.0)
+        assert t == 0.0
+
+
+class TestWolfeLineSearch:
+
+    def test_one(self):
+        """Test the strong Wolfe conditions hold at the step found"""
+        for initial in [0.01, 1.0, 3.9, 50.0]:
+            phi = Quadratic()
+            search = WolfeLineSearch(c_2=0.5, initial=initial)
+            t = search.search(phi, 4.0, -4.0)
+            f, slope = phi.slope(t)
+            assert f <= 4.0 - 1e-4 * 4 * t
+            assert abs(slope) <= 0.5 * 4.0
+            assert phi.n_values == 0
+
+    def test_two(self):
+        """Test the cubic interpolation finds the minimum of a quadratic in one zoom step"""
+        phi = Quadratic()
+        t = WolfeLineSearch(c_2=0.1, initial=5.0).search(phi, 4.0, -4.0)
+        assert t == pytest.approx(2.0)
+
+    def test_three(self):
+        """Test invalid constants"""
+        with pytest.raises(ValueError):
+            WolfeLineSearch(c_1=0.5, c_2=0.1)
+
+
+class TestLineSearchOptimizers:
+
+    @classmethod
+    def setup_class(TestLineSearchOptimizers):
+        """Set up an ill-conditioned quadratic and the Rosenbrock function."""
+        f = lambda v: v[0]**2 + 50 * v[1]**2
+        rosenbrock = lambda v: 100 * (v[1] - v[0]**2)**2 + (1 - v[0])**2
+        return f, rosenbrock
+
+    def test_one(self):
+        """Test gradient descent does not diverge with a too large learning rate"""
+        f, rosenbrock = self.setup_class()
+        r1, r2 = GradientDescentOptimizer(learning_rate=1.0, max_iter=20).optimize(f, [1, 1])
+        assert r1[0] > 1
+        for line_search in [ArmijoLineSearch(), WolfeLineSearch()]:
+            opt = GradientDescentOptimizer(learning_rate=1.0, line_search=line_search)
+            r1, r2 = opt.optimize(f, [1, 1])
+            assert r1[0] == pytest.approx(0, abs=1e-6)
+
+    def test_two(self):
+        """Test the trial points of Armijo only evaluate the function"""
+        f, rosenbrock = self.setup_class()
+        for compile in [True, False]:
+            opt = MomentumOptimizer(learning_rate=0.5, line_search=ArmijoLineSearch(), compile=compile)
+            r1, r2 = opt.optimize(f, [1, 1])
+            counts = opt.get_evaluation_counts()
+            assert counts.shape == (opt.i, 2)
+            # One gradient per iteration, at the accepted point
+            assert (counts[:, 1] == 1).all()
+            assert counts[:, 0].sum() == opt.n_values > 0
+            assert opt.n_gradients == opt.i + 1
+
+    def test_three(self):
+        """Test l-bfgs with both line searches, reusing the last trial evaluation"""
+        f, rosenbrock = self.setup_class()
+        for line_search in [ArmijoLineSearch(), WolfeLineSearch()]:
+            opt = LBFGSOptimizer(line_search=line_search)
+            r1, r2 = opt.optimize(rosenbrock, [-1.2, 1])
+            assert r2 == pytest.approx(np.ones(2), abs=1e-4)
+            assert opt.i < 100
+        # Wolfe computes the gradient at its trial points, the accepted one is not recomputed
+        assert opt.n_values == 0
+        assert opt.n_gradients == opt.get_evaluation_counts()[:, 1].sum() + 1
+
+    def test_four(self):
+        """Test invalid line search settings"""
+        f, rosenbrock = self.setup_class()
+        with pytest.raises(ValueError):
+            GradientDescentOptimizer(line_search='armijo')
+        with pytest.raises(ValueError):
+            GradientDescentOptimizer(line_search=ArmijoLineSearch()).optimize_batch(f, [[1, 1]])
@@ -1,6 +1,9 @@
+import multiprocessing
 import pytest
 import numpy as np
 from zapnAD.optimizers import *
+from zapnAD.optimizers import _init_worker, _run_start
+from zapnAD.hyperDual import hvp
 
 class TestOptimizers():
     
@@ -142,3 +145,377 @@ class TestOptimizers():
         assert opt.get_step_deltas().shape[0] <= 101
         assert opt.get_step_deltas().shape[1] == 2
 
+
+    def test_five_a(self):
+        """test newton-cg optimizer for function 2"""
+        f1, f2 = self.setup_class()
+        opt = NewtonCGOptimizer()
+        r1, r2 = opt.optimize(f2, [1, 1])
+        assert r1[0] == pytest.approx(0, abs=1e-8)
+        assert r2[0] == pytest.approx(0, abs=1e-8)
+        assert r2[1] == pytest.approx(0, abs=1e-8)
+        # A quadratic is solved by the first Newton step
+        assert opt.i <= 2
+
+    def test_five_b(self):
+        """test newton-cg optimizer on the rosenbrock function"""
+        rosenbrock = lambda v: sum(100 * (v[i + 1] - v[i]**2)**2 + (1 - v[i])**2 for i in range(3))
+        opt = NewtonCGOptimizer()
+        r1, r2 = opt.optimize(rosenbrock, [-1.2, 1, -1.2, 1])
+        assert r1[0] == pytest.approx(0, abs=1e-6)
+        assert r2 == pytest.approx(np.ones(4), abs=1e-3)
+        assert opt.i < 100
+        assert opt.get_values().shape[0] == opt.i + 1
+        assert opt.get_step_deltas().shape[1] == 4
+
+    def test_five_c(self):
+        """test newton-cg optimizer on an ill-conditioned function with negative curvature"""
+        f = lambda v: 1e4 * v[0]**2 + v[1]**2 - 0.5 * v[1]**4 / (1 + v[1]**2)
+        opt = NewtonCGOptimizer(radius=0.5)
+        r1, r2 = opt.optimize(f, [1, 1.5])
+        assert r2 == pytest.approx(np.zeros(2), abs=1e-6)
+        assert opt.n_hvp > 0
+
+    def test_five_d(self):
+        """test newton-cg counts the Hessian-vector products of each optimization, only spent by CG"""
+        f = lambda v: 1e4 * v[0]**2 + v[1]**2 - 0.5 * v[1]**4 / (1 + v[1]**2)
+        opt = NewtonCGOptimizer(radius=0.5)
+        opt.optimize(f, [1, 1.5])
+        n_hvp = opt.n_hvp
+        opt.optimize(f, [1, 1.5])
+        assert opt.n_hvp == n_hvp
+        # At most max_cg_iter = 2 products per iteration
+        assert n_hvp <= 2 * opt.i
+
+        x, g = np.array([0.1, 1.2]), np.array([2e3, 0.5])
+        hess_vec = lambda d: hvp(f, x, d)[2]
+        for radius in (1e-3, 10):
+            p, pHp = opt._steihaug(g, hess_vec, radius)
+            assert pHp == pytest.approx(p @ hess_vec(p))
+
+    def test_six_a(self):
+        """test l-bfgs optimizer for function 1 and 2"""
+        f1, f2 = self.setup_class()
+        r1, r2 = LBFGSOptimizer().optimize(f1, [1])
+        assert r1[0] == pytest.approx(0, abs=1e-8)
+        assert r2[0] == pytest.approx(0, abs=1e-4)
+        r1, r2 = LBFGSOptimizer().optimize(f2, [1, 1])
+        assert r1[0] == pytest.approx(0, abs=1e-8)
+        assert r2 == pytest.approx(np.zeros(2), abs=1e-4)
+
+    def test_six_b(self):
+        """test l-bfgs optimizer on the rosenbrock function with a small memory"""
+        rosenbrock = lambda v: sum(100 * (v[i + 1] - v[i]**2)**2 + (1 - v[i])**2 for i in range(9))
+        opt = LBFGSOptimizer(memory=3)
+        r1, r2 = opt.optimize(rosenbrock, [-1.2, 1] * 5)
+        assert r1[0] == pytest.approx(0, abs=1e-6)
+        assert r2 == pytest.approx(np.ones(10), abs=1e-2)
+        assert opt.S.shape == (3, 10)
+        assert opt.n_pairs == 3
+        assert opt.get_values().shape == (opt.i + 1, 1)
+        assert opt.get_jacobians().shape == (opt.i + 1, 10)
+
+    def test_six_c(self):
+        """test l-bfgs needs far fewer iterations than gradient descent on an ill-conditioned function"""
+        f = lambda v: v[0]**2 + 100 * v[1]**2 + 10 * v[2]**2
+        lbfgs = LBFGSOptimizer()
+        r1, r2 = lbfgs.optimize(f, [1, 1, 1])
+        gd = GradientDescentOptimizer(learning_rate=0.005)
+        gd.optimize(f, [1, 1, 1])
+        assert r1[0] == pytest.approx(0, abs=1e-8)
+        assert lbfgs.i * 10 < gd.i
+
+    def test_six_d(self):
+        """test a reused l-bfgs optimizer starts without the curvature pairs of the previous problem"""
+        f = lambda v: v[0]**2 + 100 * v[1]**2 + 10 * v[2]**2
+        g = lambda v: (v[0] - 1)**2 + 50 * (v[1] + 2)**2
+        h = lambda v: 20 * (v[0] + 1)**2 + v[1]**2
+        opt = LBFGSOptimizer()
+        opt.optimize(f, [1, 1, 1])
+        for function in (g, h):
+            r1, r2 = opt.optimize(function, [1, 1])
+            fresh = LBFGSOptimizer()
+            expected_r1, expected_r2 = fresh.optimize(function, [1, 1])
+            assert opt.S.shape == (10, 2)
+            assert opt.i == fresh.i
+            assert r2 == pytest.approx(expected_r2)
+
+
+class TestOptimizerHistory():
+
+    def test_one(self):
+        """Test the ring buffer keeps the last entries in order"""
+        history = OptimizerHistory(capacity=3)
+        for k in range(5):
+            history.append(np.array([k, 2 * k]))
+        assert len(history) == 3
+        assert (history[-1] == np.array([4, 8])).all()
+        assert (history[0] == np.array([2, 4])).all()
+        assert (history.stack() == np.array([[2, 4], [3, 6], [4, 8]])).all()
+        with pytest.raises(IndexError):
+            history[3]
+
+    def test_two(self):
+        """Test keeping every k-th entry, and no entry"""
+        history = OptimizerHistory(stride=2)
+        none = OptimizerHistory(capacity=0)
+        for k in range(5):
+            history.append(np.array([k]))
+            none.append(np.array([k]))
+        assert (history.stack() == np.array([[0], [2], [4]])).all()
+        assert len(none) == 0
+        assert none[-1] == 4
+        assert (none.stack() == np.array([[4]])).all()
+        with pytest.raises(ValueError):
+            OptimizerHistory(stride=0)
+
+    def test_three(self):
+        """Test the optimizers give the same result with every history mode"""
+        f = lambda v: v[0]**2 + 3 * v[1]**2
+        for cls in [GradientDescentOptimizer, MomentumOptimizer, AdaGradOptimizer, AdamOptimizer,
+                    NewtonCGOptimizer, LBFGSOptimizer]:
+            full = cls()
+            r_full = full.optimize(f, [1, 1])
+            n_steps = full.get_values().shape[0]
+            for kwargs in [dict(history='ring', history_size=5), dict(history='none'),
+                           dict(history_stride=10)]:
+                opt = cls(**kwargs)
+                r1, r2 = opt.optimize(f, [1, 1])
+                assert r1 == pytest.approx(r_full[0])
+                assert r2 == pytest.approx(r_full[1])
+                assert opt.get_values().shape[0] <= max(5, n_steps // 10 + 1)
+                assert opt.get_jacobians().shape[1] == 2
+                assert opt.get_step_deltas().shape[1] == 2
+
+    def test_four(self):
+        """Test an unknown history mode"""
+        with pytest.raises(ValueError):
+            AdamOptimizer(history='some')
+
+    def test_five(self):
+        """Test a reused optimizer starts a new history, whatever the number of variables"""
+        ring = OptimizerHistory(capacity=3)
+        ring.append(np.zeros(3))
+        ring.clear()
+        ring.append(np.ones(2))
+        assert len(ring) == 1 and ring.stack().shape == (1, 2)
+
+        f3 = lambda v: v[0]**2 + v[1]**2 + v[2]**2
+        f2 = lambda v: (v[0] - 1)**2 + 2 * v[1]**2
+        for kwargs in [dict(history='ring', history_size=5), dict()]:
+            opt = GradientDescentOptimizer(**kwargs)
+            kept = (lambda n: min(n, 5)) if kwargs else (lambda n: n)
+            opt.optimize(f3, [1, 1, 1])
+            opt.optimize(f2, [1, 1])
+            assert opt.get_jacobians().shape[1] == 2
+            assert len(opt.get_values()) == kept(opt.i + 1)
+            values, variables = opt.optimize_batch(f3, [[1, 1, 1], [2, 2, 2]])
+            assert opt.get_step_deltas().shape[1:] == (2, 3)
+            data = np.random.default_rng(0).random((20, 2))
+            opt.optimize_stochastic(lambda v, batch: (v[0] * batch[:, 0] - batch[:, 1])**2, [0], data, batch_size=5)
+            assert opt.get_jacobians().shape == (kept(opt.i), 1)
+
+
+class TestMultiStart():
+
+    @classmethod
+    def setup_class(TestMultiStart):
+        """Set up a function with several local minima."""
+        f = lambda v: (v[0]**2 - 4)**2 + (v[1] - 1)**2 + v[0]
+        starts = np.array([[3, 0], [-3, 0], [1, 2], [-1, 2]])
+        return f, starts
+
+    def test_one(self):
+        """Test the best of all the starts is returned, with a summary per start"""
+        f, starts = self.setup_class()
+        best, variables, summaries = multi_start(GradientDescentOptimizer, f, starts, n_workers=2,
+                                                 learning_rate=0.01)
+        assert len(summaries) == 4
+        assert sorted(summary['start'] for summary in summaries) == [0, 1, 2, 3]
+        assert best == min(summary['value'] for summary in summaries)
+        # The global minimum is the one near x = -2
+        assert variables[0] == pytest.approx(-2.03, abs=0.01)
+        assert all(summary['error'] is None for summary in summaries)
+
+    def test_two(self):
+        """Test the results are streamed and the remaining starts stop at the target"""
+        f, starts = self.setup_class()
+        finished = []
+        best, variables, summaries = multi_start(AdamOptimizer, f, np.repeat(starts[1:2], 20, axis=0),
+                                                 target=0, n_workers=1, callback=finished.append)
+        assert best <= 0
+        assert len(summaries) < 20
+        assert finished == summaries
+
+    def test_three(self):
+        """Test a failing start is reported without stopping the others"""
+        f = lambda v: v[0]**2 if v[0] > 0 else v[0]
+        best, variables, summaries = multi_start(GradientDescentOptimizer, f, [[1], [2]], n_workers=2)
+        assert len(summaries) == 2
+        assert all(summary['error'] is not None for summary in summaries)
+        assert variables is None
+
+    def test_four(self):
+        """Test the running starts stop at their next iteration once the target is reached"""
+        f, starts = self.setup_class()
+        stop = multiprocessing.Event()
+        _init_worker(GradientDescentOptimizer, f, {'learning_rate': 0.001, 'max_iter': 10**6, 'tol': 0}, stop)
+        stop.set()
+        summary = _run_start(0, starts[0])
+        assert summary['n_iter'] == 1
+        assert summary['error'] is None
+
+
+class TestBatchOptimizers():
+
+    @classmethod
+    def setup_class(TestBatchOptimizers):
+        """Set up a function and several initial values."""
+        f = lambda v: v[0]**2 + 3 * v[1]**2 + 0.5 * v[0] * v[1]
+        starts = np.array([[1, 1], [2, -1], [0.5, 0.3]])
+        return f, starts
+
+    def test_one(self):
+        """Test each row of a batch matches a separate optimization"""
+        f, starts = self.setup_class()
+        for cls in [GradientDescentOptimizer, MomentumOptimizer, AdaGradOptimizer, AdamOptimizer]:
+            for compile in [True, False]:
+                opt = cls(compile=compile)
+                values, variables = opt.optimize_batch(f, starts)
+                assert values.shape == (3, )
+                assert variables.shape == (3, 2)
+                for k in range(3):
+                    r1, r2 = cls().optimize(f, starts[k])
+                    assert values[k] == pytest.approx(r1[0])
+                    assert variables[k] == pytest.approx(r2)
+
+    def test_two(self):
+        """Test a hyperparameter grid in a single batch"""
+        f, starts = self.setup_class()
+        grid = hyperparameter_grid(learning_rate=[0.01, 0.1], momentum=[0.5, 0.8, 0.9])
+        assert grid['learning_rate'].shape == (6, )
+        assert (grid['momentum'] == np.array([0.5, 0.8, 0.9, 0.5, 0.8, 0.9])).all()
+
+        opt = MomentumOptimizer()
+        values, variables = opt.optimize_batch(f, starts[0], **grid)
+        assert variables.shape == (6, 2)
+        # The hyperparameters of the optimizer are restored
+        assert opt.learning_rate == 0.1
+        assert opt.get_values().shape[1] == 6
+        assert opt.get_jacobians().shape[1:] == (6, 2)
+        for k in range(6):
+            r1, r2 = MomentumOptimizer(learning_rate=grid['learning_rate'][k],
+                                       momentum=grid['momentum'][k]).optimize(f, starts[0])
+            assert variables[k] == pytest.approx(r2)
+
+    def test_three(self):
+        """Test converged rows stop moving while the others continue"""
+        f, starts = self.setup_class()
+        opt = GradientDescentOptimizer()
+        values, variables = opt.optimize_batch(f, np.array([[0, 0], [1, 1]]))
+        assert not opt.active.any()
+        assert (opt.get_step_deltas()[1:, 0] == 0).all()
+        assert (opt.get_step_deltas()[1, 1] != 0).all()
+
+    def test_four(self):
+        """Test optimizers which do not support batches"""
+        f, starts = self.setup_class()
+        for opt in [NewtonCGOptimizer(), LBFGSOptimizer()]:
+            with pytest.raises(NotImplementedError):
+                opt.optimize_batch(f, starts)
+
+
+class TestStochasticOptimizers():
+
+    @classmethod
+    def setup_class(TestStochasticOptimizers):
+        """Set up a linear regression dataset and its per-record squared loss."""
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(2000, 2))
+        data = np.column_stack([X, 3 * X[:, 0] - 2 * X[:, 1] + 1])
+        loss = lambda v, batch: (v[0] * batch[:, 0] + v[1] * batch[:, 1] + v[2] - batch[:, 2])**2
+        return loss, data
+
+    def test_one(self):
+        """Test mini-batches of an array with shuffling"""
+        loss, data = self.setup_class()
+        for opt in [AdamOptimizer(), MomentumOptimizer(learning_rate=0.01), GradientDescentOptimizer(learning_rate=0.05)]:
+            r1, r2 = opt.optimize_stochastic(loss, [0, 0, 0], data, epochs=20, batch_size=100, shuffle=True, seed=0)
+            assert r2 == pytest.approx(np.array([3, -2, 1]), abs=0.01)
+            assert r1[0] == pytest.approx(0, abs=1e-3)
+            assert opt.i == 20 * len(opt.epoch_values)
+
+    def test_two(self):
+        """Test per-epoch convergence stops before the last epoch"""
+        loss, data = self.setup_class()
+        opt = GradientDescentOptimizer(learning_rate=0.05)
+        opt.optimize_stochastic(loss, [0, 0, 0], data, epochs=100, batch_size=500, epoch_tol=1e-8)
+        assert len(opt.epoch_values) < 100
+        assert opt.get_values().shape == (opt.i, 1)
+        assert opt.get_jacobians().shape == (opt.i, 3)
+        assert opt.get_step_deltas().shape == (opt.i, 3)
+
+    def test_three(self):
+        """Test batches from a generator function, a list and a memory-mapped file"""
+        loss, data = self.setup_class()
+        batches = lambda: (data[k:k + 200] for k in range(0, len(data), 200))
+        r1, r2 = AdamOptimizer().optimize_stochastic(loss, [0, 0, 0], batches, epochs=10)
+        assert r2 == pytest.approx(np.array([3, -2, 1]), abs=0.05)
+
+        # A loss summed over the records of a batch with Variables
+        scalar_loss = lambda v, batch: sum((v[0] * x + v[1] * y + v[2] - z)**2 for x, y, z in batch) / len(batch)
+        batch_list = [data[k:k + 20] for k in range(0, 200, 20)]
+        r1_list, r2_list = AdamOptimizer().optimize_stochastic(scalar_loss, [0, 0, 0], batch_list, epochs=2)
+        r1_array, r2_array = AdamOptimizer().optimize_stochastic(loss, [0, 0, 0], data[:200], epochs=2, batch_size=20)
+        assert r2_list == pytest.approx(r2_array)
+
+    def test_four(self, tmp_path):
+        """Test a memory-mapped dataset"""
+        loss, data = self.setup_class()
+        np.save(tmp_path / 'data.npy', data)
+        mapped = np.load(tmp_path / 'data.npy', mmap_mode='r')
+        r1, r2 = AdamOptimizer().optimize_stochastic(loss, [0, 0, 0], mapped, epochs=5, batch_size=100, shuffle=True)
+        assert r2 == pytest.approx(np.array([3, -2, 1]), abs=0.05)
+
+    def test_five(self):
+        """Test invalid stochastic settings"""
+        loss, data = self.setup_class()
+        with pytest.raises(ValueError):
+            AdamOptimizer().optimize_stochastic(loss, [0, 0, 0], iter([data[:10], data[10:20]]), epochs=2)
+        with pytest.raises(ValueError):
+            AdamOptimizer().optimize_stochastic(loss, [0, 0, 0], lambda: iter([data]), shuffle=True)
+        with pytest.raises(NotImplementedError):
+            LBFGSOptimizer().optimize_stochastic(loss, [0, 0, 0], data)
+        with pytest.raises(ValueError):
+            AdamOptimizer(mode='reverse').optimize_stochastic(loss, [0, 0, 0], data)
+
+    def test_six(self):
+        """Test max_iter bounds the steps"""
+        loss, data = self.setup_class()
+        opt = AdamOptimizer(max_iter=30)
+        opt.optimize_stochastic(loss, [0, 0, 0], data, epochs=5, batch_size=100)
+        assert opt.i == 30
+        assert len(opt.epoch_values) == 2
+
+    def test_seven(self, tmp_path):
+        """Test shuffling draws new batches of records at every epoch, from an array or a memory-mapped file"""
+        loss, data = self.setup_class()
+        np.save(tmp_path / 'data.npy', data)
+        mapped = np.load(tmp_path / 'data.npy', mmap_mode='r')
+        for dataset, window in ((data, 8), (mapped, 4)):
+            visited = []
+            recording_loss = lambda v, batch: visited.append(np.array(batch)) or loss(v, batch)
+            GradientDescentOptimizer(learning_rate=0.01).optimize_stochastic(
+                recording_loss, [0, 0, 0], dataset, epochs=2, batch_size=100, shuffle=True, seed=1,
+                epoch_tol=0, shuffle_window=window)
+            # Index of the record of every row of the batches, in order of visit
+            rows = [np.flatnonzero((data == record).all(axis=1))[0] for batch in visited for record in batch]
+            first, second = np.array(rows[:2000]), np.array(rows[2000:])
+            assert len(visited) == 40
+            assert sorted(first) == list(range(2000)) and sorted(second) == list(range(2000))
+            # A batch mixes records of several chunks of 100 rows, and differs between the epochs
+            assert len(set(first[:100] // 100)) > 1
+            assert set(first[:100]) != set(second[:100])
+            if window == 4:
+                # Memory-mapped records come from the window of 4 chunks of the batch
+                assert all(len(set(first[k:k + 400] // 100)) == 4 for k in range(0, 2000, 400))
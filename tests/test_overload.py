@@ -151,4 +151,19 @@ class TestVariable:
         assert pytest.approx(exp(v1,base).der[0], 1e-7) == (5*base**(5-1))*1.5
         assert exp(v2, base) == base**4
 
-    
\ No newline at end of file
+    
+    def test_seventeen(self):
+        """Test elementary functions on a batch of values"""
+        v1 = Variable(np.array([0.2, 0.5, 0.9]), np.array([[1.0], [0.0]]))
+        res = arcsin(sqrt(v1)) + exp(v1) * tanh(v1)
+        for k, val in enumerate(v1.val):
+            v = Variable(val, np.array([1.0, 0.0]))
+            expected = arcsin(sqrt(v)) + exp(v) * tanh(v)
+            assert res.val[k] == pytest.approx(expected.val)
+            assert res.der[:, k] == pytest.approx(expected.der)
+
+    def test_seventeen_b(self):
+        """Test square root of a batch with a negative value"""
+        v1 = Variable(np.array([1.0, -1.0]), np.array([[1.0]]))
+        with pytest.raises(ValueError, match=r"Value < 0 not valid for square root"):
+            sqrt(v1)
@@ -0,0 +1,75 @@
+import sys
+import json
+import pytest
+import numpy as np
+from zapnAD.dualNumbers import *
+from zapnAD.overLoad import *
+from zapnAD.tensorVariable import *
+from zapnAD.profiling import *
+
+class TestProfiler:
+
+    @classmethod
+    def setup_class(TestProfiler):
+        """Set up a function to use in many test cases."""
+        def f(v):
+            a = sin(v[0]) * v[1]
+            return sqrt(a * a + 1) - v[2] / 2
+        return f
+
+    def test_one(self):
+        """Test every operation is counted, and the hook is removed afterwards"""
+        f = self.setup_class()
+        previous = sys.getprofile()
+        with Profiler() as prof:
+            values, J = auto_diff([f], [0.1, 0.2, 0.3])
+        assert sys.getprofile() is previous
+
+        counts = {name: row['calls'] for name, row in prof.by_operation().items()}
+        assert counts == {'overLoad.sin': 1, 'Variable.__mul__': 2, 'Variable.__add__': 1,
+                          'overLoad.sqrt': 1, 'Variable.__pow__': 1, 'Variable.__truediv__': 1,
+                          'Variable.__sub__': 1}
+        assert prof.by_operation()['Variable.__mul__']['max_width'] == 3
+        assert prof.by_operation()['Variable.__mul__']['bytes'] == 2 * 3 * 8
+        # Nothing is counted once stopped
+        auto_diff([f], [0.1, 0.2, 0.3])
+        assert prof.by_operation()['overLoad.sin']['calls'] == 1
+
+    def test_two(self):
+        """Test operations are attributed to the lines of user code, with self times"""
+        f = self.setup_class()
+        with Profiler() as prof:
+            auto_diff([f], [0.1, 0.2, 0.3])
+
+        sites = prof.by_call_site()
+        assert len(sites) == 2
+        assert sorted(row['calls'] for row in sites.values()) == [2, 6]
+        sqrt_row = prof.by_operation()['overLoad.sqrt']
+        assert sqrt_row['self_time'] < sqrt_row['time']
+        assert 'overLoad.sqrt' in prof.report()
+
+    def test_three(self):
+        """Test sparse and tensor widths, and the Chrome trace export"""
+        f = self.setup_class()
+        with Profiler(record_events=True) as prof:
+            auto_diff([f], [0.1, 0.2, 0.3], sparse=True)
+            W, x = tensor_inputs(np.ones((2, 3)), np.ones(3))
+            (W @ x).sum()
+
+        assert prof.by_operation()['overLoad.sin']['max_width'] == 1
+        assert prof.by_operation()['TensorVariable.__matmul__']['max_width'] == 9
+        with pytest.raises(ValueError):
+            Profiler().export_chrome_trace('unused.json')
+
+    def test_four(self, tmp_path):
+        """Test the exported events are complete events of every operation"""
+        f = self.setup_class()
+        with Profiler(record_events=True) as prof:
+            auto_diff([f], [0.1, 0.2, 0.3])
+        path = tmp_path / 'trace.json'
+        prof.export_chrome_trace(str(path))
+
+        events = json.load(open(path))['traceEvents']
+        assert len(events) == 8
+        assert {event['ph'] for event in events} == {'X'}
+        assert all(event['dur'] >= 0 for event in events)
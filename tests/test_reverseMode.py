@@ -0,0 +1,126 @@
+import pytest
+import numpy as np
+from zapnAD.dualNumbers import *
+from zapnAD.overLoad import *
+from zapnAD.reverseMode import *
+from zapnAD.optimizers import *
+
+class TestTape:
+
+    def test_one(self):
+        """Test creation of the input variables on a tape."""
+        tape = Tape()
+        x, y = tape.variables([3, 1])
+
+        assert len(tape) == 2
+        assert x.val == 3
+        assert y.val == 1
+
+    def test_two(self):
+        """Test input variables can only be created on an empty tape."""
+        tape = Tape()
+        tape.variables([3, 1])
+        with pytest.raises(AssertionError):
+            tape.variables([3, 1])
+
+    def test_three(self):
+        """Test backward sweep of a product."""
+        tape = Tape()
+        x, y = tape.variables([3, 1])
+        f = x * y
+
+        assert (tape.backward([f]) == np.array([1, 3])).all()
+
+    def test_four(self):
+        """Test backward sweep with seed adjoints on several outputs."""
+        tape = Tape()
+        x, y = tape.variables([3, 1])
+        f1 = x * y
+        f2 = x ** 2
+
+        assert (tape.backward([f1, f2], [2, 1]) == np.array([8, 6])).all()
+
+    def test_five(self):
+        """Test inputs the output does not depend on get a zero adjoint."""
+        tape = Tape()
+        x, y, z = tape.variables([3, 1, 2])
+        f = -x + 2 - (3 * y)
+
+        assert (tape.backward([f]) == np.array([-1, -3, 0])).all()
+
+
+class TestReverseDiff:
+
+    def test_one(self):
+        """Test Reverse Diff matches Auto Diff on elementary functions"""
+        function1 = lambda v: sin(v[0]) * exp(v[1]) + log(v[0]) * v[1] ** 2
+        function2 = lambda v: sqrt(v[0] * v[1]) - arctan(v[1]) + tanh(v[0]) * cos(v[1])
+        function3 = lambda v: arcsin(v[1] * 0.25) + log10(v[0]) - tan(v[0]) * cosh(v[1])
+
+        values, J = reverse_diff([function1, function2, function3], [0.5, 1.5])
+        values_fwd, J_fwd = auto_diff([function1, function2, function3], [0.5, 1.5])
+
+        assert values == pytest.approx(values_fwd)
+        assert J.shape == (3, 2)
+        assert J == pytest.approx(J_fwd)
+
+    def test_two(self):
+        """Test Reverse Diff gradient with many variables"""
+        n = 200
+        function1 = lambda v: sum(v[i] * v[i + 1] for i in range(n - 1))
+        x = np.linspace(-1, 1, n)
+        values, J = reverse_diff([function1], x)
+
+        expected = np.zeros(n)
+        expected[:-1] += x[1:]
+        expected[1:] += x[:-1]
+        assert J[0] == pytest.approx(expected)
+
+
+class TestVjp:
+
+    def test_one(self):
+        """Test the vector-Jacobian product matches the Jacobian"""
+        function1 = lambda v: sin(v[0]) * v[1] + v[2] ** 2
+        function2 = lambda v: v[0] * exp(v[2])
+        u = np.array([2.0, -1.0])
+        values, product = vjp([function1, function2], [0.5, 1.5, -1.0], u)
+        values_fwd, J = auto_diff([function1, function2], [0.5, 1.5, -1.0])
+
+        assert values == pytest.approx(values_fwd)
+        assert product.shape == (3, )
+        assert product == pytest.approx(u @ J)
+
+    def test_two(self):
+        """Test the vector-Jacobian product of several vectors at once"""
+        function1 = lambda v: v[0] * v[1]
+        function2 = lambda v: v[1] ** 3
+        U = np.array([[1.0, 0.0, 2.0], [0.0, 1.0, 3.0]])
+        values, product = vjp([function1, function2], [3, 2], U)
+        values, J = auto_diff([function1, function2], [3, 2])
+
+        assert product.shape == (2, 3)
+        assert product == pytest.approx(J.T @ U)
+
+    def test_three(self):
+        """Test a cotangent with the wrong number of outputs"""
+        with pytest.raises(AssertionError):
+            vjp([lambda v: v[0]], [3, 2], [1.0, 2.0])
+
+
+class TestReverseOptimizers:
+
+    def test_one(self):
+        """Test the optimizers in reverse mode"""
+        f = lambda v: v[0]**2 + v[1]**2
+        for opt in [GradientDescentOptimizer(mode='reverse'), MomentumOptimizer(mode='reverse'),
+                    AdaGradOptimizer(mode='reverse'), AdamOptimizer(mode='reverse')]:
+            r1, r2 = opt.optimize(f, [1, 1])
+            assert r1[0] == pytest.approx(0, abs=0.001)
+            assert r2[0] == pytest.approx(0, abs=0.001)
+            assert r2[1] == pytest.approx(0, abs=0.001)
+
+    def test_two(self):
+        """Test an unknown differentiation mode"""
+        with pytest.raises(ValueError):
+            GradientDescentOptimizer(mode='sideways')
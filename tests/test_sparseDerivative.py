@@ -0,0 +1,75 @@
+import pytest
+import numpy as np
+from zapnAD.dualNumbers import *
+from zapnAD.overLoad import *
+from zapnAD.sparseDerivative import *
+
+class TestSparseDerivative:
+
+    @classmethod
+    def setup_class(TestSparseDerivative):
+        """Set up derivatives to use in many test cases."""
+        d1 = SparseDerivative({0: 1.5, 2: 2.0}, 4)
+        d2 = SparseDerivative({2: 1.0, 3: -1.0}, 4)
+        return [d1, d2]
+
+    def test_one(self):
+        """Test conversion to a dense array."""
+        d1, d2 = self.setup_class()
+        assert len(d1) == 4
+        assert d1.nnz == 2
+        assert (d1.toarray() == np.array([1.5, 0, 2, 0])).all()
+
+    def test_two(self):
+        """Test addition merges the supports."""
+        d1, d2 = self.setup_class()
+        res = d1 + d2
+        assert res.nnz == 3
+        assert (res.toarray() == np.array([1.5, 0, 3, -1])).all()
+
+    def test_three(self):
+        """Test subtraction and negation."""
+        d1, d2 = self.setup_class()
+        assert ((d1 - d2).toarray() == np.array([1.5, 0, 1, 1])).all()
+        assert ((-d1).toarray() == np.array([-1.5, 0, -2, 0])).all()
+
+    def test_four(self):
+        """Test scaling by reals, including numpy scalars on the left."""
+        d1, d2 = self.setup_class()
+        assert ((d1 * 2).toarray() == np.array([3, 0, 4, 0])).all()
+        assert ((np.float64(2) * d1).toarray() == np.array([3, 0, 4, 0])).all()
+        assert ((d1 / 2).toarray() == np.array([0.75, 0, 1, 0])).all()
+
+    def test_five(self):
+        """Test adding derivatives of different sizes."""
+        d1, d2 = self.setup_class()
+        with pytest.raises(AssertionError):
+            d1 + SparseDerivative({0: 1.0}, 3)
+
+
+class TestSparseAutoDiff:
+
+    def test_one(self):
+        """Test sparse seeding of the variables."""
+        variables = Variables(n_inputs=3, sparse=True)
+        variables.set_values([1, 2, 3])
+        for i, v in enumerate(variables):
+            assert v.der.entries == {i: 1.0}
+
+    def test_two(self):
+        """Test the supports of intermediates only hold the inputs they depend on."""
+        variables = Variables(n_inputs=1000, sparse=True)
+        variables.set_values(np.ones(1000))
+        f = sin(variables[3]) * variables[7] + exp(variables[3])
+        assert sorted(f.der.entries) == [3, 7]
+
+    def test_three(self):
+        """Test sparse and dense Auto Diff agree"""
+        function1 = lambda v: sin(v[0]) * v[2] + arcsin(v[1] * 0.1) - log(v[2])
+        function2 = lambda v: v[3]**2 - v[0] + sqrt(v[1]) * tanh(v[3])
+        values, J = auto_diff([function1, function2], [1, 2, 3, 4], sparse=True)
+        values_dense, J_dense = auto_diff([function1, function2], [1, 2, 3, 4])
+
+        assert (values == values_dense).all()
+        assert J == pytest.approx(J_dense)
+        assert J[0, 3] == 0
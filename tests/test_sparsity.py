@@ -0,0 +1,90 @@
+import pytest
+import numpy as np
+from zapnAD.dualNumbers import *
+from zapnAD.overLoad import *
+from zapnAD.sparsity import *
+
+def to_dense(csr, shape):
+    """Dense matrix of a Jacobian in compressed sparse row format."""
+    data, indices, indptr = csr
+    J = np.zeros(shape)
+    for i in range(shape[0]):
+        J[i, indices[indptr[i]:indptr[i + 1]]] = data[indptr[i]:indptr[i + 1]]
+    return J
+
+
+class TestDependencySet:
+
+    def test_one(self):
+        """Test scaling keeps the dependencies and addition takes the union."""
+        d1 = DependencySet(frozenset((0, 2)))
+        d2 = DependencySet(frozenset((2, 3)))
+
+        assert (np.float64(2) * d1).indices == {0, 2}
+        assert (-(d1 / 3)).indices == {0, 2}
+        assert (d1 + d2).indices == {0, 2, 3}
+        assert len(d1 - d2) == 3
+
+
+class TestSparsity:
+
+    @classmethod
+    def setup_class(TestSparsity):
+        """Set up a tridiagonal system."""
+        n = 50
+        functions = [lambda v, i=i: (v[i - 1] if i > 0 else 0) - 2 * sin(v[i]) + (v[i + 1] * exp(v[i]) if i < n - 1 else 0)
+                     for i in range(n)]
+        return functions, np.linspace(0.1, 1, n)
+
+    def test_one(self):
+        """Test the sparsity pattern of a tridiagonal system."""
+        functions, x = self.setup_class()
+        indices, indptr = jacobian_sparsity(functions, x)
+
+        assert list(indices[indptr[0]:indptr[1]]) == [0, 1]
+        assert list(indices[indptr[10]:indptr[11]]) == [9, 10, 11]
+        assert indptr[-1] == 3 * 50 - 2
+
+    def test_two(self):
+        """Test the pattern through elementary functions."""
+        f = lambda v: arcsin(v[0] * 0.5) * sqrt(v[3]) + log(v[3]) - tanh(v[0]) * 0
+        indices, indptr = jacobian_sparsity([f], [0.5, 1, 1, 2])
+        assert list(indices) == [0, 3]
+
+    def test_three(self):
+        """Test the coloring of a tridiagonal pattern needs 3 colors."""
+        functions, x = self.setup_class()
+        pattern = jacobian_sparsity(functions, x)
+        colors = color_columns(pattern, 50)
+
+        assert colors.max() == 2
+        indices, indptr = pattern
+        for i in range(50):
+            row_colors = colors[indices[indptr[i]:indptr[i + 1]]]
+            assert len(set(row_colors)) == len(row_colors)
+
+    def test_four(self):
+        """Test the sparse Jacobian matches Auto Diff"""
+        functions, x = self.setup_class()
+        values, csr = sparse_auto_diff(functions, x)
+        values_ad, J_ad = auto_diff(functions, x)
+
+        assert (values == values_ad).all()
+        assert to_dense(csr, (50, 50)) == pytest.approx(J_ad)
+
+    def test_five(self):
+        """Test reusing a sparsity pattern at another point"""
+        functions, x = self.setup_class()
+        pattern = jacobian_sparsity(functions, x)
+        values, csr = sparse_auto_diff(functions, x[::-1], pattern=pattern)
+        values_ad, J_ad = auto_diff(functions, x[::-1])
+
+        assert to_dense(csr, (50, 50)) == pytest.approx(J_ad)
+
+    def test_six(self):
+        """Test a block diagonal system with a dense output"""
+        functions = [lambda v: v[0] * v[1], lambda v: v[2] * v[3], lambda v: v[0] + v[1] + v[2] + v[3]]
+        values, csr = sparse_auto_diff(functions, [1, 2, 3, 4])
+        values_ad, J_ad = auto_diff(functions, [1, 2, 3, 4])
+
+        assert to_dense(csr, (3, 4)) == pytest.approx(J_ad)
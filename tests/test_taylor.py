@@ -0,0 +1,80 @@
+import math
+import pytest
+import numpy as np
+from zapnAD.overLoad import *
+from zapnAD.hyperDual import *
+from zapnAD.taylor import *
+
+def series(function, order=7):
+    """Taylor coefficients of a function of one variable at 0."""
+    return taylor_coefficients(lambda v: function(v[0]), [0.0], [1.0], order)
+
+
+class TestTaylor:
+
+    @classmethod
+    def setup_class(TestTaylor):
+        """Set up the factorials used in many test cases."""
+        return np.array([math.factorial(k) for k in range(8)], dtype=float)
+
+    def test_one(self):
+        """Test the arithmetic of series."""
+        x = Taylor([2.0, 1.0, 0.0, 0.0])
+        assert (x * x).coefficients == pytest.approx([4, 4, 1, 0])
+        assert (1 / x).coefficients == pytest.approx([1 / 2, -1 / 4, 1 / 8, -1 / 16])
+        assert (x ** -1).coefficients == pytest.approx((1 / x).coefficients)
+        assert (x ** 3 - 2 * x + 1).coefficients == pytest.approx([5, 10, 6, 1])
+        assert (np.float64(2) * x - x / 2).coefficients == pytest.approx([3, 1.5, 0, 0])
+        assert (x ** x).coefficients[:2] == pytest.approx([4, 4 * (np.log(2) + 1)])
+        assert (2 ** x).coefficients == pytest.approx(4 * np.log(2) ** np.arange(4) / [1, 1, 2, 6])
+        assert x > 1 and x <= Taylor([2.0, 0.0, 0.0, 0.0])
+        with pytest.raises(ValueError):
+            x + Taylor([1.0, 0.0])
+
+    def test_two(self):
+        """Test the exponential, logarithmic and power series."""
+        factorials = self.setup_class()
+        assert series(exp) * factorials == pytest.approx(np.ones(8))
+        assert series(lambda x: log(1 + x))[1:] == pytest.approx((-1.0) ** np.arange(7) / np.arange(1, 8))
+        assert series(lambda x: log2(1 + x)) == pytest.approx(series(lambda x: log(1 + x)) / np.log(2))
+        assert series(lambda x: log10(1 + x)) == pytest.approx(series(lambda x: log(1 + x)) / np.log(10))
+        assert series(lambda x: sqrt(1 + x))[:4] == pytest.approx([1, 1 / 2, -1 / 8, 1 / 16])
+        for p in (0.0, 1.0, 2.0, np.int64(3)):
+            assert series(lambda x: x ** p) == pytest.approx(np.eye(8)[int(p)])
+        assert series(lambda x: x ** 13, order=15) == pytest.approx(np.eye(16)[13])
+        assert series(lambda x: x ** 1e9) == pytest.approx(np.zeros(8))
+        assert series(lambda x: (1 + x) ** 5.0)[:6] == pytest.approx([1, 5, 10, 10, 5, 1])
+        assert series(lambda x: exp(x, 2)) * factorials == pytest.approx(np.log(2) ** np.arange(8))
+        with pytest.raises(ValueError):
+            series(lambda x: log(x))
+        with pytest.raises(ValueError):
+            series(lambda x: x ** 0.5)
+
+    def test_three(self):
+        """Test the trigonometric and hyperbolic series."""
+        factorials = self.setup_class()
+        assert series(sin) * factorials == pytest.approx([0, 1, 0, -1, 0, 1, 0, -1])
+        assert series(cos) * factorials == pytest.approx([1, 0, -1, 0, 1, 0, -1, 0])
+        assert series(tan) == pytest.approx([0, 1, 0, 1 / 3, 0, 2 / 15, 0, 17 / 315])
+        assert series(sinh) * factorials == pytest.approx([0, 1, 0, 1, 0, 1, 0, 1])
+        assert series(cosh) * factorials == pytest.approx([1, 0, 1, 0, 1, 0, 1, 0])
+        assert series(tanh) == pytest.approx([0, 1, 0, -1 / 3, 0, 2 / 15, 0, -17 / 315])
+
+    def test_four(self):
+        """Test the series of the inverse trigonometric functions."""
+        assert series(arcsin) == pytest.approx([0, 1, 0, 1 / 6, 0, 3 / 40, 0, 5 / 112])
+        assert series(arccos) == pytest.approx(np.pi / 2 * np.eye(8)[0] - series(arcsin))
+        assert series(arctan) == pytest.approx([0, 1, 0, -1 / 3, 0, 1 / 5, 0, -1 / 7])
+        with pytest.raises(ValueError):
+            series(lambda x: arcsin(x + 1))
+
+    def test_five(self):
+        """Test directional derivatives agree with the Hessian along the direction."""
+        f = lambda v: exp(v[0] * v[1]) + sin(v[0]) / v[1]
+        x, d = [1.0, 2.0], np.array([0.5, -1.0])
+        derivatives = directional_derivatives(f, x, d, 4)
+        value, gradient, H = hessian(f, x)
+
+        assert derivatives.shape == (5, )
+        assert derivatives[:3] == pytest.approx([value, gradient @ d, d @ H @ d])
+        assert directional_derivatives(lambda v: 3.0, x, d, 2) == pytest.approx([3, 0, 0])
@@ -0,0 +1,197 @@
+import pytest
+import numpy as np
+from zapnAD.dualNumbers import *
+from zapnAD.overLoad import *
+from zapnAD.tensorVariable import *
+
+def numerical_jacobian(f, *values, eps=1e-6):
+    """Central differences Jacobian of f with respect to all the entries of values."""
+    values = [np.asarray(value, dtype=float) for value in values]
+    sizes = [value.size for value in values]
+    z = np.concatenate([value.ravel() for value in values])
+
+    def g(z):
+        parts = np.split(z, np.cumsum(sizes)[:-1])
+        return np.asarray(f(*[p.reshape(v.shape) for p, v in zip(parts, values)]))
+
+    return np.stack([(g(z + eps * e) - g(z - eps * e)) / (2 * eps) for e in np.eye(z.size)], axis=-1)
+
+
+class TestTensorVariable:
+
+    @classmethod
+    def setup_class(TestTensorVariable):
+        """Set up values to use in many test cases."""
+        rng = np.random.default_rng(107)
+        return rng.random((3, 4)), rng.random(4)
+
+    def test_one(self):
+        """Test creation of tensor inputs."""
+        W, x = self.setup_class()
+        tW, tx = tensor_inputs(W, x)
+
+        assert tW.shape == (3, 4)
+        assert tx.ndim == 1
+        assert len(tx) == 4
+        assert tW.der.shape == (16, 3, 4)
+        assert (tx.der[12:] == np.eye(4)).all()
+
+    def test_two(self):
+        """Test matrix-vector product and sum."""
+        W, x = self.setup_class()
+        value, J = tensor_auto_diff(lambda W, x: (W @ x).sum(), W, x)
+
+        assert value == pytest.approx((W @ x).sum())
+        assert J[:12] == pytest.approx(np.tile(x, 3))
+        assert J[12:] == pytest.approx(W.sum(axis=0))
+
+    @pytest.mark.parametrize("a_shape, b_shape", [((4, ), (4, )), ((4, ), (4, 3)), ((2, 4), (4, )),
+                                                  ((5, 2, 4), (4, 3)), ((2, 4), (5, 4, 3))])
+    def test_three(self, a_shape, b_shape):
+        """Test matmul of 1-D, 2-D and stacked operands, with variables and constants."""
+        rng = np.random.default_rng(0)
+        a, b = rng.random(a_shape), rng.random(b_shape)
+        expected = numerical_jacobian(lambda a, b: a @ b, a, b)
+
+        value, J = tensor_auto_diff(lambda a, b: a @ b, a, b)
+        assert value == pytest.approx(a @ b)
+        assert J == pytest.approx(expected, abs=1e-6)
+
+        value, J = tensor_auto_diff(lambda b: a @ b, b)
+        assert J == pytest.approx(expected[..., a.size:], abs=1e-6)
+
+        value, J = tensor_auto_diff(lambda a: a @ b, a)
+        assert J == pytest.approx(expected[..., :a.size], abs=1e-6)
+
+    def test_four(self):
+        """Test broadcasting arithmetic with constants."""
+        W, x = self.setup_class()
+        f = lambda x: ((x + W) * 2 - 1 / (x + 3)) / W - x ** 2
+        value, J = tensor_auto_diff(f, x)
+
+        assert value.shape == (3, 4)
+        assert J.shape == (3, 4, 4)
+        assert J == pytest.approx(numerical_jacobian(f, x), abs=1e-6)
+
+    def test_five(self):
+        """Test sum over an axis, slicing, reshape and transpose."""
+        W, x = self.setup_class()
+        f = lambda W, x: (W.sum(axis=0) * x[::-1]).reshape(2, 2).T @ W[1, :2]
+        value, J = tensor_auto_diff(f, W, x)
+
+        assert value.shape == (2, )
+        assert J == pytest.approx(numerical_jacobian(f, W, x), abs=1e-6)
+
+    def test_six(self):
+        """Test elementary functions apply elementwise."""
+        W, x = self.setup_class()
+        tx, = tensor_inputs(x)
+        res = sin(tx) * exp(tx) + sqrt(tx) - log(tx) * tanh(tx)
+
+        assert isinstance(res, TensorVariable)
+        assert res.val == pytest.approx(np.sin(x) * np.exp(x) + np.sqrt(x) - np.log(x) * np.tanh(x))
+        expected = np.cos(x) * np.exp(x) + np.sin(x) * np.exp(x) + 0.5 / np.sqrt(x) \
+            - np.tanh(x) / x - np.log(x) * (1 - np.tanh(x) ** 2)
+        assert res.der == pytest.approx(np.diag(expected))
+
+    def test_seven(self):
+        """Test mixing with scalar Variables."""
+        W, x = self.setup_class()
+        variables = Variables(n_inputs=4)
+        variables.set_values(x)
+        tx, = tensor_inputs(x)
+
+        res = variables[0] * tx + tx * variables[1] - variables[2]
+        assert isinstance(res, TensorVariable)
+        assert res.der.shape == (4, 4)
+        assert res.der[:, 2] == pytest.approx(np.array([x[2], x[2], x[0] + x[1] - 1, 0]))
+
+
+class TestNumpyDispatch:
+
+    @classmethod
+    def setup_class(TestNumpyDispatch):
+        """Set up values to use in many test cases."""
+        return np.array([0.1, 0.2, 0.3])
+
+    def test_one(self):
+        """Test numpy ufuncs on Variables use the derivative rules."""
+        x = self.setup_class()
+        f = lambda v: np.sin(v[0]) * np.exp(v[1]) + np.float64(3) * np.square(v[2]) - np.sqrt(v[1])
+        value, J = auto_diff([f], x)
+
+        assert value == pytest.approx(np.sin(x[0]) * np.exp(x[1]) + 3 * x[2] ** 2 - np.sqrt(x[1]))
+        assert J[0] == pytest.approx([np.cos(x[0]) * np.exp(x[1]),
+                                      np.sin(x[0]) * np.exp(x[1]) - 0.5 / np.sqrt(x[1]), 6 * x[2]])
+
+    def test_two(self):
+        """Test numpy operators with an ndarray on the left defer to the Variable operators."""
+        x = self.setup_class()
+        tx, = tensor_inputs(x)
+        scalar = Variable(2.0, np.array([1.0]))
+
+        res = np.ones(3) - tx
+        assert isinstance(res, TensorVariable)
+        assert res.der == pytest.approx(-np.eye(3))
+        assert (np.eye(3) @ tx).der == pytest.approx(np.eye(3))
+        assert (np.float64(3) / scalar).der == pytest.approx([-0.75])
+        assert np.power(scalar, 3).der == pytest.approx([12.0])
+
+    def test_three(self):
+        """Test arrays of Variables reduce through np.stack as one TensorVariable."""
+        x = self.setup_class()
+        weights = np.array([1.0, 2.0, 3.0])
+        f = lambda v: np.sum(np.sin(np.stack(v)) ** 2) + np.dot(weights, np.exp(np.stack(v)))
+        g = lambda v: sum(sin(a) ** 2 + w * exp(a) for a, w in zip(v, weights))
+
+        value, J = auto_diff([f], x)
+        expected_value, expected_J = auto_diff([g], x)
+        assert value == pytest.approx(expected_value)
+        assert J == pytest.approx(expected_J)
+
+        variables = Variables(n_inputs=3)
+        variables.set_values(x)
+        stacked = np.stack(np.array([variables[i] for i in range(3)], dtype=object))
+        assert isinstance(stacked, TensorVariable)
+        assert stacked.der == pytest.approx(np.eye(3))
+
+    def test_four(self):
+        """Test object arrays of Variables run numpy ufuncs elementwise."""
+        x = self.setup_class()
+        f = lambda v: np.sum(2 * np.cos(np.array(v, dtype=object)))
+        value, J = auto_diff([f], x)
+
+        assert value == pytest.approx(2 * np.cos(x).sum())
+        assert J[0] == pytest.approx(-2 * np.sin(x))
+
+    def test_five(self):
+        """Test reductions and reshapes of TensorVariables through numpy."""
+        W = np.arange(6.0).reshape(2, 3)
+        f = lambda W: np.transpose(np.reshape(W, (3, 2))) * np.add.reduce(W, axis=0)[None, :].T.reshape(1, 3)
+        value, J = tensor_auto_diff(f, W)
+        assert J == pytest.approx(numerical_jacobian(f, W), abs=1e-6)
+
+        tW, = tensor_inputs(W)
+        assert np.mean(tW).val == pytest.approx(W.mean())
+        assert np.mean(tW, axis=1).der.reshape(6, 2) == pytest.approx(np.kron(np.eye(2), np.ones((3, 1))) / 3)
+
+    def test_six(self):
+        """Test ndarray operators with a Variable on the right give one Variable per element."""
+        x = self.setup_class()
+        weights = np.array([1.0, 2.0, 3.0])
+        variables = Variables(n_inputs=3)
+        variables.set_values(x)
+
+        res = weights * variables[0]
+        assert res.dtype == object and res.shape == (3, )
+        for w, r in zip(weights, res):
+            assert r.val == pytest.approx(w * x[0])
+            assert r.der == pytest.approx([w, 0, 0])
+
+        value, J = auto_diff([lambda v: sum(weights * v[0])], x)
+        assert value == pytest.approx([6 * x[0]])
+        assert J[0] == pytest.approx([6, 0, 0])
+
+        value, J = auto_diff([lambda v: np.sum(weights * v[0] - weights / v[1])], x)
+        assert value == pytest.approx([6 * x[0] - 6 / x[1]])
+        assert J[0] == pytest.approx([6, 6 / x[1] ** 2, 0])
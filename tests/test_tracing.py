@@ -0,0 +1,118 @@
+import pytest
+import numpy as np
+from zapnAD.dualNumbers import *
+from zapnAD.overLoad import *
+from zapnAD.tracing import *
+from zapnAD.optimizers import *
+
+class TestTrace:
+
+    @classmethod
+    def setup_class(TestTrace):
+        """Set up functions to use in many test cases."""
+        f1 = lambda v: sin(v[0]) * v[1] + sqrt(v[1]) - log(v[0], 3)
+        f2 = lambda v: v[0] / v[1] - exp(v[0]) * arctan(v[1]) + tanh(v[1]) ** 2
+        f3 = lambda v: 1 / v[0] - arcsin(v[1] * 0.5) + cosh(v[0]) * log10(v[1]) - tan(v[1])
+        return [f1, f2, f3]
+
+    def test_one(self):
+        """Test traced functions match Auto Diff"""
+        functions = self.setup_class()
+        traced = trace(functions, 2)
+        values, J = traced([0.7, 1.3])
+        values_ad, J_ad = auto_diff(functions, [0.7, 1.3])
+
+        assert len(traced) == 3
+        assert values == pytest.approx(values_ad)
+        assert J == pytest.approx(J_ad)
+        assert traced.values([0.7, 1.3]) == pytest.approx(values_ad)
+
+    def test_two(self):
+        """Test traced functions replay at new values"""
+        functions = self.setup_class()
+        traced = trace(functions, 2)
+        for x in ([0.2, 0.4], [0.9, 1.9], [2.0, 0.1]):
+            values, J = traced(x)
+            values_ad, J_ad = auto_diff(functions, x)
+            assert values == pytest.approx(values_ad)
+            assert J == pytest.approx(J_ad)
+
+    def test_three(self):
+        """Test traced functions on a batch of points"""
+        functions = self.setup_class()
+        traced = trace(functions, 2)
+        points = np.array([[0.2, 0.4], [0.9, 1.9], [2.0, 0.1]])
+        values, J = traced(points)
+        values_ad, J_ad = batch_auto_diff(functions, points)
+
+        assert values.shape == (3, 3)
+        assert J.shape == (3, 3, 2)
+        assert values == pytest.approx(values_ad)
+        assert J == pytest.approx(J_ad)
+
+    def test_four(self):
+        """Test common subexpressions are recorded once"""
+        f = lambda v: sin(v[0] * v[1]) + sin(v[1] * v[0]) + sin(v[0] * v[1])
+        traced = trace([f], 2)
+
+        # mul, sin, add, add
+        assert traced.n_operations == 4
+        assert traced([1, 2])[0] == pytest.approx([3 * np.sin(2)])
+
+    def test_five(self):
+        """Test constant folding, identities and dead code elimination"""
+        def f(v):
+            unused = exp(v[1])
+            c = sin(v[0] ** 0 + 1) * 3
+            return (v[0] * 1 + 0) ** 1 / 1 - 0 + c
+
+        traced = trace([f], 2)
+        values, J = traced([5, 7])
+
+        # the only kernel left is the addition of the folded constant
+        assert traced.n_operations == 1
+        assert values == pytest.approx([5 + 3 * np.sin(2)])
+        assert J == pytest.approx(np.array([[1, 0]]))
+
+    def test_six(self):
+        """Test value dependent functions cannot be traced"""
+        with pytest.raises(TracingError):
+            trace([lambda v: v[0] if v[0] < v[1] else v[1]], 2)
+        with pytest.raises(TracingError):
+            trace([lambda v: float(v[0])], 2)
+
+    def test_seven(self):
+        """Test constant outputs and wrong dimensions"""
+        traced = trace([lambda v: 4.0, lambda v: v[0]], 2)
+        values, J = traced([1, 2])
+        assert values == pytest.approx([4, 1])
+        assert J == pytest.approx(np.array([[0, 0], [1, 0]]))
+        with pytest.raises(AssertionError):
+            traced([1, 2, 3])
+
+
+class TestTracedOptimizers:
+
+    def test_one(self):
+        """Test the optimizers use the traced function"""
+        f = lambda v: v[0]**2 + v[1]**2
+        opt = GradientDescentOptimizer()
+        r1, r2 = opt.optimize(f, [1, 1])
+        assert opt._compiled is not None
+        assert r2 == pytest.approx([0, 0], abs=0.001)
+
+    def test_two(self):
+        """Test untraceable functions are evaluated with Variables"""
+        f = lambda v: v[0]**2 if v[0] > v[1] else v[1]**2 + v[0]**2
+        opt = MomentumOptimizer()
+        r1, r2 = opt.optimize(f, [1, 1])
+        assert opt._compiled is None
+        assert r2 == pytest.approx([0, 0], abs=0.001)
+
+    def test_three(self):
+        """Test tracing can be turned off"""
+        f = lambda v: v[0]**2
+        opt = AdamOptimizer(compile=False)
+        r1, r2 = opt.optimize(f, [1])
+        assert opt._compiled is None
+        assert r2[0] == pytest.approx(0, abs=0.001)
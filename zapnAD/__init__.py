@@ -1,11 +1,47 @@
+from . import sparseDerivative
 from . import dualNumbers
 from . import overLoad
+from . import tensorVariable
+from . import reverseMode
+from . import diffCache
+from . import tracing
+from . import codegen
+from . import sparsity
+from . import hyperDual
+from . import taylor
+from . import lineSearch
+from . import callbacks
 from . import optimizers
+from . import profiling
 
+from .sparseDerivative import *
 from .dualNumbers import *
 from .overLoad import *
+from .tensorVariable import *
+from .reverseMode import *
+from .diffCache import *
+from .tracing import *
+from .codegen import *
+from .sparsity import *
+from .hyperDual import *
+from .taylor import *
+from .lineSearch import *
+from .callbacks import *
 from .optimizers import *
+from .profiling import *
 
-__all__ = (dualNumbers.__all__ +
+__all__ = (sparseDerivative.__all__ +
+        dualNumbers.__all__ +
         overLoad.__all__ +
-        optimizers.__all__)
+        tensorVariable.__all__ +
+        reverseMode.__all__ +
+        diffCache.__all__ +
+        tracing.__all__ +
+        codegen.__all__ +
+        sparsity.__all__ +
+        hyperDual.__all__ +
+        taylor.__all__ +
+        lineSearch.__all__ +
+        callbacks.__all__ +
+        optimizers.__all__ +
+        profiling.__all__)
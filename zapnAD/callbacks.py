@@ -0,0 +1,179 @@
+import csv
+import json
+import numpy as np
+
+__all__ = ['OptimizerCallback', 'TelemetryCounter', 'CSVLogger', 'JSONLinesLogger', 'EarlyStopping', 'TimeLimit']
+
+# Telemetry fields written by the loggers, the variables are left out by default
+DEFAULT_FIELDS = ('iteration', 'value', 'gradient_norm', 'step_norm', 'eval_time', 'step_time',
+                  'time', 'n_values', 'n_gradients')
+
+class OptimizerCallback():
+    """Class representing a function called by an optimizer after each iteration.
+
+    The optimizer calls it with a dict of telemetry of the iteration (see Optimizer), and stops
+    when it returns True. Any function taking this dict can be used as a callback as well.
+    """
+
+    def __call__(self, info):
+        """Receives the telemetry of an iteration. Returns True to stop the optimization.
+
+        Arguments:
+        - info: dict of the telemetry of the iteration.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Releases the resources of the callback, e.g. closes its file."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TelemetryCounter(OptimizerCallback):
+
+    def __init__(self):
+        """Initializes an in-memory summary of the iterations: their number, the total and largest
+        times, and the last and best values, without keeping the history of the iterations."""
+        self.reset()
+
+    def reset(self):
+        """Resets the summary."""
+        self.iterations = 0
+        self.eval_time = 0.0
+        self.step_time = 0.0
+        self.time = 0.0
+        self.max_time = 0.0
+        self.last = None
+        self.best_value = np.inf
+        self.best_iteration = None
+
+    def __call__(self, info):
+        """Adds an iteration to the summary. Never stops the optimization."""
+        self.iterations += 1
+        self.eval_time += info['eval_time']
+        self.step_time += info['step_time']
+        self.time += info['time']
+        self.max_time = max(self.max_time, info['time'])
+        self.last = info
+        if info['value'] < self.best_value:
+            self.best_value, self.best_iteration = info['value'], info['iteration']
+        return False
+
+    def summary(self):
+        """Returns dict of the number of iterations, the total time split between the evaluations
+        and the steps, the mean and largest time of an iteration, and the best value and its iteration"""
+        return {'iterations': self.iterations, 'time': self.time, 'eval_time': self.eval_time,
+                'step_time': self.step_time, 'mean_time': self.time / self.iterations if self.iterations else 0.0,
+                'max_time': self.max_time, 'best_value': self.best_value, 'best_iteration': self.best_iteration}
+
+
+class _Logger(OptimizerCallback):
+    """Writes one record per iteration to a file as it goes."""
+
+    def __init__(self, file, fields=DEFAULT_FIELDS, flush=True):
+        """Initializes the logger.
+
+        Arguments:
+        - file: path of the file, opened (and truncated) at the first iteration, or a file object.
+        - fields: telemetry fields written, in order. Add 'variables' to write the iterates.
+                Default to every field but the variables.
+        - flush: flush the file after every record, so that it can be followed while the
+                optimization runs. Default set to True.
+        """
+        self.file = file
+        self.fields = tuple(fields)
+        self.flush = flush
+        self._stream = None
+
+    def _open(self):
+        """Returns the file object, opening the path at the first call"""
+        if self._stream is None:
+            self._stream = open(self.file, 'w', newline='') if isinstance(self.file, str) else self.file
+        return self._stream
+
+    def _record(self, info):
+        """Returns the fields of info, with arrays as lists"""
+        return {field: np.asarray(info[field]).tolist() if field == 'variables' else info.get(field)
+                for field in self.fields}
+
+    def __call__(self, info):
+        """Writes the iteration. Never stops the optimization."""
+        self._write(self._open(), self._record(info))
+        if self.flush:
+            self._stream.flush()
+        return False
+
+    def close(self):
+        """Closes the file, if the logger opened it."""
+        if self._stream is not None and isinstance(self.file, str):
+            self._stream.close()
+        self._stream = None
+
+
+class CSVLogger(_Logger):
+    """Writes the telemetry of each iteration as a row of a CSV file with a header."""
+
+    def _open(self):
+        if self._stream is None:
+            self._writer = csv.DictWriter(super()._open(), fieldnames=self.fields)
+            self._writer.writeheader()
+        return self._stream
+
+    def _write(self, stream, record):
+        self._writer.writerow(record)
+
+
+class JSONLinesLogger(_Logger):
+    """Writes the telemetry of each iteration as a JSON object per line."""
+
+    def _write(self, stream, record):
+        stream.write(json.dumps(record) + '\n')
+
+
+class EarlyStopping(OptimizerCallback):
+
+    def __init__(self, patience=10, min_delta=0.0):
+        """Initializes a callback stopping a stalled optimization, when the value has not
+        improved on the best value by more than min_delta for patience iterations.
+
+        Arguments:
+        - patience: number of iterations without improvement. Default set to 10.
+        - min_delta: smallest decrease counted as an improvement. Default set to 0.
+        """
+        self.patience = patience
+        self.min_delta = min_delta
+        self.best_value = np.inf
+        self.wait = 0
+
+    def __call__(self, info):
+        # A new optimization starts over
+        if info['iteration'] == 1:
+            self.best_value, self.wait = np.inf, 0
+        if info['value'] < self.best_value - self.min_delta:
+            self.best_value, self.wait = info['value'], 0
+        else:
+            self.wait += 1
+        return self.wait >= self.patience
+
+
+class TimeLimit(OptimizerCallback):
+
+    def __init__(self, seconds):
+        """Initializes a callback stopping the optimization once its iterations took seconds.
+
+        Arguments:
+        - seconds: time budget of the iterations.
+        """
+        self.seconds = seconds
+        self.elapsed = 0.0
+
+    def __call__(self, info):
+        # A new optimization starts over
+        if info['iteration'] == 1:
+            self.elapsed = 0.0
+        self.elapsed += info['time']
+        return self.elapsed >= self.seconds
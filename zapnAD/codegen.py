@@ -0,0 +1,269 @@
+import functools
+import hashlib
+import importlib.util
+import os
+import tempfile
+import types
+import numpy as np
+from . import tracing
+from .tracing import trace, _NAMESPACE
+
+__all__ = ['generate_source', 'function_key', 'compile_functions', 'DEFAULT_CACHE_DIR']
+
+# Directory of the generated modules, overridden by the ZAPNAD_CACHE_DIR environment variable
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'zapnAD')
+
+# Changes whenever the generated code changes, so that older modules are not reused
+_FORMAT = 1
+
+# Functions and classes of these packages are identified by name, their code by _SOURCE
+_LIBRARIES = ('builtins', 'math', 'numpy', 'zapnAD')
+
+# Constants, whose repr is their value
+_SCALARS = (bool, int, float, complex, str, bytes, type(None), slice, range, np.generic)
+
+def _source_hash():
+    '''
+    Returns a hash of the source of the derivative rules (tracing) and of the code generation,
+    so that fixing either regenerates the modules.
+    '''
+    digest = hashlib.sha256()
+    for path in (tracing.__file__, __file__):
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+_SOURCE = _source_hash()
+
+# Modules loaded in this process, by path
+_loaded = {}
+
+_TEMPLATE = '''"""Values and Jacobian of {names} of {n_inputs} inputs, generated by zapnAD.
+
+The module only depends on numpy. Do not edit: it is regenerated when the functions change.
+"""
+import numpy as np
+from numpy import {kernels}
+
+N_INPUTS = {n_inputs}
+N_OUTPUTS = {n_outputs}
+KEY = {key!r}
+
+{source}
+
+def _stack(results, batch_shape):
+    if batch_shape == ():
+        return np.array(results, dtype=float)
+    return np.stack([np.broadcast_to(r, batch_shape) for r in results], axis=-1)
+
+
+def values(variable_values):
+    """Returns the values of the functions, of shape (m, ) (or (N, m) for an (N, n) array of points)."""
+    x = np.asarray(variable_values, dtype=float)
+    assert x.shape[-1] == N_INPUTS, 'Dimension Mismatch!'
+    results, = _values(np.moveaxis(x, -1, 0))
+    return _stack(results, x.shape[:-1])
+
+
+def diff(variable_values):
+    """Returns the values of the functions and their Jacobian of shape (m, n)
+    (or (N, m) and (N, m, n) for an (N, n) array of points), like auto_diff."""
+    x = np.asarray(variable_values, dtype=float)
+    assert x.shape[-1] == N_INPUTS, 'Dimension Mismatch!'
+    batch_shape = x.shape[:-1]
+    results, adjoints = _evaluate(np.moveaxis(x, -1, 0))
+    jacobian = _stack(adjoints, batch_shape).reshape(batch_shape + (N_OUTPUTS, N_INPUTS))
+    return _stack(results, batch_shape), jacobian
+'''
+
+
+def generate_source(functions, n_inputs, key=''):
+    '''
+        Traces functions and generates the source of a standalone Python module computing
+        their values and Jacobian with numpy only, without Variables or zapnAD at runtime.
+        The module defines values(x) and diff(x), which take the variable values (or an
+        array of points) like TracedFunctions.
+
+        Input:
+            - functions: A list of python functions, as for trace.
+            - n_inputs: int, number of input variables
+            - key: str, stored as KEY in the module. Default to ''.
+
+        Returns:
+            - str, the source of the module
+
+        Raises:
+            TracingError if a function cannot be traced.
+    '''
+    traced = trace(functions, n_inputs)
+    # The generated functions take x with the inputs first, see TracedFunctions._run
+    source = traced.source.replace('def values(x):', 'def _values(x):')
+    source = source.replace('def evaluate(x):', 'def _evaluate(x):')
+    names = ', '.join(getattr(f, '__qualname__', repr(f)) for f in functions)
+    return _TEMPLATE.format(names=names, n_inputs=n_inputs, n_outputs=len(functions), key=key,
+                            kernels=', '.join(sorted(_NAMESPACE)), source=source.rstrip('\n') + '\n')
+
+
+def _fingerprint(obj, digest, seen):
+    '''
+    Feeds what determines the behavior of a function to the digest: its code, constants,
+    defaults and the values it refers to through closures and globals, recursively for the
+    functions it calls and the contents of the objects it uses.
+
+    Raises:
+        ValueError for objects whose contents cannot be read, which would make the key
+        depend on their address.
+    '''
+    module = getattr(obj, '__module__', None)
+    if isinstance(obj, _SCALARS):
+        digest.update(f'{type(obj).__qualname__}:{obj!r}'.encode())
+    elif (isinstance(module, str) and module.partition('.')[0] in _LIBRARIES
+          and isinstance(getattr(obj, '__qualname__', None), str)):
+        # np.sum, np.sin, sum, zapnAD.sin...: behavior set by the library
+        digest.update(f'{module}:{obj.__qualname__}'.encode())
+    elif isinstance(obj, types.ModuleType):
+        digest.update(obj.__name__.encode())
+    elif isinstance(obj, types.CodeType):
+        digest.update(obj.co_code)
+        digest.update(repr(obj.co_names).encode())
+        for const in obj.co_consts:
+            _fingerprint(const, digest, seen)
+    elif isinstance(obj, np.ndarray):
+        digest.update(str((obj.dtype, obj.shape)).encode())
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f'{type(obj).__name__}{len(obj)}'.encode())
+        for item in obj:
+            _fingerprint(item, digest, seen)
+    elif isinstance(obj, dict):
+        digest.update(f'dict{len(obj)}'.encode())
+        for name, item in obj.items():
+            _fingerprint(name, digest, seen)
+            _fingerprint(item, digest, seen)
+    elif isinstance(obj, types.MethodType):
+        _fingerprint(obj.__func__, digest, seen)
+        _fingerprint(obj.__self__, digest, seen)
+    elif id(obj) in seen:
+        digest.update(b'<seen>')
+    elif isinstance(obj, types.FunctionType):
+        seen.add(id(obj))
+        _fingerprint(obj.__code__, digest, seen)
+        _fingerprint(obj.__defaults__, digest, seen)
+        _fingerprint(obj.__kwdefaults__, digest, seen)
+        for cell in obj.__closure__ or ():
+            try:
+                contents = cell.cell_contents
+            # Empty cell, e.g. a variable assigned after the function is defined
+            except ValueError:
+                digest.update(b'<empty>')
+                continue
+            _fingerprint(contents, digest, seen)
+        for name in _global_names(obj.__code__):
+            if name in obj.__globals__:
+                digest.update(name.encode())
+                _fingerprint(obj.__globals__[name], digest, seen)
+    elif isinstance(obj, functools.partial):
+        seen.add(id(obj))
+        digest.update(b'partial')
+        _fingerprint((obj.func, obj.args, obj.keywords), digest, seen)
+    elif isinstance(obj, type):
+        seen.add(id(obj))
+        digest.update(f'class {obj.__qualname__}'.encode())
+        for cls in obj.__mro__[:-1]:
+            for name, attribute in sorted(vars(cls).items()):
+                attribute = getattr(attribute, '__func__', attribute)
+                if isinstance(attribute, (types.FunctionType, property)):
+                    digest.update(name.encode())
+                    _fingerprint(attribute.fget if isinstance(attribute, property) else attribute,
+                                 digest, seen)
+    elif hasattr(obj, '__dict__') or hasattr(type(obj), '__slots__'):
+        # Instances, e.g. a callable model with weight attributes, by their class and state
+        seen.add(id(obj))
+        _fingerprint(type(obj), digest, seen)
+        state = dict(getattr(obj, '__dict__', {}))
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if hasattr(obj, name):
+                    state[name] = getattr(obj, name)
+        _fingerprint(dict(sorted(state.items())), digest, seen)
+    else:
+        raise ValueError(f"Cannot fingerprint the {type(obj).__qualname__} object {obj!r}, "
+                         "pass key= explicitly")
+
+
+def _global_names(code):
+    '''
+    Returns the names a code object (and the code objects nested in it) may load as globals.
+    '''
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return sorted(names)
+
+
+def function_key(functions, n_inputs):
+    '''
+        Returns the key of the generated module of functions: a hash of their code and of the
+        values they refer to (constants, defaults, closures and globals, such as weight arrays
+        or the attributes of a callable object), of the number of inputs and of the source of
+        the derivative rules.
+
+        Input:
+            - functions: A list of python functions
+            - n_inputs: int, number of input variables
+
+        Returns:
+            - str, hexadecimal digest
+
+        Raises:
+            ValueError if a function refers to an object whose contents cannot be read.
+    '''
+    digest = hashlib.sha256(f'zapnAD-codegen-{_FORMAT}-{_SOURCE}-{n_inputs}'.encode())
+    seen = set()
+    for f in functions:
+        _fingerprint(f, digest, seen)
+    return digest.hexdigest()
+
+
+def compile_functions(functions, n_inputs, cache_dir=None, key=None):
+    '''
+        Returns the generated module of functions, generating it (once for all processes)
+        into the cache directory if needed. Later processes import the cached module, and
+        its bytecode, without tracing the functions again.
+
+        Input:
+            - functions: A list of python functions, as for trace.
+            - n_inputs: int, number of input variables
+            - cache_dir: str, directory of the generated modules. Default to the ZAPNAD_CACHE_DIR
+            environment variable, or DEFAULT_CACHE_DIR.
+            - key: str, key of the module. Default to function_key(functions, n_inputs). Pass a
+            key explicitly when the functions refer to objects whose contents cannot be read.
+
+        Returns:
+            - module with the functions values(x) and diff(x), see generate_source
+
+        Raises:
+            TracingError if a function cannot be traced.
+            ValueError if key is None and a function refers to an object whose contents
+            cannot be read.
+    '''
+    key = function_key(functions, n_inputs) if key is None else key
+    cache_dir = cache_dir or os.environ.get('ZAPNAD_CACHE_DIR') or DEFAULT_CACHE_DIR
+    path = os.path.join(cache_dir, f'zapnad_{key[:32]}.py')
+    if path in _loaded:
+        return _loaded[path]
+    if not os.path.exists(path):
+        source = generate_source(functions, n_inputs, key)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Written under a temporary name, so that concurrent processes never import a partial file
+        descriptor, temporary = tempfile.mkstemp(suffix='.py', dir=cache_dir)
+        with os.fdopen(descriptor, 'w') as file:
+            file.write(source)
+        os.replace(temporary, path)
+
+    spec = importlib.util.spec_from_file_location(f'zapnad_{key[:32]}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _loaded[path] = module
+    return module
@@ -0,0 +1,155 @@
+import numpy as np
+from collections import OrderedDict
+from .dualNumbers import auto_diff
+from .reverseMode import reverse_diff
+
+__all__ = ['DiffCache']
+
+class DiffCache:
+    '''
+    Memoization of the values and Jacobians of functions, with least recently used eviction.
+
+    An entry is keyed on the identity of the functions (the function objects themselves, so a
+    function redefined with the same code is a different function), the exact bytes of the
+    input values, and a tag telling how the result was computed (e.g. the differentiation mode).
+    The cached arrays are read-only, so callers can not alter the stored results.
+    '''
+
+    def __init__(self, max_entries=128, max_bytes=None):
+        '''
+        Input:
+            - max_entries: int, number of entries kept. Default to 128, None for no limit.
+            - max_bytes: int, total size in bytes of the arrays kept. Default to None, no limit.
+        '''
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        '''
+        Returns:
+            - int, number of entries
+        '''
+        return len(self._entries)
+
+    @staticmethod
+    def key(functions, variable_values, tag=None):
+        '''
+        Returns the key of the entry of functions at variable_values.
+
+        Input:
+            - functions: list of python functions
+            - variable_values: list or ndarray of the input values
+            - tag: hashable, distinguishes results computed differently. Default to None.
+
+        Returns:
+            - tuple, hashable key
+        '''
+        values = np.ascontiguousarray(variable_values, dtype=float)
+        return tuple(functions), tag, values.shape, values.tobytes()
+
+    def get_or_compute(self, functions, variable_values, compute, tag=None):
+        '''
+        Returns the cached result of functions at variable_values, or computes and stores it.
+
+        Input:
+            - functions: list of python functions
+            - variable_values: list or ndarray of the input values
+            - compute: function without arguments returning the result, a tuple of ndarrays
+            - tag: hashable, distinguishes results computed differently. Default to None.
+
+        Returns:
+            - tuple of read-only ndarrays
+        '''
+        key = self.key(functions, variable_values, tag)
+        result = self._entries.get(key)
+        if result is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return result
+
+        self.misses += 1
+        result = tuple(np.array(array) for array in compute())
+        for array in result:
+            array.setflags(write=False)
+        self._entries[key] = result
+        self.nbytes += _size(key, result)
+        self._evict()
+        return result
+
+    def __call__(self, functions, variable_values, mode='forward'):
+        '''
+        Memoized auto_diff (or reverse_diff with mode='reverse').
+
+        Returns:
+            A tuple which contains an numpy array of each function evaluated at the specified values,
+            and the Jacobian of the vector function evaluated at variable values.
+        '''
+        differentiate = reverse_diff if mode == 'reverse' else auto_diff
+        return self.get_or_compute(functions, variable_values,
+                                   lambda: differentiate(functions, variable_values), tag=mode)
+
+    def _evict(self):
+        '''
+        Removes the least recently used entries until the limits are satisfied.
+        '''
+        while self._entries and ((self.max_entries is not None and len(self._entries) > self.max_entries)
+                                 or (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            key, result = self._entries.popitem(last=False)
+            self.nbytes -= _size(key, result)
+            self.evictions += 1
+
+    def invalidate(self, functions=None, variable_values=None, tag=None):
+        '''
+        Removes entries.
+
+        Input:
+            - functions: list of python functions. Default to None, all the entries are removed.
+            - variable_values: list or ndarray of the input values. Default to None, all the
+            entries involving any of the functions are removed. Otherwise only the entry of
+            the functions at these values (and tag) is removed.
+            - tag: hashable, tag of the entry to remove with variable_values.
+
+        Returns:
+            - int, number of entries removed
+        '''
+        if functions is None:
+            keys = list(self._entries)
+        elif variable_values is not None:
+            key = self.key(functions, variable_values, tag)
+            keys = [key] if key in self._entries else []
+        else:
+            targets = set(map(id, functions))
+            keys = [key for key in self._entries if any(id(f) in targets for f in key[0])]
+        for key in keys:
+            self.nbytes -= _size(key, self._entries.pop(key))
+        return len(keys)
+
+    def clear(self):
+        '''
+        Removes every entry and resets the statistics.
+        '''
+        self.invalidate()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        '''
+        Returns:
+            - dict with the numbers of hits, misses and evictions, the hit rate, and the number
+            of entries and bytes kept
+        '''
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries), 'bytes': self.nbytes}
+
+
+def _size(key, result):
+    '''
+    Returns the size in bytes of the arrays of an entry, including its input values.
+    '''
+    return len(key[3]) + sum(array.nbytes for array in result)
@@ -1,8 +1,43 @@
 import numpy as np
-
-__all__ = ['Variable', 'Variables', 'Functions', 'auto_diff']
+from .sparseDerivative import SparseDerivative
+
+__all__ = ['Variable', 'Variables', 'Functions', 'auto_diff', 'chunk_size_for', 'jvp', 'batch_auto_diff',
+        'DEFAULT_MEMORY_BUDGET']
+
+# Types treated as constants by the Variable operators
+_CONSTANTS = (int, float, np.number, np.ndarray)
+
+# Default memory budget of chunked forward mode, in bytes of tangent storage
+DEFAULT_MEMORY_BUDGET = 2 ** 27
+
+# Below this number of inputs the tangents are never worth chunking
+_MIN_AUTO_CHUNK = 64
+
+# numpy ufuncs and functions routed to the derivative rules when applied to Variables,
+# e.g. np.sin to overLoad.sin. They are registered by the modules implementing the rules.
+_UFUNCS = {}
+_FUNCTIONS = {}
+
+# numpy ufuncs of two operands, and the Variable operators (direct and reflected) they call
+_BINARY_UFUNCS = {
+    np.add: ('__add__', '__radd__'),
+    np.subtract: ('__sub__', '__rsub__'),
+    np.multiply: ('__mul__', '__rmul__'),
+    np.true_divide: ('__truediv__', '__rtruediv__'),
+    np.power: ('__pow__', '__rpow__'),
+    np.matmul: ('__matmul__', '__rmatmul__'),
+    np.less: ('__lt__', '__gt__'),
+    np.less_equal: ('__le__', '__ge__'),
+    np.greater: ('__gt__', '__lt__'),
+    np.greater_equal: ('__ge__', '__le__'),
+    np.equal: ('__eq__', '__eq__'),
+    np.not_equal: ('__ne__', '__ne__'),
+}
 
 class Variable:
+    # No per-instance __dict__: Variables are created by every single operation
+    __slots__ = ('val', 'der')
+
     def __init__(self, value, derivatives=None) -> None:
         '''
         Stores the current value and derivative of this variable.
@@ -35,6 +70,54 @@ class Variable:
             - ndarray of size (n, ), current full derivative of the variable (Jacobian)
         '''
         return self.der
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        '''
+        Routes numpy ufuncs applied to Variables to the derivative rules,
+        e.g. np.sin(x) to overLoad.sin(x) and np.float64 * x to x.__rmul__.
+
+        Returns:
+            - Variable instance, or NotImplemented for the ufuncs without derivative rules
+        '''
+        if kwargs.get('out') is not None:
+            return NotImplemented
+        if method == 'reduce' and ufunc is np.add and np.sum in _FUNCTIONS:
+            return _FUNCTIONS[np.sum](inputs[0], axis=kwargs.get('axis', 0))
+        if method != '__call__':
+            return NotImplemented
+        if ufunc in _BINARY_UFUNCS:
+            a, b = inputs
+            name, reflected = _BINARY_UFUNCS[ufunc]
+            variable, other = (a, b) if isinstance(a, Variable) else (b, a)
+            if isinstance(other, np.ndarray) and other.ndim > 0 and not hasattr(variable, 'ndim'):
+                # A scalar Variable with an array gives an object array of one Variable per
+                # element, as numpy does for objects: run the object loop on the Variable boxed
+                box = np.empty((), dtype=object)
+                box[()] = variable
+                return ufunc(*(box if x is variable else x for x in inputs))
+            # Call the operators directly: a * b would call this ufunc again for an ndarray a
+            operator = getattr(a, name) if isinstance(a, Variable) else getattr(b, reflected, None)
+            if operator is None:
+                return NotImplemented
+            return operator(b if isinstance(a, Variable) else a)
+        if ufunc is np.negative:
+            return -inputs[0]
+        if ufunc is np.positive:
+            return inputs[0]
+        rule = _UFUNCS.get(ufunc)
+        if rule is None:
+            return NotImplemented
+        return rule(*inputs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        '''
+        Routes numpy functions (e.g. np.stack, np.sum, np.dot) applied to Variables to their
+        vectorized implementations. The other functions run as they would without the protocol.
+        '''
+        implementation = _FUNCTIONS.get(func, getattr(func, '_implementation', None))
+        if implementation is None:
+            return NotImplemented
+        return implementation(*args, **kwargs)
     
     def __mul__(self, other):
         '''
@@ -47,27 +130,15 @@ class Variable:
             - Variable instance
         '''
         # Product derivative rule for two Variable types
-        try:
-            new_f = Variable(self.val * other.val)
-            new_f.der = self.der * other.val + self.val * other.der
+        if isinstance(other, Variable):
+            return Variable(self.val * other.val, self.der * other.val + self.val * other.der)
         # When other is a real number
-        except AttributeError:
-            new_f = Variable(self.val * other)
-            new_f.der = self.der * other
-        return new_f
+        if isinstance(other, _CONSTANTS):
+            return Variable(self.val * other, self.der * other)
+        return NotImplemented
     
-    def __rmul__(self, other):
-        '''
-        Special dunder method to handle the case of int/float * Variable instance.
-        Convert to Variable * int/float and then handled by __mul__(self, other).
-
-        Input:
-            - other: int or float or Variable instance
-        
-        Returns:
-            - Variable instance
-        '''
-        return self.__mul__(other)
+    # int/float * Variable instance is handled by __mul__(self, other)
+    __rmul__ = __mul__
     
     def __add__(self, other):
         '''
@@ -80,15 +151,16 @@ class Variable:
             - Variable instance
         '''
         # Sum of derivatives for two Variable types
-        try:
-            new_f = Variable(self.val + other.val)
-            new_f.der = self.der + other.der
+        if isinstance(other, Variable):
+            return Variable(self.val + other.val, self.der + other.der)
         # When other is a real number (beta)
-        except AttributeError:
-            new_f = Variable(self.val + other)
-            new_f.der = self.der
-        return new_f
+        if isinstance(other, _CONSTANTS):
+            return Variable(self.val + other, self.der)
+        return NotImplemented
     
+    # int/float + Variable instance is handled by __add__(self, other)
+    __radd__ = __add__
+
     def __neg__(self):
         '''
         Special dunder method to handle the negation of a Variable instance.
@@ -96,12 +168,11 @@ class Variable:
         Returns:
             - Variable instance
         '''
-        return Variable(-1*self.val, -1*self.der)
+        return Variable(-self.val, -self.der)
 
-    def __radd__(self, other):
+    def __sub__(self, other):
         '''
-        Special dunder method to handle the case of int/float + Variable instance.
-        Convert to Variable + int/float and then handled by __add__(self, other).
+        Compute the new variable with updated value and derivative after substraction.
 
         Input:
             - other: int or float or Variable instance
@@ -109,33 +180,62 @@ class Variable:
         Returns:
             - Variable instance
         '''
-        return self.__add__(other)
+        # Difference of derivatives for two Variable types
+        if isinstance(other, Variable):
+            return Variable(self.val - other.val, self.der - other.der)
+        # When other is a real number
+        if isinstance(other, _CONSTANTS):
+            return Variable(self.val - other, self.der)
+        return NotImplemented
 
-    def __sub__(self, other):
+    def __rsub__(self, other):
         '''
-        Compute the new variable with updated value and derivative after substraction.
+        Special dunder method to handle the case of int/float - Variable instance.
 
         Input:
-            - other: int or float or Variable instance
+            - other: int or float
         
         Returns:
             - Variable instance
         '''
-        # Subtraction using the dunder methods above
-        return self + (-1*other)
+        if isinstance(other, _CONSTANTS):
+            return Variable(other - self.val, -self.der)
+        return NotImplemented
 
-    def __rsub__(self, other):
+    def __truediv__(self, other):
         '''
-        Special dunder method to handle the case of int/float - Variable instance.
-        Convert to int/float + (-Variable) and then handled by __radd__ and __neg__.
+        Compute the new variable with updated value and derivative after division.
 
         Input:
             - other: int or float or Variable instance
-        
+
+        Returns:
+            - Variable instance
+        '''
+        # Quotient derivative rule for two Variable types: (u/v)' = (u' - (u/v) v') / v
+        if isinstance(other, Variable):
+            val = self.val / other.val
+            return Variable(val, (self.der - val * other.der) / other.val)
+        # When other is a real number
+        if isinstance(other, _CONSTANTS):
+            return Variable(self.val / other, self.der / other)
+        return NotImplemented
+
+    def __rtruediv__(self, other):
+        '''
+        Special dunder method to handle the case of int/float / Variable instance.
+
+        Input:
+            - other: int or float
+
         Returns:
             - Variable instance
         '''
-        return other + (-1*self)
+        # (c/v)' = -(c/v) v' / v
+        if isinstance(other, _CONSTANTS):
+            val = other / self.val
+            return Variable(val, (-val / self.val) * self.der)
+        return NotImplemented
     
     def __pow__(self, p):
         '''
@@ -147,9 +247,7 @@ class Variable:
         Returns:
             - Variable instance
         '''
-        new_f = Variable(self.val ** p)
-        new_f.der = p * self.val ** (p - 1) * self.der
-        return new_f
+        return Variable(self.val ** p, p * self.val ** (p - 1) * self.der)
 
     def __lt__(self, other):
         '''
@@ -231,14 +329,16 @@ class Variable:
         
         
 class Variables:
-    def __init__(self, n_inputs):
+    def __init__(self, n_inputs, sparse=False):
         '''
         Attributes:
             - self.n_inputs: int, number of input variables x, y, z ...
             - self.variables: list of object type Variable
+            - self.sparse: bool, seed the variables with SparseDerivative instead of dense ndarray
         '''
         self.n_inputs = n_inputs
         self.variables = []
+        self.sparse = sparse
     
     def __len__(self):
         '''
@@ -268,24 +368,55 @@ class Variables:
         assert key < len(self.variables), "Key Error"
         return self.variables[key]
     
-    def set_values(self, values):
+    def set_values(self, values, seeds=None):
         '''
         This class is a vector representation of all the input variables.
         Input:
             values: list of float numbers
+            seeds: list of the initial derivative of each variable, e.g. the rows of a seed matrix
+            of shape (n, p) to propagate p directions at once. Default to the rows of the identity.
         Returns:
             None
         '''
         n = len(values)
         assert n == self.n_inputs, 'Dimension Mismatch!'
+        if seeds is not None:
+            assert len(seeds) == n, 'Dimension Mismatch!'
+            self.variables = [Variable(value, seed) for value, seed in zip(values, seeds)]
+            return self
         variable_list = []
         for i, value in enumerate(values):
-            der_list = np.zeros(n)
-            der_list[i] = 1
+            if self.sparse:
+                der_list = SparseDerivative({i: 1.0}, n)
+            else:
+                der_list = np.zeros(n)
+                der_list[i] = 1
             variable_list.append(Variable(value, der_list))
         self.variables = variable_list
         return self
 
+    def set_batch_values(self, points):
+        '''
+        Sets the values of all the input variables at N points at once.
+        Each variable holds an ndarray of N values, and its derivative has shape (n, 1),
+        which broadcasts against the values, so every operation evaluates all the points
+        with single numpy calls.
+        Input:
+            points: ndarray or list of shape (N, n)
+        Returns:
+            None
+        '''
+        points = np.asarray(points, dtype=float)
+        assert points.ndim == 2 and points.shape[1] == self.n_inputs, 'Dimension Mismatch!'
+        n = self.n_inputs
+        variable_list = []
+        for i in range(n):
+            der_list = np.zeros((n, 1))
+            der_list[i] = 1
+            variable_list.append(Variable(points[:, i], der_list))
+        self.variables = variable_list
+        return self
+
 
 class Functions():
     def __init__(self, Fs):
@@ -308,17 +439,93 @@ class Functions():
         result = [F.get_value() for F in self.Fs]
         return np.array(result)
     
-    def Jacobian(self):
+    def Jacobian(self, out=None, columns=None):
         '''
         Computes the Jacobian matrix.
+        Sparse derivatives are scattered straight into their rows.
+
+        Input:
+            - out: ndarray of shape (n_outputs, n), to assemble the Jacobian of a chunk of seed
+            directions in place. Default to None, a new array is returned.
+            - columns: slice, the columns of out holding this chunk. Default to all the columns.
 
         Returns:
-            - ndarray of shape (n_outputs, n_inputs)
+            - ndarray of shape (n_outputs, n_inputs), or out
+        '''
+        ders = [f.get_gradient() for f in self.Fs]
+        if out is not None:
+            block = out[:, slice(None) if columns is None else columns]
+            for row, der in enumerate(ders):
+                block[row] = der
+            return out
+        if not any(isinstance(der, SparseDerivative) for der in ders):
+            return np.vstack(ders)
+
+        J = np.zeros((len(ders), len(ders[0])))
+        for row, der in enumerate(ders):
+            if isinstance(der, SparseDerivative):
+                J[row, list(der.entries.keys())] = list(der.entries.values())
+            else:
+                J[row] = der
+        return J
+
+
+class _TangentCounter:
+    '''
+    Stand-in derivative counting the tangents alive at the same time during an evaluation,
+    used to size the chunks of chunked forward mode.
+    '''
+    # Make numpy defer to our reflected operators (e.g. np.float64 * _TangentCounter)
+    __array_ufunc__ = None
+
+    def __init__(self, stats):
         '''
-        return np.vstack([f.get_gradient() for f in self.Fs])
+        Input:
+            - stats: list [alive, peak], shared by all the counters of an evaluation
+        '''
+        self.stats = stats
+        stats[0] += 1
+        stats[1] = max(stats[1], stats[0])
+
+    def __del__(self):
+        self.stats[0] -= 1
 
+    def __mul__(self, other):
+        return _TangentCounter(self.stats)
 
-def auto_diff(functions, variable_values):        
+    __rmul__ = __truediv__ = __add__ = __radd__ = __sub__ = __mul__
+
+    def __neg__(self):
+        return _TangentCounter(self.stats)
+
+
+def chunk_size_for(functions, variable_values, memory_budget=DEFAULT_MEMORY_BUDGET):
+    '''
+        Largest number of seed directions per forward pass keeping the tangents within a memory budget.
+        The functions are evaluated once with cheap stand-in derivatives to find the peak number
+        of tangents alive at the same time.
+
+        Input:
+            - functions: A list of python functions to represent vector functions.
+            - variable_values: A list of integers or floats to represent each variable value.
+            - memory_budget: int, bytes of tangent storage allowed. Default to DEFAULT_MEMORY_BUDGET.
+
+        Returns:
+            int, the chunk size, between 1 and the number of variables.
+    '''
+    n = len(variable_values)
+    if n <= _MIN_AUTO_CHUNK:
+        return n
+    stats = [0, 0]
+    variables = Variables(n_inputs=n)
+    variables.set_values(variable_values, seeds=[_TangentCounter(stats) for _ in range(n)])
+    Fs = [f([v for v in variables]) for f in functions]
+    del Fs, variables
+    # Each tangent holds chunk size floats of 8 bytes
+    return int(max(1, min(n, memory_budget // (8 * stats[1]))))
+
+
+def auto_diff(functions, variable_values, sparse=False, chunk_size=None, memory_budget=None):
     '''
         Differentiate a list of functions in respect to a list of values
         
@@ -326,21 +533,118 @@ def auto_diff(functions, variable_values):
             - functions: A list of python functions to represent vector functions. 
             Each function takes a list of elements to represent variables, and outputs the defined function of those variables.
             - variable_values: A list of integers or floats to represent each variable value.
+            - sparse: If True, derivatives are propagated as SparseDerivative, so each operation only
+            touches the inputs its operands depend on. Default set to False.
+            - chunk_size: int, number of seed directions propagated per forward pass. The Jacobian is
+            assembled over ceil(n / chunk_size) passes, which bounds the memory of the tangents to
+            chunk_size floats each. 'auto' picks it from memory_budget with chunk_size_for.
+            Default to None, all the n directions in a single pass.
+            - memory_budget: int, bytes of tangent storage for chunk_size='auto'. Giving it alone
+            also selects 'auto'. Default to DEFAULT_MEMORY_BUDGET.
             
         Returns:
             A tuple which contains an numpy array of each function evaluated at the specified values,
             and the Jacobian of the vector function evaluated at variable values.
     '''
+    if chunk_size is not None or memory_budget is not None:
+        if sparse:
+            raise ValueError("chunk_size can not be combined with sparse derivatives")
+        return _chunked_auto_diff(functions, variable_values, chunk_size, memory_budget)
 
     # Define variables as our variable types
-    variables = Variables(n_inputs=len(variable_values))
+    variables = Variables(n_inputs=len(variable_values), sparse=sparse)
     variables.set_values(variable_values)
     
     # Apply vector function to vector inputs
     function = Functions(Fs = [f([v for v in variables]) for f in functions])
     
     return function.values(), function.Jacobian()
-    
+
+
+def _chunked_auto_diff(functions, variable_values, chunk_size, memory_budget):
+    '''
+    Forward mode over chunks of chunk_size seed directions, see auto_diff.
+    '''
+    n = len(variable_values)
+    if chunk_size is None or chunk_size == 'auto':
+        budget = DEFAULT_MEMORY_BUDGET if memory_budget is None else memory_budget
+        chunk_size = chunk_size_for(functions, variable_values, budget)
+    if not isinstance(chunk_size, (int, np.integer)) or chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer or 'auto'")
+
+    variables = Variables(n_inputs=n)
+    J = None
+    for start in range(0, max(n, 1), chunk_size):
+        stop = min(start + chunk_size, n)
+        # Inputs outside of the chunk share a single zero tangent
+        zero = np.zeros(stop - start)
+        seeds = [zero] * n
+        for i in range(start, stop):
+            seeds[i] = np.zeros(stop - start)
+            seeds[i][i - start] = 1
+        variables.set_values(variable_values, seeds=seeds)
+        function = Functions(Fs = [f([v for v in variables]) for f in functions])
+        if J is None:
+            values = function.values()
+            J = np.zeros((len(function), n))
+        function.Jacobian(out=J, columns=slice(start, stop))
+    return values, J
+
+
+def jvp(functions, variable_values, direction):
+    '''
+        Jacobian-vector product J v, without forming the Jacobian.
+        The variables are seeded with the direction instead of the identity, so the
+        tangents carry one float per direction instead of n.
+
+        Input:
+            - functions: A list of python functions to represent vector functions.
+            Each function takes a list of elements to represent variables, and outputs the defined function of those variables.
+            - variable_values: A list of integers or floats to represent each variable value.
+            - direction: ndarray of shape (n, ), or (n, k) for k directions at once.
+
+        Returns:
+            A tuple which contains an numpy array of each function evaluated at the specified values,
+            and the product of shape (m, ), or (m, k) with one column per direction.
+    '''
+    direction = np.asarray(direction, dtype=float)
+    assert len(direction) == len(variable_values), 'Dimension Mismatch!'
+    variables = Variables(n_inputs=len(variable_values))
+    variables.set_values(variable_values, seeds=direction)
+    function = Functions(Fs = [f([v for v in variables]) for f in functions])
+
+    shape = direction.shape[1:]
+    product = np.array([np.broadcast_to(F.get_gradient(), shape) for F in function.Fs])
+    return function.values(), product.reshape((len(function), ) + shape)
+
+
+def batch_auto_diff(functions, points):
+    '''
+        Differentiate a list of functions at many points at once.
+        The functions are evaluated a single time on Variables holding all the points,
+        so the cost per point is a fraction of calling auto_diff in a loop.
+
+        Input:
+            - functions: A list of python functions to represent vector functions.
+            Each function takes a list of elements to represent variables, and outputs the defined function of those variables.
+            - points: A list or ndarray of shape (N, n), one row of variable values per point.
+
+        Returns:
+            A tuple which contains an numpy array of shape (N, m) of each function evaluated at each point,
+            and an numpy array of shape (N, m, n) of the Jacobian at each point.
+    '''
+    points = np.asarray(points, dtype=float)
+    variables = Variables(n_inputs=points.shape[1])
+    variables.set_batch_values(points)
+
+    function = Functions(Fs = [f([v for v in variables]) for f in functions])
+
+    N, n = points.shape
+    values = np.stack([np.broadcast_to(F.get_value(), (N, )) for F in function.Fs], axis=1)
+    # Derivatives have shape (n, N), move the points first
+    jacobian = np.stack([np.broadcast_to(F.get_gradient(), (n, N)) for F in function.Fs])
+    return values, jacobian.transpose(2, 0, 1)
+
 
 
 """
@@ -0,0 +1,261 @@
+import numpy as np
+
+__all__ = ['HyperDual', 'hessian', 'hvp']
+
+# Types treated as constants by the HyperDual operators
+_CONSTANTS = (int, float, np.number, np.ndarray)
+
+class HyperDual:
+    '''
+    Hyper-dual number real + eps1 e1 + eps2 e2 + eps12 e1 e2, with e1**2 = e2**2 = 0.
+
+    Evaluating a function at x + e1 a + e2 b gives the directional derivatives a.g and b.g
+    in eps1 and eps2, and the second order term a^T H b in eps12, exactly. The two
+    perturbations can be vectors of directions: eps1 has shape (p, ), eps2 shape (q, ) and
+    eps12 shape (p, q), so seeding e2 with the identity gives a whole gradient and a row
+    of H per direction of e1.
+
+    There is no val or der attribute: the overLoad functions then fall back to numpy,
+    which calls the method of the same name (e.g. np.sin(x) calls x.sin()).
+    '''
+    __slots__ = ('real', 'eps1', 'eps2', 'eps12')
+
+    def __init__(self, real, eps1=0.0, eps2=0.0, eps12=0.0):
+        '''
+        Input:
+            - real: int or float, value
+            - eps1: float or ndarray of shape (p, ), first order part along e1
+            - eps2: float or ndarray of shape (q, ), first order part along e2
+            - eps12: float or ndarray of shape (p, q), second order part
+        '''
+        self.real = real
+        self.eps1 = eps1
+        self.eps2 = eps2
+        self.eps12 = eps12
+
+    def __str__(self):
+        return f"HyperDual({self.real}, {self.eps1}, {self.eps2}, {self.eps12})"
+
+    def _chain(self, f, df, d2f):
+        '''
+        Applies a scalar function given its value and first two derivatives at self.real.
+
+        Returns:
+            - HyperDual instance
+        '''
+        return HyperDual(f, df * self.eps1, df * self.eps2,
+                         df * self.eps12 + d2f * np.multiply.outer(self.eps1, self.eps2))
+
+    def __add__(self, other):
+        if isinstance(other, HyperDual):
+            return HyperDual(self.real + other.real, self.eps1 + other.eps1,
+                             self.eps2 + other.eps2, self.eps12 + other.eps12)
+        if isinstance(other, _CONSTANTS):
+            return HyperDual(self.real + other, self.eps1, self.eps2, self.eps12)
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return HyperDual(-self.real, -self.eps1, -self.eps2, -self.eps12)
+
+    def __sub__(self, other):
+        if isinstance(other, (HyperDual, ) + _CONSTANTS):
+            return self + (-other)
+        return NotImplemented
+
+    def __rsub__(self, other):
+        if isinstance(other, _CONSTANTS):
+            return (-self) + other
+        return NotImplemented
+
+    def __mul__(self, other):
+        if isinstance(other, HyperDual):
+            eps12 = self.eps12 * other.real + self.real * other.eps12 \
+                + np.multiply.outer(self.eps1, other.eps2) + np.multiply.outer(other.eps1, self.eps2)
+            return HyperDual(self.real * other.real, self.eps1 * other.real + self.real * other.eps1,
+                             self.eps2 * other.real + self.real * other.eps2, eps12)
+        if isinstance(other, _CONSTANTS):
+            return HyperDual(self.real * other, self.eps1 * other, self.eps2 * other, self.eps12 * other)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def reciprocal(self):
+        '''
+        Returns:
+            - HyperDual instance, 1 / self
+        '''
+        r = 1 / self.real
+        return self._chain(r, -r * r, 2 * r * r * r)
+
+    def __truediv__(self, other):
+        if isinstance(other, HyperDual):
+            return self * other.reciprocal()
+        if isinstance(other, _CONSTANTS):
+            return self * (1 / other)
+        return NotImplemented
+
+    def __rtruediv__(self, other):
+        if isinstance(other, _CONSTANTS):
+            return self.reciprocal() * other
+        return NotImplemented
+
+    def __pow__(self, p):
+        '''
+        Input:
+            - p: int, float or HyperDual instance
+
+        Returns:
+            - HyperDual instance
+        '''
+        if isinstance(p, HyperDual):
+            return (p * self.log()).exp()
+        x = np.float64(self.real)
+        # The vanishing derivatives of x^0 and x^1 stay 0 at x = 0, the others are infinite there
+        with np.errstate(divide='ignore', invalid='ignore'):
+            first = p * x ** (p - 1) if p != 0 else 0.0
+            second = p * (p - 1) * x ** (p - 2) if p not in (0, 1) else 0.0
+            return self._chain(x ** p, first, second)
+
+    def __rpow__(self, base):
+        '''
+        Special dunder method to handle the case of int/float ** HyperDual instance.
+        '''
+        return (self * np.log(base)).exp()
+
+    def __lt__(self, other):
+        return self.real < getattr(other, 'real', other)
+
+    def __le__(self, other):
+        return self.real <= getattr(other, 'real', other)
+
+    def __gt__(self, other):
+        return self.real > getattr(other, 'real', other)
+
+    def __ge__(self, other):
+        return self.real >= getattr(other, 'real', other)
+
+    def sin(self):
+        s, c = np.sin(self.real), np.cos(self.real)
+        return self._chain(s, c, -s)
+
+    def cos(self):
+        s, c = np.sin(self.real), np.cos(self.real)
+        return self._chain(c, -s, -c)
+
+    def tan(self):
+        t = np.tan(self.real)
+        d = 1 + t * t
+        return self._chain(t, d, 2 * t * d)
+
+    def arcsin(self):
+        x = self.real
+        d = 1 / np.sqrt(1 - x * x)
+        return self._chain(np.arcsin(x), d, x * d ** 3)
+
+    def arccos(self):
+        x = self.real
+        d = 1 / np.sqrt(1 - x * x)
+        return self._chain(np.arccos(x), -d, -x * d ** 3)
+
+    def arctan(self):
+        x = self.real
+        d = 1 / (1 + x * x)
+        return self._chain(np.arctan(x), d, -2 * x * d * d)
+
+    def exp(self):
+        e = np.exp(self.real)
+        return self._chain(e, e, e)
+
+    def log(self):
+        x = self.real
+        return self._chain(np.log(x), 1 / x, -1 / (x * x))
+
+    def log2(self):
+        return self.log() / np.log(2)
+
+    def log10(self):
+        return self.log() / np.log(10)
+
+    def sqrt(self):
+        if self.real < 0:
+            raise ValueError("Value < 0 not valid for square root")
+        return self ** 0.5
+
+    def sinh(self):
+        s, c = np.sinh(self.real), np.cosh(self.real)
+        return self._chain(s, c, s)
+
+    def cosh(self):
+        s, c = np.sinh(self.real), np.cosh(self.real)
+        return self._chain(c, s, c)
+
+    def tanh(self):
+        t = np.tanh(self.real)
+        d = 1 - t * t
+        return self._chain(t, d, -2 * t * d)
+
+
+def _evaluate(function, variable_values, directions):
+    '''
+    Evaluates function at x + e1 directions + e2 I, so that eps2 is the gradient and
+    eps12 holds the products of the Hessian with the directions.
+
+    Input:
+        - directions: ndarray of shape (n, ) + (p, ) or (n, )
+
+    Returns:
+        - HyperDual instance
+    '''
+    n = len(variable_values)
+    identity = np.eye(n)
+    zero = np.zeros(np.shape(directions[0]) + (n, )) if n else 0.0
+    variables = [HyperDual(value, directions[i], identity[i], zero) for i, value in enumerate(variable_values)]
+    F = function(variables)
+    if not isinstance(F, HyperDual):
+        # Constant function
+        F = HyperDual(F, np.zeros(np.shape(directions[0])), np.zeros(n), zero)
+    return F
+
+
+def hessian(function, variable_values):
+    '''
+        Computes the Hessian of a scalar function exactly, in a single forward pass of
+        hyper-dual numbers. Every operation costs O(n^2).
+
+        Input:
+            - function: A python function of a list of variables, returning a scalar.
+            - variable_values: A list of integers or floats to represent each variable value.
+
+        Returns:
+            A tuple which contains the value of the function, its gradient of shape (n, ),
+            and its Hessian of shape (n, n).
+    '''
+    n = len(variable_values)
+    F = _evaluate(function, variable_values, np.eye(n))
+    H = np.broadcast_to(F.eps12, (n, n))
+    return F.real, np.broadcast_to(F.eps2, (n, )).copy(), H.copy()
+
+
+def hvp(function, variable_values, direction):
+    '''
+        Computes the Hessian-vector product H v of a scalar function without forming the
+        Hessian. Every operation costs O(n), like a forward mode gradient.
+
+        Input:
+            - function: A python function of a list of variables, returning a scalar.
+            - variable_values: A list of integers or floats to represent each variable value.
+            - direction: ndarray of shape (n, ), or (n, k) for k directions at once.
+
+        Returns:
+            A tuple which contains the value of the function, its gradient of shape (n, ),
+            and the product of shape (n, ), or (n, k) with one column per direction.
+    '''
+    direction = np.asarray(direction, dtype=float)
+    n = len(variable_values)
+    assert len(direction) == n, 'Dimension Mismatch!'
+    F = _evaluate(function, variable_values, direction)
+    # eps12 has shape (k, n), or (n, ) for a single direction
+    product = np.broadcast_to(F.eps12, direction.shape[1:] + (n, ))
+    return F.real, np.broadcast_to(F.eps2, (n, )).copy(), np.moveaxis(product, -1, 0).copy()
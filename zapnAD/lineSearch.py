@@ -0,0 +1,133 @@
+import numpy as np
+
+__all__ = ['LineSearch', 'ArmijoLineSearch', 'WolfeLineSearch']
+
+class LineSearch():
+    """Class representing a strategy choosing the step length along a search direction.
+
+    A line search works on phi(t) = f(w + t d), through an object with two methods:
+    - phi.value(t): returns f(w + t d), without computing the gradient.
+    - phi.slope(t): returns f(w + t d) and the slope g(w + t d).d, computing the gradient.
+    so that the strategies which only need function values at trial points skip the
+    derivatives.
+    """
+
+    def search(self, phi, f_0, slope_0):
+        """Returns the step length t.
+
+        Arguments:
+        - phi: the function along the direction, see LineSearch.
+        - f_0: value phi(0).
+        - slope_0: slope of phi at 0, negative along a descent direction.
+        """
+        raise NotImplementedError
+
+
+class ArmijoLineSearch(LineSearch):
+
+    def __init__(self, c_1=1e-4, shrink=0.5, initial=1.0, max_iter=30):
+        """Initializes a backtracking line search with the Armijo (sufficient decrease) condition
+        f(w + t d) <= f(w) + c_1 t g.d. Only function values are computed at the trial points.
+
+        Arguments:
+        - c_1: sufficient decrease constant. Default set to 1e-4.
+        - shrink: largest factor between two trial steps. The next trial minimizes the quadratic
+                interpolating f(w), g.d and the last trial, within [0.1, shrink] times the last
+                trial. Default set to 0.5.
+        - initial: first trial step, relative to the direction. Default set to 1.0.
+        - max_iter: max trial steps. The step is 0 if none of them decreases enough.
+                Default set to 30.
+        """
+        self.c_1 = c_1
+        self.shrink = shrink
+        self.initial = initial
+        self.max_iter = max_iter
+
+    def search(self, phi, f_0, slope_0):
+        """Returns the first trial step satisfying the Armijo condition, or 0."""
+        t = self.initial
+        for _ in range(self.max_iter):
+            f = phi.value(t)
+            if f <= f_0 + self.c_1 * t * slope_0:
+                return t
+            if np.isfinite(f):
+                # Minimizer of the quadratic through f_0, slope_0 and f
+                t_next = -slope_0 * t * t / (2 * (f - f_0 - slope_0 * t))
+                t = min(max(t_next, 0.1 * t), self.shrink * t)
+            else:
+                t = 0.1 * t
+        return 0.0
+
+
+class WolfeLineSearch(LineSearch):
+
+    def __init__(self, c_1=1e-4, c_2=0.9, initial=1.0, max_step=1e10, max_iter=20):
+        """Initializes a line search for the strong Wolfe conditions
+        f(w + t d) <= f(w) + c_1 t g.d and |g(w + t d).d| <= c_2 |g.d|, bracketing the step
+        and zooming in with cubic interpolation (Nocedal and Wright, algorithms 3.5 and 3.6).
+        The curvature condition makes it the usual choice for quasi-Newton methods.
+
+        Arguments:
+        - c_1: sufficient decrease constant. Default set to 1e-4.
+        - c_2: curvature constant, in (c_1, 1). Default set to 0.9.
+        - initial: first trial step, relative to the direction. Default set to 1.0.
+        - max_step: largest step. Default set to 1e10.
+        - max_iter: max trial steps of the bracketing and of the zoom phases. Default set to 20.
+        """
+        if not 0 < c_1 < c_2 < 1:
+            raise ValueError("The constants must satisfy 0 < c_1 < c_2 < 1")
+        self.c_1 = c_1
+        self.c_2 = c_2
+        self.initial = initial
+        self.max_step = max_step
+        self.max_iter = max_iter
+
+    def search(self, phi, f_0, slope_0):
+        """Returns a step satisfying the strong Wolfe conditions, or the best step found."""
+        t_prev, f_prev, slope_prev = 0.0, f_0, slope_0
+        t = self.initial
+        for k in range(self.max_iter):
+            f, slope = phi.slope(t)
+            if not np.isfinite(f) or f > f_0 + self.c_1 * t * slope_0 or (k > 0 and f >= f_prev):
+                return self._zoom(phi, f_0, slope_0, t_prev, f_prev, slope_prev, t, f, slope)
+            if abs(slope) <= -self.c_2 * slope_0:
+                return t
+            if slope >= 0:
+                return self._zoom(phi, f_0, slope_0, t, f, slope, t_prev, f_prev, slope_prev)
+            t_prev, f_prev, slope_prev = t, f, slope
+            t = min(2 * t, self.max_step)
+        return t_prev
+
+    def _zoom(self, phi, f_0, slope_0, t_lo, f_lo, slope_lo, t_hi, f_hi, slope_hi):
+        """Shrinks the bracket [t_lo, t_hi] until a step satisfies the strong Wolfe conditions.
+        t_lo is the trial with the lowest value satisfying the sufficient decrease condition."""
+        for _ in range(self.max_iter):
+            t = _cubic_minimizer(t_lo, f_lo, slope_lo, t_hi, f_hi, slope_hi)
+            f, slope = phi.slope(t)
+            if not np.isfinite(f) or f > f_0 + self.c_1 * t * slope_0 or f >= f_lo:
+                t_hi, f_hi, slope_hi = t, f, slope
+            else:
+                if abs(slope) <= -self.c_2 * slope_0:
+                    return t
+                if slope * (t_hi - t_lo) >= 0:
+                    t_hi, f_hi, slope_hi = t_lo, f_lo, slope_lo
+                t_lo, f_lo, slope_lo = t, f, slope
+        return t_lo
+
+
+def _cubic_minimizer(t_a, f_a, slope_a, t_b, f_b, slope_b):
+    """Minimizer of the cubic interpolating the values and slopes at t_a and t_b, kept away from
+    the ends of the interval. Falls back to bisection when the cubic has no minimizer."""
+    low, high = min(t_a, t_b), max(t_a, t_b)
+    margin = 0.1 * (high - low)
+    if np.isfinite(f_b) and np.isfinite(slope_b):
+        d_1 = slope_a + slope_b - 3 * (f_a - f_b) / (t_a - t_b)
+        square = d_1 * d_1 - slope_a * slope_b
+        if square >= 0:
+            d_2 = np.sign(t_b - t_a) * np.sqrt(square)
+            denominator = slope_b - slope_a + 2 * d_2
+            if denominator != 0:
+                t = t_b - (t_b - t_a) * (slope_b + d_2 - d_1) / denominator
+                if low + margin <= t <= high - margin:
+                    return t
+    return (t_a + t_b) / 2
@@ -1,12 +1,112 @@
 from .dualNumbers import *
+from .reverseMode import reverse_diff
+from .tracing import TracingError, trace
+from .hyperDual import hvp
+from .lineSearch import LineSearch, ArmijoLineSearch
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import itertools
+import multiprocessing
+import time
 import numpy as np
 
-__all__ = ['Optimizer', 'GradientDescentOptimizer', 'MomentumOptimizer', 'AdaGradOptimizer', 'AdamOptimizer']
+__all__ = ['OptimizerHistory', 'Optimizer', 'GradientDescentOptimizer', 'MomentumOptimizer', 'AdaGradOptimizer', 'AdamOptimizer',
+        'NewtonCGOptimizer', 'LBFGSOptimizer', 'multi_start', 'hyperparameter_grid']
+
+class OptimizerHistory():
+    """Record of one quantity (e.g. the gradient) at the steps of an optimizer.
+
+    history[-1] is always the latest entry, which is all the step logic of the optimizers
+    needs, whatever is kept of the older ones: all of them in a list, the last capacity
+    ones in a ring buffer of preallocated arrays, or none.
+    """
+
+    def __init__(self, capacity=None, stride=1):
+        """
+          Arguments:
+          - capacity: None to keep every entry, an int to keep the last capacity entries in a
+                 ring buffer, or 0 to keep only the latest entry. Default to None.
+          - stride: keep one entry out of stride (the entries 0, stride, 2 stride...). Default to 1.
+        """
+        if stride < 1:
+            raise ValueError("stride must be a positive integer")
+        self.capacity = capacity
+        self.stride = stride
+        self.clear()
+
+    def clear(self):
+        """Removes every entry, the ring buffer is allocated again from the next entry"""
+        self.count = 0
+        self.latest = None
+        self._records = [] if self.capacity is None else None
+        self._start = 0
+        self._size = 0
+
+    def append(self, entry):
+        """Records a new entry"""
+        self.latest = entry
+        keep = self.count % self.stride == 0
+        self.count += 1
+        if not keep or self.capacity == 0:
+            return
+        if self.capacity is None:
+            self._records.append(entry)
+            return
+        entry = np.asarray(entry)
+        if self._records is None:
+            self._records = np.empty((self.capacity, ) + entry.shape, dtype=np.result_type(entry, float))
+        self._records[(self._start + self._size) % self.capacity] = entry
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            # Overwrite the oldest entry
+            self._start = (self._start + 1) % self.capacity
+
+    def __len__(self):
+        """Returns the number of entries kept"""
+        if self.capacity is None:
+            return len(self._records)
+        return self._size
+
+    def __getitem__(self, key):
+        """Returns the latest entry for -1, else the key-th of the entries kept, oldest first"""
+        if key == -1 and self.latest is not None:
+            return self.latest
+        if self.capacity is None:
+            return self._records[key]
+        if not -self._size <= key < self._size:
+            raise IndexError("history index out of range")
+        return self._records[(self._start + key % self._size) % self.capacity]
+
+    def __iter__(self):
+        return (self[k] for k in range(len(self)))
+
+    def stack(self):
+        """Returns the entries kept stacked like np.vstack, or the latest one if none is kept"""
+        if len(self) == 0:
+            return np.vstack([self.latest]) if self.latest is not None else np.zeros((0, 0))
+        if self.capacity is None:
+            return np.vstack(self._records)
+        # Unroll the ring buffer, oldest first
+        end = self._start + self._size
+        records = self._records[self._start:end]
+        if end > self.capacity:
+            records = np.concatenate([records, self._records[:end - self.capacity]])
+        return np.vstack(records)
+
 
 class Optimizer():
     """Class representing an optimizer of a python function."""
+
+    # Whether the steps only combine the latest entries elementwise, so that they apply to
+    # the rows of a batch of problems in optimize_batch
+    _batched = True
+    # Whether the steps only use the latest gradient and never evaluate the function
+    # themselves, so that they apply to the gradients of mini-batches in optimize_stochastic
+    _stochastic = True
     
-    def __init__(self,  learning_rate=0.1, max_iter = 1000, tol = 1e-8):
+    def __init__(self,  learning_rate=0.1, max_iter = 1000, tol = 1e-8, mode='forward', compile=True,
+                 history='full', history_size=1000, history_stride=1, line_search=None, cache=None,
+                 callbacks=None):
         
         """
           Initializes the optimizer parameters
@@ -16,22 +116,177 @@ class Optimizer():
           - learning_rate: The learning rate of the gradient decscent algorith. Default set to 0.1.
           - tol: Tolerence used for convergence criteria. When the function evaluation changes
                  by less than this tolerance the function finishes. Default set to 1e-8
+          - mode: 'forward' to compute gradients with auto_diff, or 'reverse' to compute them
+                 with reverse_diff (one backward sweep whatever the number of variables).
+                 Default set to 'forward'.
+          - compile: If True, the function is traced once into an expression graph which is replayed
+                 at every iteration instead of re-running the function on Variables. Functions which
+                 cannot be traced (e.g. comparing variables) are evaluated as usual. Default set to True.
+          - history: what is kept of the values, gradients and steps returned by get_values,
+                 get_jacobians and get_step_deltas. 'full' keeps every step, 'ring' the last
+                 history_size steps in preallocated arrays, and 'none' only the last step, so that
+                 long runs use a bounded memory. Default set to 'full'.
+          - history_size: number of steps kept with history='ring'. Default set to 1000.
+          - history_stride: keep only every history_stride-th step. Default set to 1.
+          - line_search: LineSearch instance (e.g. ArmijoLineSearch() or WolfeLineSearch()) scaling
+                 the step of each iteration of optimize along its direction. Default set to None,
+                 the steps are taken as they are.
+          - cache: DiffCache instance memoizing the values and gradients of optimize, e.g. shared
+                 by restarted optimizations of the same function. Default set to None.
+          - callbacks: function or list of functions called after each iteration of optimize and
+                 optimize_stochastic with a dict of telemetry: iteration, variables, value,
+                 gradient_norm, step_norm, eval_time (seconds spent evaluating the function and
+                 its derivatives), step_time (the rest of the iteration), time, n_values and
+                 n_gradients (totals so far), and epoch in optimize_stochastic. A callback
+                 returning True stops the optimization after this iteration. See
+                 zapnAD.callbacks for the built-in ones. Default set to None.
           
         """
 
+        if mode not in ('forward', 'reverse'):
+            raise ValueError("mode must be 'forward' or 'reverse'")
+        if history not in ('full', 'ring', 'none'):
+            raise ValueError("history must be 'full', 'ring' or 'none'")
+        capacity = {'full': None, 'ring': history_size, 'none': 0}[history]
+        if line_search is not None and not isinstance(line_search, LineSearch):
+            raise ValueError("line_search must be a LineSearch instance")
+        self.mode = mode
+        self.compile = compile
+        self._compiled = None
         self.max_iter = max_iter
         self.learning_rate = learning_rate
         self.tol = 1e-8
-        self.delta_ws = []
-        self.prev_values = []
-        self.prev_jacobians = []
+        self.delta_ws = OptimizerHistory(capacity, history_stride)
+        self.prev_values = OptimizerHistory(capacity, history_stride)
+        self.prev_jacobians = OptimizerHistory(capacity, history_stride)
+        # Number of problems of optimize_batch, None for optimize
+        self.batch_size = None
+        self.line_search = line_search
+        self.cache = cache
+        if callbacks is None:
+            callbacks = []
+        self.callbacks = list(callbacks) if isinstance(callbacks, (list, tuple)) else [callbacks]
+        if not all(callable(callback) for callback in self.callbacks):
+            raise ValueError("callbacks must be functions")
+        # Whether a callback stopped the last optimization
+        self.stopped = False
+        # Last evaluation of a line search, reused when its point is accepted
+        self._trial = None
+        self._reset_counts()
         
 
     def _step(self):
         """The calculation done at each step of the optimizer"""
         raise NotImplementedError
+
+    def _reset_counts(self):
+        """Resets the counts of function and gradient evaluations, and their time"""
+        self.n_values = 0
+        self.n_gradients = 0
+        self.evaluation_counts = []
+        self.eval_time = 0.0
+        self.stopped = False
+
+    def _clear_history(self):
+        """Removes the values, gradients and steps of the previous optimization"""
+        for history in (self.delta_ws, self.prev_values, self.prev_jacobians):
+            history.clear()
+
+    def _count_iteration(self, counts):
+        """Records the evaluations since counts, the (n_values, n_gradients) before the iteration"""
+        self.evaluation_counts.append((self.n_values - counts[0], self.n_gradients - counts[1]))
+
+    def _notify(self, begin, eval_begin, val, der, delta_w, curr_w, **extra):
+        """Calls the callbacks with the telemetry of the iteration which started at time begin, when
+        the evaluation time was eval_begin. Returns whether a callback requested to stop"""
+        elapsed = time.perf_counter() - begin
+        eval_time = self.eval_time - eval_begin
+        info = dict(iteration=self.i, variables=curr_w, value=float(np.sum(val)),
+                    gradient_norm=float(np.linalg.norm(der)), step_norm=float(np.linalg.norm(delta_w)),
+                    eval_time=eval_time, step_time=max(elapsed - eval_time, 0.0), time=elapsed,
+                    n_values=self.n_values, n_gradients=self.n_gradients, **extra)
+        # Every callback sees every iteration, even after another one requested to stop
+        for callback in self.callbacks:
+            if callback(info):
+                self.stopped = True
+        return self.stopped
+
+    def get_evaluation_counts(self):
+        """Returns array of the number of evaluations of the function alone (first column) and with its
+        gradient (second column) at each iteration, size n_iterations x 2"""
+        return np.array(self.evaluation_counts, dtype=int).reshape(-1, 2)
+
+    def _value(self, function, curr_w):
+        """Returns the value of the function at curr_w, without computing the gradient"""
+        begin = time.perf_counter()
+        if self._compiled is not None:
+            self.n_values += 1
+            val = self._compiled.values(curr_w)
+            self.eval_time += time.perf_counter() - begin
+            return val
+        try:
+            val = np.array([function(list(curr_w))], dtype=float)
+        # Functions which only work on Variables
+        except (TypeError, AttributeError):
+            return self._diff(function, curr_w)[0]
+        self.n_values += 1
+        self.eval_time += time.perf_counter() - begin
+        return val
+
+    def _diff(self, function, curr_w):
+        """Returns the value and the gradient of the function at curr_w"""
+        if self._trial is not None and np.array_equal(self._trial[0], curr_w):
+            val, der = self._trial[1], self._trial[2]
+            self._trial = None
+            return val, der
+        if self.cache is not None:
+            return self.cache.get_or_compute([function], curr_w, lambda: self._evaluate(function, curr_w),
+                                             tag=self.mode)
+        return self._evaluate(function, curr_w)
+
+    def _evaluate(self, function, curr_w):
+        """Computes the value and the gradient of the function at curr_w"""
+        self.n_gradients += 1
+        begin = time.perf_counter()
+        if self._compiled is not None:
+            result = self._compiled(curr_w)
+        elif self.mode == 'reverse':
+            result = reverse_diff([function], curr_w)
+        else:
+            result = auto_diff([function], curr_w)
+        self.eval_time += time.perf_counter() - begin
+        return result
+
+    def _trace(self, function, curr_w, val, der):
+        """Traces the function once. Returns the compiled function if it reproduces the value
+        and gradient val, der computed with Variables at curr_w, None otherwise."""
+        try:
+            traced = trace([function], len(curr_w))
+            traced_val, traced_der = traced(curr_w)
+        # Anything the tracer does not support falls back to Variables
+        except (TracingError, TypeError, AttributeError, ValueError, ArithmeticError):
+            return None
+        if np.allclose(traced_val, val) and np.allclose(traced_der, der):
+            return traced
+        return None
         
         
+    def _search(self, function, curr_w, delta_w):
+        """Scales the step delta_w with the line search"""
+        g = np.reshape(self.prev_jacobians[-1], -1)
+        slope = g @ np.reshape(delta_w, -1)
+        if slope >= 0:
+            # Not a descent direction: search along the steepest descent of the same length
+            g_norm = np.linalg.norm(g)
+            if g_norm == 0:
+                return np.zeros_like(delta_w)
+            delta_w = -(np.linalg.norm(delta_w) / g_norm) * g.reshape(np.shape(delta_w))
+            slope = g @ np.reshape(delta_w, -1)
+        phi = _LineFunction(self, function, curr_w, delta_w)
+        t = self.line_search.search(phi, float(np.sum(self.prev_values[-1])), float(slope))
+        self._trial = phi.trial
+        return t * delta_w
+
     def optimize(self, function, init_variables):
         """Optimizes the given function.
         
@@ -46,50 +301,307 @@ class Optimizer():
 
         curr_w = np.array(init_variables)
         array_shape = curr_w.shape
+        self._clear_history()
         self.delta_ws.append(np.zeros(array_shape))
+        self._reset_counts()
 
-        val, der = auto_diff([function], curr_w)
+        self._compiled = None
+        val, der = self._diff(function, curr_w)
+        if self.compile:
+            self._compiled = self._trace(function, curr_w, val, der)
         self.prev_values.append(val)
         self.prev_jacobians.append(der)
         
+        # Steps evaluating the function themselves (e.g. line searches) need the current point
+        self.batch_size = None
+        self._function = function
+        self.curr_w = curr_w
         self.i = 0
         self.diff  = 1
         
         while self.i < self.max_iter and self.diff > self.tol:
+            counts = (self.n_values, self.n_gradients)
+            begin, eval_begin = time.perf_counter(), self.eval_time
             
             delta_w = self._step().reshape(array_shape)
+            if self.line_search is not None:
+                delta_w = self._search(function, curr_w, delta_w)
             self.delta_ws.append(delta_w)
             
             curr_w = curr_w + delta_w
+            self.curr_w = curr_w
             
-            val, der = auto_diff([function], curr_w)
+            val, der = self._diff(function, curr_w)
             
             self.i += 1
             self.diff = np.abs(val - self.prev_values[-1])
             
             self.prev_values.append(val)
             self.prev_jacobians.append(der)
+            self._count_iteration(counts)
+            if self.callbacks and self._notify(begin, eval_begin, val, der, delta_w, curr_w):
+                break
             
         return val, curr_w
+
+    def _batch_diff(self, function, curr_w):
+        """Returns the values (B, ) and the gradients (B, n) of the function at the rows of curr_w"""
+        if self._compiled is not None:
+            val, der = self._compiled(curr_w)
+        else:
+            val, der = batch_auto_diff([function], curr_w)
+        return val[:, 0], der[:, 0, :]
+
+    def optimize_batch(self, function, init_variables, **hyperparameters):
+        """Optimizes B independent problems in lock-step.
+
+        The iterates are held as a (B, n) array, and the gradients of all the rows are computed
+        at once with the traced function or batch_auto_diff, so the function must accept
+        variables holding arrays (i.e. no comparisons on the variables). The state of the
+        optimizer (e.g. the Adam moments) is kept per row. A row stops moving once its value
+        changes by less than tol, and the iterations stop once every row has converged.
+
+        Arguments:
+        - function: A python function that takes a list of elements to represent variables,
+                and outputs the defined function of those variables.
+        - init_variables: array of shape (B, n), the initial values of each problem. A single
+                initial value of shape (n, ) is repeated for every row of the hyperparameters.
+        - hyperparameters: attributes of the optimizer (e.g. learning_rate, momentum, b_1, b_2)
+                given per row as arrays of size B, e.g. from hyperparameter_grid.
+
+        Returns:
+        values at optimum of shape (B, ), and variables at optimum of shape (B, n)
+        """
+        if not self._batched:
+            raise NotImplementedError(f"{type(self).__name__} does not support batches")
+        if self.line_search is not None:
+            raise ValueError("line searches are only supported by optimize")
+        if self.callbacks:
+            raise ValueError("callbacks are only supported by optimize and optimize_stochastic")
+        curr_w = np.array(init_variables, dtype=float)
+        if curr_w.ndim == 1:
+            size = max([np.size(value) for value in hyperparameters.values()] + [1])
+            curr_w = np.tile(curr_w, (size, 1))
+        B, n = curr_w.shape
+
+        saved = {name: getattr(self, name) for name in hyperparameters}
+        try:
+            for name, value in hyperparameters.items():
+                value = np.asarray(value, dtype=float)
+                assert value.size in (1, B), 'Dimension Mismatch!'
+                # Column vectors broadcast against the (B, n) gradients
+                setattr(self, name, value.reshape(-1, 1) if value.ndim else value)
+            return self._optimize_batch(function, curr_w)
+        finally:
+            for name, value in saved.items():
+                setattr(self, name, value)
+
+    def _optimize_batch(self, function, curr_w):
+        """Lock-step iterations of optimize_batch"""
+        B, n = curr_w.shape
+        self._clear_history()
+        self.delta_ws.append(np.zeros((B, n)))
+
+        self._compiled = None
+        val, der = self._batch_diff(function, curr_w)
+        if self.compile:
+            self._compiled = self._trace(function, curr_w[0], val[:1], der[:1])
+        self.prev_values.append(val)
+        self.prev_jacobians.append(der)
+
+        self.batch_size = B
+        self._function = function
+        self.curr_w = curr_w
+        self.i = 0
+        self.active = np.ones(B, dtype=bool)
+
+        while self.i < self.max_iter and self.active.any():
+
+            delta_w = self._step().reshape(B, n)
+            delta_w[~self.active] = 0
+            self.delta_ws.append(delta_w)
+
+            curr_w = curr_w + delta_w
+            self.curr_w = curr_w
+
+            # Only the rows still moving are evaluated
+            val, der = val.copy(), der.copy()
+            val[self.active], der[self.active] = self._batch_diff(function, curr_w[self.active])
+
+            self.i += 1
+            self.diff = np.abs(val - self.prev_values[-1])
+            self.active &= self.diff > self.tol
+
+            self.prev_values.append(val)
+            self.prev_jacobians.append(der)
+
+        return val, curr_w
+
+    def _stochastic_diff(self, function, curr_w, batch):
+        """Returns the mean value and gradient of the losses of a batch, shaped like auto_diff.
+        The derivatives are seeded as columns of shape (n, 1), which broadcast against arrays
+        of records, so the function can return one loss per record."""
+        n = len(curr_w)
+        begin = time.perf_counter()
+        seeds = np.eye(n)[:, :, None]
+        F = function([Variable(value, seed) for value, seed in zip(curr_w, seeds)], batch)
+        val = np.asarray(F.get_value(), dtype=float)
+        # Derivatives of shape (n, 1) are the same for every record
+        der = np.reshape(F.get_gradient(), (n, -1))
+        self.n_gradients += 1
+        self.eval_time += time.perf_counter() - begin
+        return np.array([val.mean()]), der.mean(axis=1)[None, :]
+
+    def _batches(self, data, batch_size, shuffle, rng, shuffle_window):
+        """Returns an iterator over the batches of one epoch"""
+        if callable(data):
+            if shuffle:
+                raise ValueError("shuffle needs an array or a list of batches")
+            return iter(data())
+        if isinstance(data, np.ndarray):
+            size = len(data) if batch_size is None else batch_size
+            starts = range(0, len(data), size)
+            if not shuffle:
+                return (np.asarray(data[start:start + size]) for start in starts)
+            if isinstance(data, np.memmap):
+                return self._window_batches(data, size, rng, shuffle_window)
+            # Batches of records drawn from a permutation of the rows, new at every epoch
+            rows = rng.permutation(len(data))
+            return (data[rows[start:start + size]] for start in starts)
+        if isinstance(data, (list, tuple)):
+            return iter([data[k] for k in rng.permutation(len(data))] if shuffle else data)
+        if shuffle:
+            raise ValueError("shuffle needs an array or a list of batches")
+        return iter(data)
+
+    def _window_batches(self, data, size, rng, window):
+        """Yields the batches of a memory-mapped array shuffled within windows of window chunks of
+        size contiguous rows: the chunks are read in a random order, and the rows of each window are
+        permuted, so that a batch mixes the records of window random chunks with window chunks in memory"""
+        order = rng.permutation(np.arange(0, len(data), size))
+        for k in range(0, len(order), window):
+            rows = np.concatenate([np.asarray(data[start:start + size]) for start in order[k:k + window]])
+            rows = rows[rng.permutation(len(rows))]
+            for start in range(0, len(rows), size):
+                yield rows[start:start + size]
+
+    def optimize_stochastic(self, function, init_variables, data, epochs=1, batch_size=None, shuffle=False,
+                            seed=None, epoch_tol=None, shuffle_window=8):
+        """Optimizes the mean of a loss over a dataset with one step per mini-batch.
+
+        Arguments:
+        - function: A python function taking a list of elements to represent the variables and a
+                batch of data, and returning the loss of the batch. It may return one loss per
+                record (e.g. v[0] * batch[:, 0] - batch[:, 1]), the loss of the batch is their mean.
+        - init_variables: A list of values to evaluate the function at initially.
+        - data: the batches of each epoch, as an array of records (also memory-mapped, e.g.
+                np.load(path, mmap_mode='r')) split in batches of batch_size rows, a list of
+                batches, or a function returning a new iterator (e.g. a generator) for each epoch.
+                A plain iterator only provides the batches of a single epoch.
+        - epochs: number of passes over the data. Default set to 1.
+        - batch_size: rows per batch of an array of records. Default to the whole array.
+        - shuffle: shuffle the data at every epoch: the batches of an array of records are drawn
+                from a new permutation of its rows, and a list of batches is visited in a random order.
+                Default set to False.
+        - seed: seed of the random shuffling. Default to None.
+        - epoch_tol: stop when the mean loss of an epoch changes by less than epoch_tol.
+                Default to tol.
+        - shuffle_window: a memory-mapped array is shuffled window by window, to read it chunk by
+                chunk instead of row by row: its chunks of batch_size rows are read in a random
+                order, and the rows of every shuffle_window chunks are permuted together. A batch
+                then mixes records of shuffle_window random chunks, instead of the whole array,
+                with shuffle_window batches in memory. Default set to 8.
+
+        The optimization stops after max_iter steps at most, and the gradients are computed in
+        forward mode. The history has one entry per step: the mean loss and gradient of its batch,
+        and the step taken.
+
+        Returns:
+        mean loss of the last epoch, variables at the end of the last epoch
+        """
+        if not self._stochastic:
+            raise NotImplementedError(f"{type(self).__name__} does not support stochastic optimization")
+        if self.line_search is not None:
+            raise ValueError("line searches are only supported by optimize")
+        if self.mode != 'forward':
+            raise ValueError("optimize_stochastic only supports mode='forward'")
+        epoch_tol = self.tol if epoch_tol is None else epoch_tol
+        rng = np.random.default_rng(seed)
+        curr_w = np.array(init_variables, dtype=float)
+        array_shape = curr_w.shape
+        self._clear_history()
+        # The steps (e.g. momentum) start from a zero previous step, which is not a step of the history
+        self.delta_ws.latest = np.zeros(array_shape)
+
+        self.batch_size = None
+        self._compiled = None
+        self._function = None
+        self.curr_w = curr_w
+        self.i = 0
+        self.diff = 1
+        self.epoch_values = []
+        self._reset_counts()
+
+        for epoch in range(epochs):
+            total, n_batches = 0.0, 0
+            for batch in self._batches(data, batch_size, shuffle, rng, shuffle_window):
+                begin, eval_begin = time.perf_counter(), self.eval_time
+                val, der = self._stochastic_diff(function, curr_w, batch)
+                self.prev_values.append(val)
+                self.prev_jacobians.append(der)
+                total += val[0]
+                n_batches += 1
+
+                delta_w = self._step().reshape(array_shape)
+                self.delta_ws.append(delta_w)
+                curr_w = curr_w + delta_w
+                self.curr_w = curr_w
+                self.i += 1
+                if self.callbacks and self._notify(begin, eval_begin, val, der, delta_w, curr_w, epoch=epoch):
+                    break
+                if self.i >= self.max_iter:
+                    break
+
+            if n_batches == 0:
+                raise ValueError(f"No batch in epoch {epoch}, pass a function returning a new iterator per epoch")
+            self.epoch_values.append(total / n_batches)
+            if self.stopped or self.i >= self.max_iter:
+                break
+            if epoch > 0:
+                self.diff = abs(self.epoch_values[-1] - self.epoch_values[-2])
+                if self.diff <= epoch_tol:
+                    break
+
+        return np.array([self.epoch_values[-1]]), curr_w
     
     def get_values(self):
-        """Returns array of the function value at each step, size n_steps x 1"""
-        return np.vstack(self.prev_values)
+        """Returns array of the function value at each step, size n_steps x 1
+        (n_steps x B after optimize_batch)"""
+        return self.prev_values.stack()
     
     def get_jacobians(self):
-        """Returns array of the gradient at each step, size n_steps x n_variables"""
-        return np.vstack(self.prev_jacobians)
+        """Returns array of the gradient at each step, size n_steps x n_variables
+        (n_steps x B x n_variables after optimize_batch)"""
+        return self._unbatch(self.prev_jacobians.stack())
     
     def get_step_deltas(self):
-        """Returns array of the step size at each step, size n_steps x n_variables"""
-        return np.vstack(self.delta_ws)
+        """Returns array of the step size at each step, size n_steps x n_variables
+        (n_steps x B x n_variables after optimize_batch)"""
+        return self._unbatch(self.delta_ws.stack())
+
+    def _unbatch(self, stacked):
+        """Splits the rows of the stacked batches of optimize_batch per step"""
+        if self.batch_size is None:
+            return stacked
+        return stacked.reshape(-1, self.batch_size, stacked.shape[-1])
     
 class GradientDescentOptimizer(Optimizer):
     
-    def __init__(self,  learning_rate=0.1, max_iter = 1000, tol=1e-8):
-        """Initializes parameters for the gradient descent optimizer"""
+    def __init__(self,  learning_rate=0.1, max_iter = 1000, tol=1e-8, **kwargs):
+        """Initializes parameters for the gradient descent optimizer.
+        Other keyword arguments (e.g. mode, compile) are passed to Optimizer."""
         
-        super().__init__(learning_rate=learning_rate, max_iter = max_iter, tol=tol)
+        super().__init__(learning_rate=learning_rate, max_iter = max_iter, tol=tol, **kwargs)
         
     def _step(self):
         """Defines the delta in independent variable values at a given step for gradient descent."""
@@ -98,15 +610,16 @@ class GradientDescentOptimizer(Optimizer):
     
 class MomentumOptimizer(Optimizer):
     
-    def __init__(self, momentum=0.8, learning_rate=0.1, max_iter = 1000, tol=1e-8):  
+    def __init__(self, momentum=0.8, learning_rate=0.1, max_iter = 1000, tol=1e-8, **kwargs):  
         """Initializes parameters for the Momentum optimizer
         
         Arguments:
         - momentum: term to stabilize learning toward the global minimum. Must be set [0,1].
                 Default set to 0.9.
+        - kwargs: other keyword arguments (e.g. mode, compile) passed to Optimizer.
         """ 
         
-        super().__init__(learning_rate=learning_rate, max_iter = max_iter, tol=tol)
+        super().__init__(learning_rate=learning_rate, max_iter = max_iter, tol=tol, **kwargs)
         self.momentum = momentum
         
     def _step(self):
@@ -118,16 +631,17 @@ class MomentumOptimizer(Optimizer):
         
 class AdamOptimizer(Optimizer):
     
-    def __init__(self, b_1=0.9, b_2=0.999, error=10e-8, learning_rate=0.1, max_iter = 1000, tol=1e-8):
+    def __init__(self, b_1=0.9, b_2=0.999, error=10e-8, learning_rate=0.1, max_iter = 1000, tol=1e-8, **kwargs):
         """Initializes parameters for the Adam optimizer
         
         Arguments:
         - b_1: ADAM optimizer hyperparameter controlling first moment term
         - b_2: ADAM optimizer hyperparameter controlling second moment term
         - error: ADAM optimizer hyperparameter preventing division by 0
+        - kwargs: other keyword arguments (e.g. mode, compile) passed to Optimizer.
         """ 
        
-        super().__init__(learning_rate=learning_rate, max_iter = max_iter, tol=tol)
+        super().__init__(learning_rate=learning_rate, max_iter = max_iter, tol=tol, **kwargs)
         self.m, self.v, self.m_corr, self.v_corr = 0, 0, 0, 0
         self.b_1 = b_1
         self.b_2 = b_2
@@ -148,14 +662,15 @@ class AdamOptimizer(Optimizer):
     
 class AdaGradOptimizer(Optimizer):
     
-    def __init__(self, epsilon = 1e-8,  learning_rate=0.1, max_iter = 1000, tol=1e-8):
+    def __init__(self, epsilon = 1e-8,  learning_rate=0.1, max_iter = 1000, tol=1e-8, **kwargs):
         """Initializes parameters for the AdaGrad optimizer
         
         Arguments:
         - epsilon: smoothing term that avoids division by zero. Should be resonably small.
                 default set to 1e-8
+        - kwargs: other keyword arguments (e.g. mode, compile) passed to Optimizer.
         """
-        super().__init__(learning_rate=learning_rate, max_iter = max_iter, tol=tol)
+        super().__init__(learning_rate=learning_rate, max_iter = max_iter, tol=tol, **kwargs)
         self.epsilon = epsilon
         self.gradientsum = 0
         
@@ -167,3 +682,370 @@ class AdaGradOptimizer(Optimizer):
         return -(self.learning_rate * self.prev_jacobians[-1]) / np.sqrt(self.gradientsum + self.epsilon)
         
 
+
+
+class NewtonCGOptimizer(Optimizer):
+
+    _batched = False
+    _stochastic = False
+
+    def __init__(self, radius=1.0, max_radius=100.0, eta=0.15, max_cg_iter=None, max_iter = 1000, tol=1e-8, **kwargs):
+        """Initializes parameters for the Newton-CG trust-region optimizer.
+
+        Each iteration minimizes the quadratic model g.p + p.Hp / 2 within a trust region
+        with the Steihaug conjugate gradient method. The Hessian is never formed: CG only
+        needs Hessian-vector products, computed exactly with hyper-dual numbers (hvp), so
+        the function must be written with the overLoad elementary functions.
+
+        Arguments:
+        - radius: initial trust region radius. Default set to 1.0.
+        - max_radius: largest trust region radius. Default set to 100.0.
+        - eta: a step is accepted when the actual reduction of the function is at least eta
+                times the reduction predicted by the model. Must be set [0, 0.25). Default set to 0.15.
+        - max_cg_iter: max conjugate gradient iterations per step. Default to the number of variables.
+        - kwargs: other keyword arguments (e.g. mode, compile) passed to Optimizer.
+        """
+        super().__init__(max_iter = max_iter, tol=tol, **kwargs)
+        self.radius = radius
+        self.max_radius = max_radius
+        self.eta = eta
+        self.max_cg_iter = max_cg_iter
+
+    def _reset_counts(self):
+        """Resets the counts of evaluations, including the Hessian-vector products"""
+        super()._reset_counts()
+        self.n_hvp = 0
+
+    def _boundary(self, z, d, radius):
+        """Returns the tau >= 0 such that ||z + tau d|| = radius"""
+        a, b, c = d @ d, 2 * (z @ d), z @ z - radius ** 2
+        return (-b + np.sqrt(b * b - 4 * a * c)) / (2 * a)
+
+    def _steihaug(self, g, hess_vec, radius):
+        """Approximately minimizes g.p + p.Hp / 2 subject to ||p|| <= radius with conjugate gradient.
+        Stops on the boundary of the trust region, or along a direction of negative curvature.
+        Returns the step p and p.Hp, from the products of the iterations (the residual r is g + Hz)."""
+        z = np.zeros_like(g)
+        r = g
+        d = -g
+        g_norm = np.linalg.norm(g)
+        # Forcing term giving superlinear convergence
+        eps = min(0.5, np.sqrt(g_norm)) * g_norm
+        max_cg_iter = len(g) if self.max_cg_iter is None else self.max_cg_iter
+        for _ in range(max_cg_iter):
+            Hd = hess_vec(d)
+            dHd = d @ Hd
+            if dHd <= 0:
+                return self._on_boundary(g, z, r, d, Hd, radius)
+            alpha = (r @ r) / dHd
+            z_next = z + alpha * d
+            if np.linalg.norm(z_next) >= radius:
+                return self._on_boundary(g, z, r, d, Hd, radius)
+            r_next = r + alpha * Hd
+            if np.linalg.norm(r_next) < eps:
+                return z_next, z_next @ (r_next - g)
+            d = -r_next + ((r_next @ r_next) / (r @ r)) * d
+            z, r = z_next, r_next
+        return z, z @ (r - g)
+
+    def _on_boundary(self, g, z, r, d, Hd, radius):
+        """Returns the step p = z + tau d on the boundary of the trust region, and p.Hp"""
+        tau = self._boundary(z, d, radius)
+        p = z + tau * d
+        return p, p @ (r - g + tau * Hd)
+
+    def _step(self):
+        """Newton-CG computes its steps in optimize, they depend on the function."""
+        raise NotImplementedError
+
+    def optimize(self, function, init_variables):
+        """Optimizes the given function.
+
+        Arguments:
+        - function: A python function that takes a list of elements to represent variables,
+                and outputs the defined function of those variables.
+        - init_variables: A list of values to evaluate the function at initially.
+
+        Returns:
+        value at optimum
+        """
+        curr_w = np.array(init_variables, dtype=float)
+        array_shape = curr_w.shape
+        self._clear_history()
+        self.delta_ws.append(np.zeros(array_shape))
+        self._reset_counts()
+
+        self._compiled = None
+        val, der = self._diff(function, curr_w)
+        if self.compile:
+            self._compiled = self._trace(function, curr_w, val, der)
+        self.prev_values.append(val)
+        self.prev_jacobians.append(der)
+
+        def hess_vec(d):
+            self.n_hvp += 1
+            begin = time.perf_counter()
+            product = hvp(function, curr_w, d)[2]
+            self.eval_time += time.perf_counter() - begin
+            return product
+
+        radius = self.radius
+        self.i = 0
+        self.diff = 1
+
+        while self.i < self.max_iter and self.diff > self.tol:
+            counts = (self.n_values, self.n_gradients)
+            begin, eval_begin = time.perf_counter(), self.eval_time
+            g = np.reshape(der, -1)
+            if np.linalg.norm(g) <= self.tol:
+                break
+
+            p, pHp = self._steihaug(g, hess_vec, radius)
+            predicted = -(g @ p + 0.5 * pHp)
+            new_val, new_der = self._diff(function, curr_w + p)
+            actual = np.sum(val - new_val)
+            rho = actual / predicted if predicted > 0 else -1.0
+
+            # Trust region update
+            p_norm = np.linalg.norm(p)
+            if rho < 0.25:
+                radius = 0.25 * p_norm
+            elif rho > 0.75 and np.isclose(p_norm, radius):
+                radius = min(2 * radius, self.max_radius)
+
+            self.i += 1
+            if rho > self.eta:
+                curr_w = curr_w + p
+                self.diff = np.abs(new_val - val)
+                val, der = new_val, new_der
+                self.delta_ws.append(p.reshape(array_shape))
+            else:
+                self.delta_ws.append(np.zeros(array_shape))
+                # A vanishing trust region means no further progress can be made
+                if radius <= self.tol * (1 + np.linalg.norm(curr_w)):
+                    break
+            self.prev_values.append(val)
+            self.prev_jacobians.append(der)
+            self._count_iteration(counts)
+            if self.callbacks and self._notify(begin, eval_begin, val, der, self.delta_ws[-1], curr_w):
+                break
+
+        return val, curr_w
+
+
+class LBFGSOptimizer(Optimizer):
+
+    _batched = False
+    _stochastic = False
+
+    def __init__(self, memory=10, line_search=None, max_iter = 1000, tol=1e-8, **kwargs):
+        """Initializes parameters for the limited-memory BFGS optimizer.
+
+        The search direction approximates the Newton direction with the two-loop recursion over
+        the last (s, y) pairs of steps and gradient changes, kept in preallocated arrays of
+        shape (memory, n_variables). The step along the direction is chosen by a line search.
+
+        Arguments:
+        - memory: number of (s, y) pairs kept. Default set to 10.
+        - line_search: LineSearch instance. Default set to ArmijoLineSearch(), WolfeLineSearch()
+                also guarantees the curvature of the pairs.
+        - kwargs: other keyword arguments (e.g. mode, compile) passed to Optimizer.
+        """
+        if line_search is None:
+            line_search = ArmijoLineSearch()
+        super().__init__(max_iter = max_iter, tol=tol, line_search=line_search, **kwargs)
+        self.memory = memory
+        self._reset_pairs()
+
+    def _reset_pairs(self):
+        """Discards the curvature pairs, allocated again at the first step for the number of variables"""
+        self.S = None
+        self.Y = None
+        self.rho = np.zeros(self.memory)
+        self.n_pairs = 0
+        self._newest = -1
+        self._prev_grad = None
+
+    def optimize(self, function, init_variables):
+        """Optimizes the given function, see Optimizer.optimize. The curvature pairs of a previous
+        optimization, of another function or number of variables, are discarded first."""
+        self._reset_pairs()
+        return super().optimize(function, init_variables)
+
+    def _update(self, s, y):
+        """Stores the pair (s, y) in place of the oldest one"""
+        sy = s @ y
+        # Pairs without positive curvature would break the positive definiteness
+        if sy <= 1e-12 * np.linalg.norm(s) * np.linalg.norm(y):
+            return
+        self._newest = (self._newest + 1) % self.memory
+        self.S[self._newest] = s
+        self.Y[self._newest] = y
+        self.rho[self._newest] = 1 / sy
+        self.n_pairs = min(self.n_pairs + 1, self.memory)
+
+    def _direction(self, g):
+        """Two-loop recursion: returns -H g for the L-BFGS inverse Hessian approximation H"""
+        if self.n_pairs == 0:
+            return -g
+        order = [(self._newest - k) % self.memory for k in range(self.n_pairs)]
+        q = g.copy()
+        alpha = np.zeros(self.memory)
+        for k in order:
+            alpha[k] = self.rho[k] * (self.S[k] @ q)
+            q -= alpha[k] * self.Y[k]
+        y = self.Y[self._newest]
+        r = q * ((self.S[self._newest] @ y) / (y @ y))
+        for k in reversed(order):
+            beta = self.rho[k] * (self.Y[k] @ r)
+            r += self.S[k] * (alpha[k] - beta)
+        return -r
+
+    def _step(self):
+        """Defines the delta in independent variable values at a given step for L-BFGS."""
+        g = np.reshape(self.prev_jacobians[-1], -1).astype(float)
+        if self.S is None:
+            self.S = np.zeros((self.memory, len(g)))
+            self.Y = np.zeros((self.memory, len(g)))
+        if self._prev_grad is not None:
+            self._update(np.reshape(self.delta_ws[-1], -1), g - self._prev_grad)
+        self._prev_grad = g
+
+        d = self._direction(g)
+        if g @ d >= 0:
+            # Not a descent direction: restart from steepest descent
+            self.n_pairs = 0
+            d = -g
+        # The line search scales the direction, which has no natural length while there is
+        # no curvature information
+        if self.n_pairs == 0:
+            d = d * min(1.0, 1 / max(np.linalg.norm(g), 1e-12))
+        return d
+
+
+def hyperparameter_grid(**values):
+    """Every combination of the given hyperparameter values, one per row, for optimize_batch.
+
+    Arguments:
+    - values: list of values of each hyperparameter, e.g. learning_rate=[0.01, 0.1].
+
+    Returns:
+    dict of the hyperparameter name to an array of size the number of combinations.
+    """
+    names = list(values)
+    rows = list(itertools.product(*(values[name] for name in names)))
+    return {name: np.array([row[k] for row in rows], dtype=float) for k, name in enumerate(names)}
+
+
+# Problem of the worker processes of multi_start, and the event set when the target is
+# reached, set by _init_worker
+_worker_problem = None
+_worker_stop = None
+
+def _init_worker(optimizer_class, function, hyperparameters, stop):
+    """Stores the problem in the worker process, so it is sent once instead of once per start"""
+    global _worker_problem, _worker_stop
+    _worker_problem = (optimizer_class, function, hyperparameters)
+    _worker_stop = stop
+
+
+def _stop_requested(info):
+    """Callback stopping the running starts once multi_start has reached its target"""
+    return _worker_stop.is_set()
+
+
+def _run_start(index, init_variables):
+    """Runs one start in a worker process and returns its summary"""
+    optimizer_class, function, hyperparameters = _worker_problem
+    summary = {'start': index, 'init_variables': np.asarray(init_variables)}
+    begin = time.perf_counter()
+    try:
+        # Only the last step is needed, do not send the history back
+        opt = optimizer_class(**dict(hyperparameters, history='none'))
+        opt.callbacks.append(_stop_requested)
+        val, curr_w = opt.optimize(function, init_variables)
+        summary.update(value=float(np.sum(val)), variables=curr_w, n_iter=opt.i,
+                       converged=bool(np.all(opt.diff <= opt.tol)), error=None)
+    # A failing start (e.g. leaving the domain of the function) does not stop the others
+    except Exception as error:
+        summary.update(value=np.inf, variables=None, n_iter=0, converged=False, error=repr(error))
+    summary['time'] = time.perf_counter() - begin
+    return summary
+
+
+def multi_start(optimizer_class, function, starts, target=None, n_workers=None, callback=None, **hyperparameters):
+    """Optimizes a function from many initial values in parallel over a pool of processes.
+
+    The starts are independent: each one runs optimizer_class(**hyperparameters).optimize
+    in a worker process, and the results are collected as they finish. On platforms that
+    fork, the function does not need to be picklable (e.g. a lambda).
+
+    Arguments:
+    - optimizer_class: an Optimizer subclass, e.g. AdamOptimizer.
+    - function: A python function that takes a list of elements to represent variables,
+            and outputs the defined function of those variables.
+    - starts: list or array of shape (n_starts, n_variables), the initial values of each start.
+    - target: stop as soon as a start reaches a value <= target. The pending starts are cancelled
+            and the running ones stop at their next iteration. Default to None, run every start.
+    - n_workers: number of processes. Default to the number of cores.
+    - callback: function called with the summary of each start as soon as it finishes.
+    - hyperparameters: keyword arguments of optimizer_class (e.g. learning_rate, mode).
+
+    Returns:
+    best value, variables at the best value, and the list of the summaries of the finished
+    starts in order of completion. A summary is a dict with keys start (index in starts),
+    init_variables, value, variables, n_iter, converged, error (None or the error raised by
+    the start) and time (in seconds).
+    """
+    starts = [np.asarray(init, dtype=float) for init in starts]
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    stop = context.Event()
+    executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=context, initializer=_init_worker,
+                                   initargs=(optimizer_class, function, hyperparameters, stop))
+    summaries = []
+    futures = []
+    try:
+        futures = [executor.submit(_run_start, index, init) for index, init in enumerate(starts)]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            if callback is not None:
+                callback(summary)
+            if target is not None and summary['value'] <= target:
+                break
+    finally:
+        # Cancel the starts which have not begun, and stop the running ones without waiting for them
+        stop.set()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+    if not summaries:
+        return np.inf, None, summaries
+    # Diverged starts (nan values) are never the best
+    best = min(summaries, key=lambda summary: np.nan_to_num(summary['value'], nan=np.inf))
+    return best['value'], best['variables'], summaries
+
+
+class _LineFunction():
+    """The function along a search direction, phi(t) = f(w + t d), for the line searches"""
+
+    def __init__(self, optimizer, function, curr_w, direction):
+        self.optimizer = optimizer
+        self.function = function
+        self.curr_w = curr_w
+        self.direction = direction
+        # Last evaluation with the gradient, as (point, value, gradient)
+        self.trial = None
+
+    def value(self, t):
+        """Returns f(w + t d)"""
+        return float(np.sum(self.optimizer._value(self.function, self.curr_w + t * self.direction)))
+
+    def slope(self, t):
+        """Returns f(w + t d) and its derivative in t"""
+        w = self.curr_w + t * self.direction
+        val, der = self.optimizer._diff(self.function, w)
+        self.trial = (w, val, der)
+        return float(np.sum(val)), float(np.reshape(der, -1) @ np.reshape(self.direction, -1))
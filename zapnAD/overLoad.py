@@ -1,5 +1,5 @@
 import numpy as np
-from .dualNumbers import Variable, Variables
+from .dualNumbers import Variable, Variables, _UFUNCS
 
 __all__ = ['sin', 'cos','tan','arcsin', 'arccos', 'arctan', 'exp', 'log', 'log2',
         'log10', 'sqrt', 'sinh', 'cosh', 'tanh']
@@ -15,7 +15,7 @@ def sin(x):
     try:
         val = np.sin(x.val)
         der = np.cos(x.val) * x.der
-        return Variable(val, der)
+        return type(x)(val, der)
 
     except AttributeError:
         return np.sin(x)
@@ -31,7 +31,7 @@ def cos(x):
     try:
         val = np.cos(x.val)
         der = -1 * np.sin(x.val) * x.der
-        return Variable(val, der)
+        return type(x)(val, der)
 
     except AttributeError:
         return np.cos(x)
@@ -47,7 +47,7 @@ def tan(x):
     try:
         val = np.tan(x.val)
         der = x.der / np.cos(x.val)**2
-        return Variable(val, der)
+        return type(x)(val, der)
 
     except AttributeError:
         return np.tan(x)
@@ -63,7 +63,7 @@ def arcsin(x):
     try:
         val = np.arcsin(x.val)
         der = x.der / sqrt(1 - x.val**2)
-        return Variable(val, der)
+        return type(x)(val, der)
 
     except AttributeError:
         return np.arcsin(x)
@@ -80,7 +80,7 @@ def arccos(x):
     try:
         val = np.arccos(x.val)
         der = -1 * x.der / sqrt(1.0 - x.val**2)
-        return Variable(val, der)
+        return type(x)(val, der)
 
     except AttributeError:
         return np.arccos(x)
@@ -98,7 +98,7 @@ def arctan(x):
     try:
         val = np.arctan(x.val)
         der = x.der / (1.0 + x.val**2)
-        return Variable(val, der)
+        return type(x)(val, der)
 
     except AttributeError:
         return np.arctan(x)
@@ -120,7 +120,7 @@ def exp(x, base=None):
         try:
             val = np.exp(x.val)
             der = np.exp(x.val) * x.der
-            return Variable(val, der)
+            return type(x)(val, der)
 
         except AttributeError:
             return np.exp(x)
@@ -128,7 +128,7 @@ def exp(x, base=None):
         try: 
             val = base**x.val 
             der = (x.val* base**(x.val - 1)) * x.der 
-            return Variable(val, der)
+            return type(x)(val, der)
 
         except AttributeError:
             return base**x
@@ -150,7 +150,7 @@ def log(x, base=None):
         try:
             val = np.log(x.val)
             der = (1/x.val) * x.der
-            return Variable(val, der)
+            return type(x)(val, der)
 
         except AttributeError:
             return np.log(x)
@@ -161,7 +161,7 @@ def log(x, base=None):
         try: 
             val = np.log(x.val) / np.log(base)
             der = (1/(x.val * np.log(base))) * x.der
-            return Variable(val, der)
+            return type(x)(val, der)
 
         except AttributeError:
             return np.log(x) / np.log(base)
@@ -178,7 +178,7 @@ def log2(x):
     try:
         val = np.log2(x.val)
         der = (1/(x.val * np.log(2))) * x.der
-        return Variable(val, der)
+        return type(x)(val, der)
     # For some reason it doesn't like except AttributeErrors here    
     except AttributeError:
         return np.log2(x)
@@ -196,7 +196,7 @@ def log10(x):
     try:
         val = np.log10(x.val)
         der = (1/(x.val * np.log(10))) * x.der
-        return Variable(val, der)
+        return type(x)(val, der)
 
     except AttributeError:
         return np.log10(x)
@@ -213,9 +213,12 @@ def sqrt(x):
         val = x.val
     
     except AttributeError:
+        # Other number types (e.g. traced values) provide their own sqrt method
+        if not isinstance(x, (int, float, np.number, np.ndarray)):
+            return np.sqrt(x)
         val = x
         
-    if val >= 0:
+    if np.all(val >= 0):
         return x**0.5
 
     else:
@@ -232,7 +235,7 @@ def sinh(x):
     try:
         val = np.sinh(x.val)
         der = np.cosh(x.val) * x.der
-        return Variable(val, der)
+        return type(x)(val, der)
 
     except AttributeError:
         return np.sinh(x)
@@ -248,7 +251,7 @@ def cosh(x):
     try:
         val = np.cosh(x.val)
         der = np.sinh(x.val) * x.der
-        return Variable(val, der)
+        return type(x)(val, der)
 
     except AttributeError:
         return np.cosh(x)
@@ -264,7 +267,19 @@ def tanh(x):
     try:
         val = np.tanh(x.val)
         der = (1 - (np.tanh(x.val))**2) * x.der 
-        return Variable(val, der)
+        return type(x)(val, der)
 
     except AttributeError:
         return np.tanh(x)
+
+
+# Route the numpy ufuncs applied to Variables (np.sin(x)) to the functions above
+_UFUNCS.update({np.sin: sin, np.cos: cos, np.tan: tan, np.arcsin: arcsin, np.arccos: arccos,
+                np.arctan: arctan, np.exp: exp, np.log: log, np.log2: log2, np.log10: log10,
+                np.sqrt: sqrt, np.sinh: sinh, np.cosh: cosh, np.tanh: tanh,
+                np.square: lambda x: x * x, np.reciprocal: lambda x: 1 / x})
+
+# numpy ufuncs on object arrays of Variables call the method of the same name on each element
+for _name in ['sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan', 'exp', 'log', 'log2', 'log10',
+              'sqrt', 'sinh', 'cosh', 'tanh']:
+    setattr(Variable, _name, globals()[_name])
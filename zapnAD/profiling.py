@@ -0,0 +1,214 @@
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+from . import overLoad
+from .dualNumbers import Variable
+from .tensorVariable import TensorVariable
+
+__all__ = ['Profiler']
+
+# Directory of the package, to find the first frame of user code above an operation
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Variable methods counted as operations
+_OPERATIONS = ['__add__', '__radd__', '__sub__', '__rsub__', '__mul__', '__rmul__', '__truediv__',
+               '__rtruediv__', '__neg__', '__pow__', '__matmul__', '__rmatmul__', '__getitem__',
+               'sum', 'mean', 'reshape']
+
+def _instrumented_codes():
+    '''
+    Returns:
+        - dict mapping the code objects of the Variable operators and of the overLoad
+        functions to their names, e.g. Variable.__mul__ or overLoad.sin
+    '''
+    codes = {}
+    for cls in (Variable, TensorVariable):
+        for name in _OPERATIONS:
+            method = vars(cls).get(name)
+            # Reflected operators aliasing the direct ones (__radd__ = __add__) keep the direct name
+            if callable(method):
+                codes.setdefault(method.__code__, f'{cls.__name__}.{name}')
+    for name in overLoad.__all__:
+        codes[getattr(overLoad, name).__code__] = f'overLoad.{name}'
+    return codes
+
+
+def _derivative_size(result):
+    '''
+    Returns the bytes allocated for the derivative of the result of an operation,
+    and its tangent width (the number of stored partial derivatives per value).
+    Broadcast views of another derivative allocate nothing.
+    '''
+    der = getattr(result, 'der', None)
+    if isinstance(der, np.ndarray):
+        return (der.nbytes if der.flags.owndata else 0), (der.shape[0] if der.ndim else 1)
+    nnz = getattr(der, 'nnz', None)
+    if nnz is not None:
+        return 8 * nnz, nnz
+    return 0, 0
+
+
+def _call_site(frame):
+    '''
+    Returns:
+        - str, file:line (function) of the first frame outside of the package
+    '''
+    while frame is not None and os.path.dirname(os.path.abspath(frame.f_code.co_filename)) == _PACKAGE_DIR:
+        frame = frame.f_back
+    if frame is None:
+        return '<unknown>'
+    return f'{frame.f_code.co_filename}:{frame.f_lineno} ({frame.f_code.co_name})'
+
+
+class Profiler:
+    '''
+    Opt-in instrumentation of the Variable operators and of the overLoad functions.
+
+    While active (between start and stop, or in a with block), every operation on Variables
+    is counted with the time spent in it, the bytes allocated for the derivative of its
+    result and its tangent width, and attributed to the line of user code performing it.
+    The operations are observed through a profile hook (sys.setprofile) installed only
+    while active, so nothing is added to the operators when no Profiler is running.
+    Only the thread starting the Profiler is observed. Traced functions (compile=True in
+    the optimizers) evaluate without Variables, so they are not observed either.
+
+    Times are inclusive: overLoad.sqrt calls Variable.__pow__, whose time is counted in
+    both. The self times exclude the nested operations.
+    '''
+
+    def __init__(self, record_events=False):
+        '''
+        Input:
+            - record_events: bool, keep one event per operation for export_chrome_trace.
+            Default to False, only the totals are kept.
+        '''
+        self.record_events = record_events
+        self.stats = {}
+        self.events = []
+        self._codes = _instrumented_codes()
+        self._stack = []
+        self._previous = None
+        self._origin = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        '''
+        Starts observing the operations, keeping the counts of the previous runs.
+        '''
+        self._previous = sys.getprofile()
+        self._origin = time.perf_counter()
+        self._thread = threading.get_ident()
+        sys.setprofile(self._hook)
+
+    def stop(self):
+        '''
+        Stops observing the operations and restores the previous profile hook.
+        '''
+        sys.setprofile(self._previous)
+        self._stack = []
+
+    def clear(self):
+        '''
+        Removes the counts and events.
+        '''
+        self.stats = {}
+        self.events = []
+
+    def _hook(self, frame, event, arg):
+        '''
+        Profile hook, called on every Python function call and return while active.
+        '''
+        if self._previous is not None:
+            self._previous(frame, event, arg)
+        if event == 'call':
+            name = self._codes.get(frame.f_code)
+            if name is not None:
+                self._stack.append([frame, name, time.perf_counter(), 0.0])
+        elif event == 'return' and self._stack and self._stack[-1][0] is frame:
+            _, name, begin, nested = self._stack.pop()
+            elapsed = time.perf_counter() - begin
+            if self._stack:
+                self._stack[-1][3] += elapsed
+            nbytes, width = _derivative_size(arg)
+            site = _call_site(frame.f_back)
+            for key in ((name, None), (None, site)):
+                entry = self.stats.setdefault(key, [0, 0.0, 0.0, 0, 0])
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] += elapsed - nested
+                entry[3] += nbytes
+                entry[4] = max(entry[4], width)
+            if self.record_events:
+                self.events.append({'name': name, 'cat': 'zapnAD', 'ph': 'X', 'pid': os.getpid(),
+                                    'tid': self._thread, 'ts': (begin - self._origin) * 1e6,
+                                    'dur': elapsed * 1e6,
+                                    'args': {'bytes': nbytes, 'width': width, 'call_site': site}})
+
+    def _table(self, index):
+        '''
+        Returns:
+            - dict mapping names (index 0) or call sites (index 1) to their totals
+        '''
+        fields = ('calls', 'time', 'self_time', 'bytes', 'max_width')
+        return {key[index]: dict(zip(fields, entry)) for key, entry in self.stats.items()
+                if key[index] is not None}
+
+    def by_operation(self):
+        '''
+        Returns:
+            - dict mapping the operation names (e.g. overLoad.sin) to dicts of their number
+            of calls, total and self time in seconds, derivative bytes allocated and largest
+            tangent width
+        '''
+        return self._table(0)
+
+    def by_call_site(self):
+        '''
+        Returns:
+            - dict mapping the user code lines (file:line (function)) to dicts of the totals
+            of the operations they performed, as in by_operation
+        '''
+        return self._table(1)
+
+    def report(self, limit=20):
+        '''
+        Returns the breakdowns per operation and per call site as text, by decreasing self time.
+
+        Input:
+            - limit: int, number of rows of each breakdown. Default to 20.
+
+        Returns:
+            - str
+        '''
+        lines = []
+        for title, table in (('operation', self.by_operation()), ('call site', self.by_call_site())):
+            rows = sorted(table.items(), key=lambda item: -item[1]['self_time'])[:limit]
+            lines.append(f"{title:<50} {'calls':>9} {'time (ms)':>10} {'self (ms)':>10} "
+                         f"{'KiB':>10} {'width':>6}")
+            for key, row in rows:
+                lines.append(f"{key[-50:]:<50} {row['calls']:>9} {row['time'] * 1e3:>10.3f} "
+                             f"{row['self_time'] * 1e3:>10.3f} {row['bytes'] / 1024:>10.1f} {row['max_width']:>6}")
+            lines.append('')
+        return '\n'.join(lines)
+
+    def export_chrome_trace(self, path):
+        '''
+        Writes the recorded events in the Chrome trace event format, which chrome://tracing,
+        Perfetto and speedscope load. Needs record_events=True.
+
+        Input:
+            - path: str, path of the JSON file
+        '''
+        if not self.record_events:
+            raise ValueError("No events recorded, create the Profiler with record_events=True")
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, file)
@@ -0,0 +1,220 @@
+import numpy as np
+from .dualNumbers import Variable, Functions
+
+__all__ = ['Tape', 'reverse_diff', 'vjp']
+
+class TapeNode:
+    '''
+    Tangent of a Variable in reverse mode.
+
+    Instead of carrying a dense derivative vector, the der attribute of a Variable
+    is a TapeNode: a handle to an entry of a Tape. Every arithmetic operation the
+    forward mode rules apply to the derivative (scaling by a partial derivative,
+    adding two derivatives) is recorded on the tape as a weighted edge to the parent
+    entries. The tape is then swept backwards to accumulate the adjoints.
+
+    Because only these linear operations are needed, the existing Variable operators
+    and the overLoad elementary functions work unchanged in reverse mode.
+    '''
+    # Make numpy defer to our reflected operators (e.g. np.float64 * TapeNode)
+    __array_ufunc__ = None
+
+    def __init__(self, tape, parents):
+        '''
+        Input:
+            - tape: Tape instance the node is recorded on
+            - parents: tuple of (index, weight) pairs, the local partial derivatives
+        '''
+        self.tape = tape
+        self.index = tape.record(parents)
+
+    def __mul__(self, other):
+        '''
+        Records the scaling of the tangent by a real number.
+
+        Input:
+            - other: int or float
+
+        Returns:
+            - TapeNode instance
+        '''
+        return TapeNode(self.tape, ((self.index, other),))
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        '''
+        Records the division of the tangent by a real number.
+
+        Input:
+            - other: int or float
+
+        Returns:
+            - TapeNode instance
+        '''
+        return TapeNode(self.tape, ((self.index, 1 / other),))
+
+    def __add__(self, other):
+        '''
+        Records the sum of two tangents.
+
+        Input:
+            - other: TapeNode instance
+
+        Returns:
+            - TapeNode instance
+        '''
+        return TapeNode(self.tape, ((self.index, 1.0), (other.index, 1.0)))
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        '''
+        Records the difference of two tangents.
+
+        Input:
+            - other: TapeNode instance
+
+        Returns:
+            - TapeNode instance
+        '''
+        return TapeNode(self.tape, ((self.index, 1.0), (other.index, -1.0)))
+
+    def __neg__(self):
+        return TapeNode(self.tape, ((self.index, -1.0),))
+
+
+class Tape:
+    def __init__(self):
+        '''
+        Attributes:
+            - self.parents: list, the (index, weight) pairs of every recorded node
+            - self.n_inputs: int, number of input variables (the first recorded nodes)
+        '''
+        self.parents = []
+        self.n_inputs = 0
+
+    def __len__(self):
+        '''
+        Returns:
+            - int, number of recorded nodes
+        '''
+        return len(self.parents)
+
+    def record(self, parents):
+        '''
+        Appends a node to the tape.
+
+        Input:
+            - parents: tuple of (index, weight) pairs
+
+        Returns:
+            - int, index of the new node
+        '''
+        self.parents.append(parents)
+        return len(self.parents) - 1
+
+    def variables(self, values):
+        '''
+        Creates the input variables, whose tangents are the first nodes of the tape.
+
+        Input:
+            - values: list of int or float, the input values
+
+        Returns:
+            - list of Variable instances
+        '''
+        assert len(self.parents) == 0, 'Input variables must be created on an empty tape'
+        self.n_inputs = len(values)
+        return [Variable(value, TapeNode(self, ())) for value in values]
+
+    def backward(self, outputs, adjoints=None):
+        '''
+        Sweeps the tape backwards and accumulates the adjoints of the inputs.
+
+        Input:
+            - outputs: list of Variable instances recorded on this tape
+            - adjoints: list of int, float or ndarray, the seed adjoint of each output.
+            Default to 1 for every output.
+
+        Returns:
+            - ndarray of shape (n_inputs, ) + shape of the seeds, the input adjoints
+        '''
+        if adjoints is None:
+            adjoints = [1.0] * len(outputs)
+        assert len(adjoints) == len(outputs), 'Dimension Mismatch!'
+
+        # None marks nodes that the outputs do not depend on
+        adjoint = [None] * len(self.parents)
+        last = 0
+        for F, seed in zip(outputs, adjoints):
+            i = F.der.index
+            seed = np.asarray(seed, dtype=float)
+            adjoint[i] = seed if adjoint[i] is None else adjoint[i] + seed
+            last = max(last, i)
+
+        # Nodes are recorded after their parents, so a single reverse sweep is enough
+        parents = self.parents
+        for i in range(last, self.n_inputs - 1, -1):
+            a = adjoint[i]
+            if a is None:
+                continue
+            for j, w in parents[i]:
+                adjoint[j] = w * a if adjoint[j] is None else adjoint[j] + w * a
+
+        shape = np.shape(adjoints[0]) if len(adjoints) else ()
+        result = np.zeros((self.n_inputs, ) + shape)
+        for i in range(self.n_inputs):
+            if adjoint[i] is not None:
+                result[i] = adjoint[i]
+        return result
+
+
+def reverse_diff(functions, variable_values):
+    '''
+        Differentiate a list of functions in respect to a list of values with reverse mode.
+        The functions are evaluated once, and one backward sweep of the tape is done per
+        function, so the cost of a gradient does not grow with the number of variables.
+
+        Input:
+            - functions: A list of python functions to represent vector functions.
+            Each function takes a list of elements to represent variables, and outputs the defined function of those variables.
+            - variable_values: A list of integers or floats to represent each variable value.
+
+        Returns:
+            A tuple which contains an numpy array of each function evaluated at the specified values,
+            and the Jacobian of the vector function evaluated at variable values.
+    '''
+    tape = Tape()
+    variables = tape.variables(variable_values)
+    function = Functions(Fs = [f(variables) for f in functions])
+
+    jacobian = np.vstack([tape.backward([F]) for F in function.Fs])
+    return function.values(), jacobian
+
+
+def vjp(functions, variable_values, cotangent):
+    '''
+        Vector-Jacobian product u^T J, without forming the Jacobian.
+        The outputs are seeded with the cotangent and the tape is swept backwards once,
+        whatever the number of outputs.
+
+        Input:
+            - functions: A list of python functions to represent vector functions.
+            Each function takes a list of elements to represent variables, and outputs the defined function of those variables.
+            - variable_values: A list of integers or floats to represent each variable value.
+            - cotangent: ndarray of shape (m, ), or (m, k) for k vectors at once.
+
+        Returns:
+            A tuple which contains an numpy array of each function evaluated at the specified values,
+            and the product of shape (n, ), or (n, k) with one column per vector.
+    '''
+    cotangent = np.asarray(cotangent, dtype=float)
+    assert len(cotangent) == len(functions), 'Dimension Mismatch!'
+    tape = Tape()
+    variables = tape.variables(variable_values)
+    function = Functions(Fs = [f(variables) for f in functions])
+
+    return function.values(), tape.backward(function.Fs, list(cotangent))
@@ -0,0 +1,121 @@
+import numpy as np
+
+__all__ = ['SparseDerivative']
+
+class SparseDerivative:
+    '''
+    Sparse representation of the derivative of a Variable.
+
+    Only the non-zero partial derivatives are stored, in a dict keyed by input index.
+    It supports the arithmetic the Variable operators and the overLoad elementary
+    functions apply to derivatives, so it can be used in place of a dense ndarray
+    for Variable.der. Adding two sparse derivatives merges their supports, so the
+    cost of an operation is proportional to the number of non-zeros instead of the
+    number of inputs.
+    '''
+    # Make numpy defer to our reflected operators (e.g. np.float64 * SparseDerivative)
+    __array_ufunc__ = None
+
+    def __init__(self, entries, size):
+        '''
+        Input:
+            - entries: dict mapping input index (int) to partial derivative (float)
+            - size: int, number of input variables
+        '''
+        self.entries = entries
+        self.size = size
+
+    def __str__(self):
+        '''
+        Returns:
+            - str, String representation of the derivative
+        '''
+        return str(self.toarray())
+
+    def __len__(self):
+        '''
+        Returns:
+            - int, number of input variables
+        '''
+        return self.size
+
+    @property
+    def nnz(self):
+        '''
+        Returns:
+            - int, number of stored partial derivatives
+        '''
+        return len(self.entries)
+
+    def toarray(self):
+        '''
+        Returns:
+            - ndarray of size (size, ), the dense derivative
+        '''
+        dense = np.zeros(self.size)
+        if self.entries:
+            dense[list(self.entries.keys())] = list(self.entries.values())
+        return dense
+
+    def __mul__(self, other):
+        '''
+        Scales the derivative by a real number.
+
+        Input:
+            - other: int or float
+
+        Returns:
+            - SparseDerivative instance
+        '''
+        return SparseDerivative({i: d * other for i, d in self.entries.items()}, self.size)
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        '''
+        Divides the derivative by a real number.
+
+        Input:
+            - other: int or float
+
+        Returns:
+            - SparseDerivative instance
+        '''
+        return SparseDerivative({i: d / other for i, d in self.entries.items()}, self.size)
+
+    def __neg__(self):
+        return SparseDerivative({i: -d for i, d in self.entries.items()}, self.size)
+
+    def __add__(self, other):
+        '''
+        Adds two derivatives by merging their supports.
+
+        Input:
+            - other: SparseDerivative instance
+
+        Returns:
+            - SparseDerivative instance
+        '''
+        assert self.size == other.size, 'Dimension Mismatch!'
+        # Copy the larger support and merge the smaller one into it
+        small, large = sorted((self.entries, other.entries), key=len)
+        entries = dict(large)
+        for i, d in small.items():
+            entries[i] = entries[i] + d if i in entries else d
+        return SparseDerivative(entries, self.size)
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        '''
+        Subtracts two derivatives by merging their supports.
+
+        Input:
+            - other: SparseDerivative instance
+
+        Returns:
+            - SparseDerivative instance
+        '''
+        return self.__add__(-other)
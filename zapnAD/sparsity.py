@@ -0,0 +1,142 @@
+import numpy as np
+from .dualNumbers import Variable, Variables, Functions
+
+__all__ = ['DependencySet', 'jacobian_sparsity', 'color_columns', 'sparse_auto_diff']
+
+class DependencySet:
+    '''
+    Structural derivative of a Variable: the set of inputs it depends on.
+
+    Used in place of Variable.der, it propagates through the Variable operators and the
+    overLoad elementary functions like a derivative does: scaling keeps the set and adding
+    two derivatives takes the union. The sets of the outputs give the sparsity pattern of
+    the Jacobian.
+    '''
+    # Make numpy defer to our reflected operators (e.g. np.float64 * DependencySet)
+    __array_ufunc__ = None
+
+    def __init__(self, indices):
+        '''
+        Input:
+            - indices: frozenset of int, the inputs the variable depends on
+        '''
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __mul__(self, other):
+        return self
+
+    __rmul__ = __truediv__ = __mul__
+
+    def __neg__(self):
+        return self
+
+    def __add__(self, other):
+        '''
+        Input:
+            - other: DependencySet instance
+
+        Returns:
+            - DependencySet instance, the union of the dependencies
+        '''
+        return DependencySet(self.indices | other.indices)
+
+    __radd__ = __sub__ = __add__
+
+
+def jacobian_sparsity(functions, variable_values):
+    '''
+        Detects which inputs each function depends on.
+
+        Input:
+            - functions: A list of python functions to represent vector functions.
+            Each function takes a list of elements to represent variables, and outputs the defined function of those variables.
+            - variable_values: A list of integers or floats to represent each variable value.
+            The pattern does not depend on the values, unless the functions branch on them.
+
+        Returns:
+            A tuple (indices, indptr) of the sparsity pattern in compressed sparse row format:
+            the columns of the structural non-zeros of row i are indices[indptr[i]:indptr[i + 1]].
+    '''
+    variables = Variables(n_inputs=len(variable_values))
+    variables.set_values(variable_values, seeds=[DependencySet(frozenset((i, ))) for i in range(len(variable_values))])
+    function = Functions(Fs = [f([v for v in variables]) for f in functions])
+
+    rows = [sorted(F.get_gradient().indices) for F in function.Fs]
+    indptr = np.cumsum([0] + [len(row) for row in rows])
+    indices = np.array([j for row in rows for j in row], dtype=int)
+    return indices, indptr
+
+
+def color_columns(pattern, n_inputs):
+    '''
+        Greedy column coloring of a sparsity pattern (Curtis-Powell-Reid): columns sharing a
+        row get different colors, so the columns of one color are structurally orthogonal and
+        can be seeded together in a single forward pass.
+
+        Input:
+            - pattern: tuple (indices, indptr), sparsity pattern as returned by jacobian_sparsity
+            - n_inputs: int, number of columns
+
+        Returns:
+            ndarray of size n_inputs, the color of each column, from 0 to the number of colors - 1.
+    '''
+    indices, indptr = pattern
+    rows_of = [[] for _ in range(n_inputs)]
+    for i in range(len(indptr) - 1):
+        for j in indices[indptr[i]:indptr[i + 1]]:
+            rows_of[j].append(i)
+
+    colors = np.full(n_inputs, -1, dtype=int)
+    for j in range(n_inputs):
+        # Colors of the already colored columns sharing a row with column j
+        forbidden = set()
+        for i in rows_of[j]:
+            forbidden.update(colors[indices[indptr[i]:indptr[i + 1]]])
+        color = 0
+        while color in forbidden:
+            color += 1
+        colors[j] = color
+    return colors
+
+
+def sparse_auto_diff(functions, variable_values, pattern=None):
+    '''
+        Differentiate a list of functions with a sparse Jacobian.
+        The columns are colored so that one forward pass per color computes the Jacobian,
+        e.g. 3 passes for a tridiagonal Jacobian whatever the number of variables.
+
+        Input:
+            - functions: A list of python functions to represent vector functions.
+            Each function takes a list of elements to represent variables, and outputs the defined function of those variables.
+            - variable_values: A list of integers or floats to represent each variable value.
+            - pattern: tuple (indices, indptr) as returned by jacobian_sparsity, to reuse a pattern
+            at several points. Default to None, the pattern is detected at variable_values.
+
+        Returns:
+            A tuple which contains an numpy array of each function evaluated at the specified values,
+            and the Jacobian as a tuple (data, indices, indptr) in compressed sparse row format,
+            e.g. for scipy.sparse.csr_matrix((data, indices, indptr), shape=(m, n)).
+    '''
+    n = len(variable_values)
+    if pattern is None:
+        pattern = jacobian_sparsity(functions, variable_values)
+    indices, indptr = pattern
+    colors = color_columns(pattern, n)
+
+    # Seed all the columns of a color together
+    n_colors = colors.max() + 1 if n else 0
+    seeds = np.zeros((n, n_colors))
+    seeds[np.arange(n), colors] = 1
+
+    variables = Variables(n_inputs=n)
+    variables.set_values(variable_values, seeds=seeds)
+    function = Functions(Fs = [f([v for v in variables]) for f in functions])
+    compressed = function.Jacobian()
+
+    # Row i of the compressed Jacobian holds J[i, j] in the column of the color of j
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    data = compressed[rows, colors[indices]] if len(indices) else np.zeros(0)
+    return function.values(), (data, indices, indptr)
@@ -0,0 +1,317 @@
+import math
+import numpy as np
+
+__all__ = ['Taylor', 'taylor_coefficients', 'directional_derivatives']
+
+# Types treated as constants by the Taylor operators
+_CONSTANTS = (int, float, np.number)
+
+def _weighted(a, b, k):
+    '''
+    Returns sum over j = 1..k of j a_j b_(k - j), the convolution of the series of a' and b.
+    '''
+    return np.dot(np.arange(1, k + 1) * a[1:k + 1], b[k - 1::-1])
+
+
+def _integrate(a, q, b_0):
+    '''
+    Returns the coefficients of b with b(0) = b_0 and b' = a' q.
+    '''
+    b = np.empty_like(a)
+    b[0] = b_0
+    for k in range(1, len(a)):
+        b[k] = _weighted(a, q, k) / k
+    return b
+
+
+class Taylor:
+    '''
+    Truncated Taylor series c_0 + c_1 t + ... + c_K t^K of a function of t, with
+    c_k = f^(k)(0) / k!.
+
+    Evaluating a function at x + t v, i.e. on inputs Taylor([x_i, v_i, 0, ..., 0]), gives
+    the derivatives of any order K of t -> f(x + t v) in a single pass. Every operation
+    costs O(K^2) with the recurrences of the series (Griewank and Walther, chapter 13)
+    instead of the exponential growth of nested first order derivatives.
+
+    There is no val or der attribute: the overLoad functions then fall back to numpy,
+    which calls the method of the same name (e.g. np.sin(x) calls x.sin()).
+    '''
+    __slots__ = ('coefficients', )
+
+    def __init__(self, coefficients):
+        '''
+        Input:
+            - coefficients: list or ndarray of shape (K + 1, ), c_0, ..., c_K
+        '''
+        self.coefficients = np.asarray(coefficients, dtype=float)
+
+    def __str__(self):
+        return f"Taylor({self.coefficients})"
+
+    @property
+    def order(self):
+        '''
+        Returns:
+            - int, K the order of truncation
+        '''
+        return len(self.coefficients) - 1
+
+    def _constant(self, value):
+        '''
+        Returns the coefficients of a constant at the order of self.
+        '''
+        c = np.zeros_like(self.coefficients)
+        c[0] = value
+        return c
+
+    def _other(self, other):
+        '''
+        Returns the coefficients of the other operand, None for unsupported types.
+        '''
+        if isinstance(other, Taylor):
+            if other.order != self.order:
+                raise ValueError("Taylor series of different orders")
+            return other.coefficients
+        if isinstance(other, _CONSTANTS):
+            return self._constant(other)
+        return None
+
+    def __add__(self, other):
+        c = self._other(other)
+        if c is None:
+            return NotImplemented
+        return Taylor(self.coefficients + c)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return Taylor(-self.coefficients)
+
+    def __sub__(self, other):
+        c = self._other(other)
+        if c is None:
+            return NotImplemented
+        return Taylor(self.coefficients - c)
+
+    def __rsub__(self, other):
+        c = self._other(other)
+        if c is None:
+            return NotImplemented
+        return Taylor(c - self.coefficients)
+
+    def __mul__(self, other):
+        if isinstance(other, _CONSTANTS):
+            return Taylor(self.coefficients * other)
+        c = self._other(other)
+        if c is None:
+            return NotImplemented
+        # Cauchy product, truncated
+        a = self.coefficients
+        return Taylor(np.array([np.dot(a[:k + 1], c[k::-1]) for k in range(len(a))]))
+
+    __rmul__ = __mul__
+
+    @staticmethod
+    def _divide(a, c):
+        '''
+        Returns the coefficients of a / c.
+        '''
+        q = np.empty_like(a)
+        for k in range(len(a)):
+            q[k] = (a[k] - np.dot(q[:k], c[k:0:-1])) / c[0]
+        return q
+
+    def __truediv__(self, other):
+        if isinstance(other, _CONSTANTS):
+            return Taylor(self.coefficients / other)
+        c = self._other(other)
+        if c is None:
+            return NotImplemented
+        return Taylor(self._divide(self.coefficients, c))
+
+    def __rtruediv__(self, other):
+        c = self._other(other)
+        if c is None:
+            return NotImplemented
+        return Taylor(self._divide(c, self.coefficients))
+
+    def __pow__(self, p):
+        '''
+        Input:
+            - p: int, float or Taylor instance
+
+        Returns:
+            - Taylor instance
+        '''
+        if isinstance(p, Taylor):
+            return (p * self.log()).exp()
+        a = self.coefficients
+        if a[0] == 0:
+            if not (p >= 0 and float(p).is_integer()):
+                raise ValueError("Non-integer power of a series with a zero constant term")
+            # The recurrence divides by a_0: exact products by binary exponentiation instead,
+            # O(K^2 log p), for x ** 2.0 as for x ** 2
+            result, square, n = Taylor(self._constant(1.0)), self, int(p)
+            while n:
+                if n & 1:
+                    result = result * square
+                n >>= 1
+                if n:
+                    square = square * square
+            return result
+        # b = a^p satisfies a b' = p a' b
+        b = np.empty_like(a)
+        b[0] = a[0] ** p
+        for k in range(1, len(a)):
+            j = np.arange(1, k + 1)
+            b[k] = np.dot((p * j - (k - j)) * a[1:k + 1], b[k - 1::-1]) / (k * a[0])
+        return Taylor(b)
+
+    def __rpow__(self, base):
+        '''
+        Special dunder method to handle the case of int/float ** Taylor instance.
+        '''
+        return (self * np.log(base)).exp()
+
+    def __lt__(self, other):
+        return self.coefficients[0] < getattr(other, 'coefficients', [other])[0]
+
+    def __le__(self, other):
+        return self.coefficients[0] <= getattr(other, 'coefficients', [other])[0]
+
+    def __gt__(self, other):
+        return self.coefficients[0] > getattr(other, 'coefficients', [other])[0]
+
+    def __ge__(self, other):
+        return self.coefficients[0] >= getattr(other, 'coefficients', [other])[0]
+
+    def exp(self):
+        a = self.coefficients
+        b = np.empty_like(a)
+        b[0] = np.exp(a[0])
+        for k in range(1, len(a)):
+            b[k] = _weighted(a, b, k) / k
+        return Taylor(b)
+
+    def log(self):
+        a = self.coefficients
+        if a[0] <= 0:
+            raise ValueError("Value <= 0 not valid for log")
+        b = np.empty_like(a)
+        b[0] = np.log(a[0])
+        for k in range(1, len(a)):
+            # a b' = a'
+            b[k] = (a[k] - np.dot(np.arange(1, k) * b[1:k], a[k - 1:0:-1]) / k) / a[0]
+        return Taylor(b)
+
+    def log2(self):
+        return self.log() / np.log(2)
+
+    def log10(self):
+        return self.log() / np.log(10)
+
+    def sqrt(self):
+        if self.coefficients[0] < 0:
+            raise ValueError("Value < 0 not valid for square root")
+        return self ** 0.5
+
+    def _sin_cos(self, sign):
+        '''
+        Returns the series of (sin, cos) with sign -1, or of (sinh, cosh) with sign 1,
+        computed together since s' = a' c and c' = sign a' s.
+        '''
+        a = self.coefficients
+        s, c = np.empty_like(a), np.empty_like(a)
+        s[0], c[0] = (np.sin(a[0]), np.cos(a[0])) if sign < 0 else (np.sinh(a[0]), np.cosh(a[0]))
+        for k in range(1, len(a)):
+            s[k] = _weighted(a, c, k) / k
+            c[k] = sign * _weighted(a, s, k) / k
+        return s, c
+
+    def sin(self):
+        return Taylor(self._sin_cos(-1)[0])
+
+    def cos(self):
+        return Taylor(self._sin_cos(-1)[1])
+
+    def tan(self):
+        s, c = self._sin_cos(-1)
+        return Taylor(self._divide(s, c))
+
+    def sinh(self):
+        return Taylor(self._sin_cos(1)[0])
+
+    def cosh(self):
+        return Taylor(self._sin_cos(1)[1])
+
+    def tanh(self):
+        s, c = self._sin_cos(1)
+        return Taylor(self._divide(s, c))
+
+    def arcsin(self):
+        x = self.coefficients[0]
+        if abs(x) >= 1:
+            raise ValueError("Value not in (-1, 1), derivatives of arcsin undefined")
+        # arcsin' = 1 / sqrt(1 - a^2)
+        q = (1 - self * self) ** -0.5
+        return Taylor(_integrate(self.coefficients, q.coefficients, np.arcsin(x)))
+
+    def arccos(self):
+        x = self.coefficients[0]
+        if abs(x) >= 1:
+            raise ValueError("Value not in (-1, 1), derivatives of arccos undefined")
+        q = -(1 - self * self) ** -0.5
+        return Taylor(_integrate(self.coefficients, q.coefficients, np.arccos(x)))
+
+    def arctan(self):
+        q = 1 / (1 + self * self)
+        return Taylor(_integrate(self.coefficients, q.coefficients, np.arctan(self.coefficients[0])))
+
+
+def taylor_coefficients(function, variable_values, direction, order):
+    '''
+        Computes the Taylor coefficients of t -> function(x + t v) at t = 0, in a single pass
+        costing O(order^2) per operation.
+
+        Input:
+            - function: A python function of a list of variables, returning a scalar.
+            - variable_values: A list of integers or floats to represent each variable value.
+            - direction: list or ndarray of shape (n, ), the direction v.
+            - order: int, highest order K of the coefficients.
+
+        Returns:
+            ndarray of shape (K + 1, ), c_k = d^k/dt^k function(x + t v) / k!
+    '''
+    direction = np.asarray(direction, dtype=float)
+    assert len(direction) == len(variable_values), 'Dimension Mismatch!'
+    variables = []
+    for value, slope in zip(variable_values, direction):
+        coefficients = np.zeros(order + 1)
+        coefficients[0] = value
+        if order > 0:
+            coefficients[1] = slope
+        variables.append(Taylor(coefficients))
+    F = function(variables)
+    if not isinstance(F, Taylor):
+        # Constant function
+        return np.concatenate([[F], np.zeros(order)])
+    return F.coefficients.copy()
+
+
+def directional_derivatives(function, variable_values, direction, order):
+    '''
+        Computes the derivatives d^k/dt^k function(x + t v) at t = 0 for k = 0, ..., order.
+        With a single variable and direction [1], these are the derivatives of the function.
+
+        Input:
+            - function: A python function of a list of variables, returning a scalar.
+            - variable_values: A list of integers or floats to represent each variable value.
+            - direction: list or ndarray of shape (n, ), the direction v.
+            - order: int, highest order K of the derivatives.
+
+        Returns:
+            ndarray of shape (K + 1, ), the value and the derivatives of order 1 to K
+    '''
+    coefficients = taylor_coefficients(function, variable_values, direction, order)
+    return coefficients * np.array([math.factorial(k) for k in range(order + 1)], dtype=float)
@@ -0,0 +1,403 @@
+import numpy as np
+from .dualNumbers import Variable, _FUNCTIONS
+
+__all__ = ['TensorVariable', 'stack', 'tensor_inputs', 'tensor_auto_diff']
+
+def _expand(der, ndim):
+    '''
+    Inserts axes after the leading input axis of a derivative, so that its value axes
+    are aligned with a value of ndim dimensions when broadcasting.
+
+    Input:
+        - der: ndarray of shape (n, ) + value shape
+        - ndim: int, number of dimensions of the value to broadcast against
+
+    Returns:
+        - ndarray of ndim + 1 dimensions
+    '''
+    missing = ndim - (der.ndim - 1)
+    if missing <= 0:
+        return der
+    return der.reshape(der.shape[:1] + (1, ) * missing + der.shape[1:])
+
+
+def _operand(other):
+    '''
+    Returns the value and derivative of the other operand of a binary operation,
+    the derivative being None for constants.
+    '''
+    if isinstance(other, Variable):
+        return np.asarray(other.val, dtype=float), np.asarray(other.der, dtype=float)
+    return np.asarray(other, dtype=float), None
+
+
+class TensorVariable(Variable):
+    '''
+    Variable whose value is an ndarray.
+
+    The derivative has shape (n, ) + value shape: the leading axis runs over the n inputs,
+    so the elementwise derivative rules of Variable and of the overLoad functions
+    broadcast against the value without changes, and a whole array expression runs as
+    a few numpy calls instead of one Python call per scalar.
+    '''
+    __slots__ = ()
+
+    def __init__(self, value, derivatives=None) -> None:
+        '''
+        Stores the current value and derivative of this variable.
+
+        Input:
+            - self.val: ndarray, current value
+            - self.der: ndarray of shape (n, ) + self.val.shape, full derivative
+        '''
+        super().__init__(np.asarray(value, dtype=float), derivatives)
+
+    @property
+    def shape(self):
+        '''
+        Returns:
+            - tuple, shape of the value
+        '''
+        return self.val.shape
+
+    @property
+    def ndim(self):
+        '''
+        Returns:
+            - int, number of dimensions of the value
+        '''
+        return self.val.ndim
+
+    def __len__(self):
+        return len(self.val)
+
+    def _new(self, val, der):
+        '''
+        Creates the result of an operation, broadcasting the derivative to the full value shape.
+        '''
+        return TensorVariable(val, np.broadcast_to(der, der.shape[:1] + np.shape(val)))
+
+    def __add__(self, other):
+        '''
+        Compute the new variable with updated value and derivative after (broadcast) addition.
+
+        Input:
+            - other: int, float, ndarray, Variable or TensorVariable instance
+
+        Returns:
+            - TensorVariable instance
+        '''
+        o_val, o_der = _operand(other)
+        val = self.val + o_val
+        der = _expand(self.der, val.ndim)
+        if o_der is not None:
+            der = der + _expand(o_der, val.ndim)
+        return self._new(val, der)
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __neg__(self):
+        return TensorVariable(-self.val, -self.der)
+
+    def __sub__(self, other):
+        '''
+        Compute the new variable with updated value and derivative after (broadcast) substraction.
+
+        Input:
+            - other: int, float, ndarray, Variable or TensorVariable instance
+
+        Returns:
+            - TensorVariable instance
+        '''
+        o_val, o_der = _operand(other)
+        val = self.val - o_val
+        der = _expand(self.der, val.ndim)
+        if o_der is not None:
+            der = der - _expand(o_der, val.ndim)
+        return self._new(val, der)
+
+    def __rsub__(self, other):
+        return (-self).__add__(other)
+
+    def __mul__(self, other):
+        '''
+        Compute the new variable with updated value and derivative after (broadcast) multiplication.
+
+        Input:
+            - other: int, float, ndarray, Variable or TensorVariable instance
+
+        Returns:
+            - TensorVariable instance
+        '''
+        o_val, o_der = _operand(other)
+        val = self.val * o_val
+        der = _expand(self.der, val.ndim) * o_val
+        if o_der is not None:
+            der = der + self.val * _expand(o_der, val.ndim)
+        return self._new(val, der)
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        '''
+        Compute the new variable with updated value and derivative after (broadcast) division.
+
+        Input:
+            - other: int, float, ndarray, Variable or TensorVariable instance
+
+        Returns:
+            - TensorVariable instance
+        '''
+        o_val, o_der = _operand(other)
+        val = self.val / o_val
+        der = _expand(self.der, val.ndim) / o_val
+        if o_der is not None:
+            der = der - val * _expand(o_der, val.ndim) / o_val
+        return self._new(val, der)
+
+    def __rtruediv__(self, other):
+        '''
+        Special dunder method to handle the case of constant / TensorVariable instance.
+
+        Input:
+            - other: int, float, ndarray or Variable instance
+
+        Returns:
+            - TensorVariable instance
+        '''
+        o_val, o_der = _operand(other)
+        val = o_val / self.val
+        der = -val * _expand(self.der, val.ndim) / self.val
+        if o_der is not None:
+            der = der + _expand(o_der, val.ndim) / self.val
+        return self._new(val, der)
+
+    def __pow__(self, p):
+        '''
+        Compute the new variable with updated value and derivative after elementwise powering.
+
+        Input:
+            - p: int or float
+
+        Returns:
+            - TensorVariable instance
+        '''
+        return TensorVariable(self.val ** p, p * self.val ** (p - 1) * self.der)
+
+    def __matmul__(self, other):
+        '''
+        Compute the new variable with updated value and derivative after matrix multiplication.
+        Follows the numpy rules for 1-D operands and stacks of matrices.
+
+        Input:
+            - other: ndarray or TensorVariable instance
+
+        Returns:
+            - TensorVariable instance
+        '''
+        o_val, o_der = _operand(other)
+        return _matmul(self.val, self.der, o_val, o_der)
+
+    def __rmatmul__(self, other):
+        o_val, o_der = _operand(other)
+        return _matmul(o_val, o_der, self.val, self.der)
+
+    def __getitem__(self, key):
+        '''
+        Indexing and slicing of the value, with the same key applied to the derivative.
+
+        Returns:
+            - TensorVariable instance
+        '''
+        key = key if isinstance(key, tuple) else (key, )
+        return TensorVariable(self.val[key], self.der[(slice(None), ) + key])
+
+    def sum(self, axis=None):
+        '''
+        Sum of the elements over the given axis.
+
+        Input:
+            - axis: None, int or tuple of int. Default to None, the sum of all the elements.
+
+        Returns:
+            - TensorVariable instance
+        '''
+        if axis is None:
+            axis = tuple(range(self.ndim))
+        axes = tuple(a % self.ndim for a in (axis if isinstance(axis, tuple) else (axis, )))
+        # The derivative has the input axis first
+        der_axes = tuple(a + 1 for a in axes)
+        return TensorVariable(self.val.sum(axis=axes), self.der.sum(axis=der_axes))
+
+    def mean(self, axis=None):
+        '''
+        Mean of the elements over the given axis.
+
+        Input:
+            - axis: None, int or tuple of int. Default to None, the mean of all the elements.
+
+        Returns:
+            - TensorVariable instance
+        '''
+        total = self.sum(axis)
+        return total / (self.val.size // max(total.val.size, 1))
+
+    def reshape(self, *shape):
+        '''
+        Gives a new shape to the value without changing its data.
+
+        Input:
+            - shape: int or tuple of int
+
+        Returns:
+            - TensorVariable instance
+        '''
+        val = self.val.reshape(*shape)
+        return TensorVariable(val, self.der.reshape(self.der.shape[:1] + val.shape))
+
+    @property
+    def T(self):
+        '''
+        Returns:
+            - TensorVariable instance, the transposed variable
+        '''
+        axes = (0, ) + tuple(range(self.der.ndim - 1, 0, -1))
+        return TensorVariable(self.val.T, self.der.transpose(axes))
+
+
+def _matmul(a_val, a_der, b_val, b_der):
+    '''
+    Product rule for a @ b, the derivatives being None for constants.
+    '''
+    # Promote 1-D operands to matrices like np.matmul does
+    a_vec, b_vec = a_val.ndim == 1, b_val.ndim == 1
+    A = a_val[None, :] if a_vec else a_val
+    B = b_val[:, None] if b_vec else b_val
+    ndim = max(A.ndim, B.ndim)
+
+    der = 0
+    if a_der is not None:
+        dA = a_der[..., None, :] if a_vec else a_der
+        der = der + np.matmul(_expand(dA, ndim), B)
+    if b_der is not None:
+        dB = b_der[..., None] if b_vec else b_der
+        der = der + np.matmul(A, _expand(dB, ndim))
+
+    # Remove the promoted axes again
+    if b_vec:
+        der = der[..., 0]
+    if a_vec:
+        der = der[..., 0] if b_vec else der[..., 0, :]
+    return TensorVariable(np.matmul(a_val, b_val), der)
+
+
+def stack(variables, axis=0):
+    '''
+    Joins Variables of the same shape (or constants) along a new axis into one TensorVariable,
+    so that the operations over them run as array operations: np.sum(stack(x)) accumulates
+    the derivatives in one call instead of len(x) - 1 Variable additions.
+    np.stack on a list or object array of Variables calls this function.
+
+    Input:
+        - variables: sequence of Variable instances with dense derivatives, or constants
+        - axis: int, axis of the result along which the variables are stacked. Default to 0.
+
+    Returns:
+        - TensorVariable instance, or ndarray when none of the variables is a Variable
+    '''
+    variables = list(variables)
+    vals = [np.asarray(v.val if isinstance(v, Variable) else v, dtype=float) for v in variables]
+    val = np.stack(vals, axis=axis)
+    ders = [np.asarray(v.der, dtype=float) for v in variables if isinstance(v, Variable)]
+    if not ders:
+        return val
+    n = len(ders[0])
+    ders = [np.broadcast_to(np.asarray(v.der, dtype=float), (n, ) + value.shape)
+            if isinstance(v, Variable) else np.zeros((n, ) + value.shape)
+            for v, value in zip(variables, vals)]
+    # The derivative has the input axis first
+    return TensorVariable(val, np.stack(ders, axis=axis % val.ndim + 1))
+
+
+def _as_tensor(a):
+    '''
+    Returns a Variable as a TensorVariable, constants as ndarrays.
+    '''
+    if isinstance(a, TensorVariable) or not isinstance(a, Variable):
+        return a if isinstance(a, Variable) else np.asarray(a, dtype=float)
+    return TensorVariable(a.val, a.der)
+
+
+def _sum(a, axis=None, **kwargs):
+    return _as_tensor(a).sum(axis=axis)
+
+
+def _mean(a, axis=None, **kwargs):
+    return _as_tensor(a).mean(axis=axis)
+
+
+def _dot(a, b, out=None):
+    if np.ndim(getattr(a, 'val', a)) == 0 or np.ndim(getattr(b, 'val', b)) == 0:
+        return a * b
+    return a @ b
+
+
+def _reshape(a, *args, **kwargs):
+    shape = kwargs.get('newshape', kwargs.get('shape', args[0] if args else None))
+    return _as_tensor(a).reshape(shape)
+
+
+def _transpose(a, axes=None):
+    a = _as_tensor(a)
+    if axes is None:
+        return a.T
+    return TensorVariable(a.val.transpose(axes), a.der.transpose((0, ) + tuple(x % a.ndim + 1 for x in axes)))
+
+
+# numpy functions applied to Variables (np.sum(x), np.stack([x, y])), see Variable.__array_function__
+_FUNCTIONS.update({np.stack: stack, np.sum: _sum, np.mean: _mean, np.dot: _dot,
+                   np.reshape: _reshape, np.transpose: _transpose})
+
+
+def tensor_inputs(*values):
+    '''
+    Creates TensorVariable inputs from arrays of values.
+    The derivatives are taken with respect to every entry of every input,
+    flattened and concatenated in order, so n is the total number of entries.
+
+    Input:
+        - values: ndarrays or lists, one per input
+
+    Returns:
+        - list of TensorVariable instances
+    '''
+    values = [np.asarray(value, dtype=float) for value in values]
+    n = sum(value.size for value in values)
+    inputs = []
+    start = 0
+    for value in values:
+        der = np.zeros((n, value.size))
+        der[start:start + value.size] = np.eye(value.size)
+        inputs.append(TensorVariable(value, der.reshape((n, ) + value.shape)))
+        start += value.size
+    return inputs
+
+
+def tensor_auto_diff(function, *values):
+    '''
+        Differentiate a function of arrays in respect to every entry of the arrays.
+
+        Input:
+            - function: A python function taking one TensorVariable per array, and returning
+            a TensorVariable (or a Variable for scalar outputs).
+            - values: ndarrays or lists, the values of the inputs.
+
+        Returns:
+            A tuple which contains the value of the function (ndarray), and its Jacobian of shape
+            value shape + (n, ), where n is the total number of entries of the inputs.
+    '''
+    F = function(*tensor_inputs(*values))
+    der = np.asarray(F.get_gradient())
+    return np.asarray(F.get_value()), np.moveaxis(der, 0, -1)
@@ -0,0 +1,387 @@
+import math
+import numpy as np
+
+__all__ = ['TracingError', 'TracedFunctions', 'trace']
+
+class TracingError(Exception):
+    '''Raised when a function cannot be recorded as an expression graph.'''
+
+
+# Operation name: (numpy kernel, source of the operation, source of the partial derivative
+# with respect to each argument). Sources refer to the arguments as {a}, {b} and to the output as {out}.
+_OPS = {
+    'add': (np.add, '{a} + {b}', ('1.0', '1.0')),
+    'sub': (np.subtract, '{a} - {b}', ('1.0', '-1.0')),
+    'mul': (np.multiply, '{a} * {b}', ('{b}', '{a}')),
+    'div': (np.divide, '{a} / {b}', ('1 / {b}', '-{out} / {b}')),
+    'pow': (np.power, '{a} ** {b}', ('{b} * {a} ** ({b} - 1)', '{out} * log({a})')),
+    'neg': (np.negative, '-{a}', ('-1.0', )),
+    'sin': (np.sin, 'sin({a})', ('cos({a})', )),
+    'cos': (np.cos, 'cos({a})', ('-sin({a})', )),
+    'tan': (np.tan, 'tan({a})', ('1 / cos({a}) ** 2', )),
+    'arcsin': (np.arcsin, 'arcsin({a})', ('1 / sqrt(1 - {a} ** 2)', )),
+    'arccos': (np.arccos, 'arccos({a})', ('-1 / sqrt(1 - {a} ** 2)', )),
+    'arctan': (np.arctan, 'arctan({a})', ('1 / (1 + {a} ** 2)', )),
+    'exp': (np.exp, 'exp({a})', ('{out}', )),
+    'log': (np.log, 'log({a})', ('1 / {a}', )),
+    'log2': (np.log2, 'log2({a})', ('1 / ({a} * log(2.0))', )),
+    'log10': (np.log10, 'log10({a})', ('1 / ({a} * log(10.0))', )),
+    'sqrt': (np.sqrt, 'sqrt({a})', ('0.5 / {out}', )),
+    'sinh': (np.sinh, 'sinh({a})', ('cosh({a})', )),
+    'cosh': (np.cosh, 'cosh({a})', ('sinh({a})', )),
+    'tanh': (np.tanh, 'tanh({a})', ('1 - {out} ** 2', )),
+}
+
+# Names the generated sources refer to, with numpy kernels for arrays
+_NAMESPACE = {name: getattr(np, name) for name, op in _OPS.items() if len(op[2]) == 1 and name != 'neg'}
+
+# and with the math module for a single point, which avoids the overhead of numpy scalars
+_SCALAR_NAMESPACE = {name: getattr(math, name.replace('arc', 'a')) for name in _NAMESPACE}
+
+_COMMUTATIVE = ('add', 'mul')
+
+
+class Graph:
+    def __init__(self, n_inputs):
+        '''
+        Expression graph recorded while tracing a function.
+
+        Attributes:
+            - self.nodes: list of (op, args, value) tuples. args are node indices,
+            value is the input index for 'input' nodes and the constant for 'const' nodes.
+            - self.inputs: list of int, node indices of the input variables
+        '''
+        self.nodes = []
+        self._index = {}
+        self.inputs = [self._node('input', (), i) for i in range(n_inputs)]
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def _node(self, op, args, value=None):
+        '''
+        Returns the index of the node, reusing an identical existing node
+        (common subexpression elimination).
+        '''
+        key = (op, args, value)
+        if key not in self._index:
+            self.nodes.append(key)
+            self._index[key] = len(self.nodes) - 1
+        return self._index[key]
+
+    def constant(self, value):
+        '''
+        Returns the index of a constant node.
+
+        Input:
+            - value: int or float
+        '''
+        if np.ndim(value) != 0:
+            raise TracingError('Only scalar constants can be traced')
+        return self._node('const', (), float(value))
+
+    def is_constant(self, index):
+        return self.nodes[index][0] == 'const'
+
+    def apply(self, op, *operands):
+        '''
+        Records an operation, folding constants and simplifying identities.
+
+        Input:
+            - op: str, name of the operation in _OPS
+            - operands: TraceNode instances or real numbers
+
+        Returns:
+            - TraceNode instance
+        '''
+        args = tuple(x.index if isinstance(x, TraceNode) else self.constant(x) for x in operands)
+
+        # Constant folding
+        if all(self.is_constant(a) for a in args):
+            kernel = _OPS[op][0]
+            return TraceNode(self, self.constant(kernel(*[self.nodes[a][2] for a in args])))
+
+        # Identities x + 0, x - 0, x * 1, x / 1, x ** 1 and x ** 0
+        consts = [self.nodes[a][2] if self.is_constant(a) else None for a in args]
+        if op == 'add' and 0 in consts:
+            return TraceNode(self, args[1 - consts.index(0)])
+        if op in ('sub', 'div', 'pow') and consts[1] == (0 if op == 'sub' else 1):
+            return TraceNode(self, args[0])
+        if op == 'mul' and 1 in consts:
+            return TraceNode(self, args[1 - consts.index(1)])
+        if op == 'pow' and consts[1] == 0:
+            return TraceNode(self, self.constant(1.0))
+
+        if op in _COMMUTATIVE:
+            args = tuple(sorted(args))
+        return TraceNode(self, self._node(op, args))
+
+
+class TraceNode:
+    '''
+    Placeholder for a value while tracing a function: every operation on it is recorded on
+    a Graph instead of being computed. The overLoad elementary functions fall back to the
+    numpy function for non Variable arguments, which calls the method of the same name.
+    '''
+    __slots__ = ('graph', 'index')
+
+    def __init__(self, graph, index):
+        self.graph = graph
+        self.index = index
+
+    def __add__(self, other):
+        return self.graph.apply('add', self, other)
+
+    def __radd__(self, other):
+        return self.graph.apply('add', other, self)
+
+    def __sub__(self, other):
+        return self.graph.apply('sub', self, other)
+
+    def __rsub__(self, other):
+        return self.graph.apply('sub', other, self)
+
+    def __mul__(self, other):
+        return self.graph.apply('mul', self, other)
+
+    def __rmul__(self, other):
+        return self.graph.apply('mul', other, self)
+
+    def __truediv__(self, other):
+        return self.graph.apply('div', self, other)
+
+    def __rtruediv__(self, other):
+        return self.graph.apply('div', other, self)
+
+    def __pow__(self, other):
+        return self.graph.apply('pow', self, other)
+
+    def __rpow__(self, other):
+        return self.graph.apply('pow', other, self)
+
+    def __neg__(self):
+        return self.graph.apply('neg', self)
+
+    def _untraceable(self, *args):
+        raise TracingError('The function depends on the values of the variables (comparison or conversion)')
+
+    # Value dependent control flow cannot be recorded
+    __lt__ = __le__ = __gt__ = __ge__ = __eq__ = __ne__ = _untraceable
+    __bool__ = __float__ = __int__ = _untraceable
+    __hash__ = None
+
+
+def _unary(op):
+    return lambda self: self.graph.apply(op, self)
+
+for _op, (_kernel, _source, _partials) in _OPS.items():
+    if len(_partials) == 1 and _op != 'neg':
+        setattr(TraceNode, _op, _unary(_op))
+
+
+class TracedFunctions:
+    def __init__(self, graph, outputs):
+        '''
+        Flat program replaying a traced graph with numpy kernels.
+        Nodes that no output depends on are removed, and the remaining operations are
+        generated as straight-line Python source: a forward sweep computing the values,
+        followed by one reverse sweep per output accumulating the adjoints of the inputs.
+
+        Input:
+            - graph: Graph instance
+            - outputs: list of int, node indices of the outputs
+        '''
+        # Dead code elimination
+        live = set(outputs)
+        for i in range(len(graph.nodes) - 1, -1, -1):
+            if i in live:
+                live.update(graph.nodes[i][1])
+
+        self.n_inputs = len(graph.inputs)
+        self.n_operations = 0
+        names = {}
+        forward = []
+        for i, (op, args, value) in enumerate(graph.nodes):
+            if i not in live:
+                continue
+            if op == 'input':
+                names[i] = f'x{value}'
+                forward.append(f'x{value} = x[{value}]')
+            elif op == 'const':
+                names[i] = _literal(value)
+            else:
+                names[i] = f'v{i}'
+                forward.append(f'v{i} = ' + _OPS[op][1].format(**_arguments(args, names)))
+                self.n_operations += 1
+        self.outputs = [names[o] for o in outputs]
+
+        backward = []
+        for k, o in enumerate(outputs):
+            backward.extend(_reverse_sweep(graph, live, names, o, k))
+
+        inputs = ', '.join(f'a{k}_{i}' for k in range(len(outputs)) for i in graph.inputs)
+        self.source = '\n'.join(
+            ['def values(x):'] +
+            ['    ' + line for line in forward] +
+            [f'    return ({", ".join(self.outputs)}, ), ', '',
+             'def evaluate(x):'] +
+            ['    ' + line for line in forward + backward] +
+            [f'    return ({", ".join(self.outputs)}, ), ({inputs}, )', ''])
+        code = compile(self.source, '<traced>', 'exec')
+        self._array_namespace = dict(_NAMESPACE)
+        self._scalar_namespace = dict(_SCALAR_NAMESPACE)
+        exec(code, self._array_namespace)
+        exec(code, self._scalar_namespace)
+
+    def _run(self, name, x):
+        '''
+        Runs one of the generated functions, on Python floats for a single point.
+        Points where the math module fails (domain errors, overflows or complex results)
+        are evaluated again with numpy, so the results follow the numpy conventions
+        (nan and inf) like the Variable operations do.
+        '''
+        if x.ndim == 1:
+            try:
+                result = self._scalar_namespace[name](x.tolist())
+                if not any(type(v) is complex for part in result for v in part):
+                    return result
+            except (ValueError, ArithmeticError):
+                pass
+        # Inputs first, so that x[i] is the i-th variable at every point
+        return self._array_namespace[name](np.moveaxis(x, -1, 0))
+
+    def __len__(self):
+        '''
+        Returns:
+            - int, number of outputs
+        '''
+        return len(self.outputs)
+
+    def values(self, variable_values):
+        '''
+        Evaluates the functions only.
+
+        Input:
+            - variable_values: list or ndarray of shape (n, ), or (N, n) for N points at once
+
+        Returns:
+            - ndarray of shape (m, ), or (N, m)
+        '''
+        x = np.asarray(variable_values, dtype=float)
+        assert x.shape[-1] == self.n_inputs, 'Dimension Mismatch!'
+        batch_shape = x.shape[:-1]
+        values, = self._run('values', x)
+        return _stack(values, batch_shape)
+
+    def __call__(self, variable_values):
+        '''
+        Evaluates the functions and their Jacobian.
+
+        Input:
+            - variable_values: list or ndarray of shape (n, ), or (N, n) for N points at once
+
+        Returns:
+            A tuple which contains an numpy array of shape (m, ) (or (N, m)) of each function value,
+            and the Jacobian of shape (m, n) (or (N, m, n)), like auto_diff.
+        '''
+        x = np.asarray(variable_values, dtype=float)
+        assert x.shape[-1] == self.n_inputs, 'Dimension Mismatch!'
+        batch_shape = x.shape[:-1]
+        values, adjoints = self._run('evaluate', x)
+        jacobian = _stack(adjoints, batch_shape)
+        return _stack(values, batch_shape), jacobian.reshape(batch_shape + (len(self.outputs), self.n_inputs))
+
+
+def _stack(results, batch_shape):
+    '''
+    Stacks the results of a generated function along the last axis. Results which do not
+    depend on the inputs are scalars and are broadcast to the batch shape.
+    '''
+    if batch_shape == ():
+        return np.array(results, dtype=float)
+    return np.stack([np.broadcast_to(r, batch_shape) for r in results], axis=-1)
+
+
+def _literal(value):
+    '''
+    Returns the source of a constant, which can be used as an operand of any operator.
+    '''
+    if not np.isfinite(value):
+        return f"float('{value}')"
+    return f'({value!r})' if value < 0 else repr(value)
+
+
+def _arguments(args, names):
+    '''
+    Returns the names of the arguments and of the output as keywords of the source templates.
+    '''
+    return dict(zip('ab', [names[a] for a in args]))
+
+
+def _reverse_sweep(graph, live, names, output, k):
+    '''
+    Generates the source of the reverse sweep of one output. The adjoint of node i is named
+    a{k}_{i}, its first contribution is assigned and the following ones are added.
+
+    Returns:
+        - list of str, lines of source
+    '''
+    lines = []
+    adjoint = {output: '1.0'}
+    for i in range(output, -1, -1):
+        op, args, value = graph.nodes[i]
+        if i not in adjoint or op in ('input', 'const'):
+            continue
+        a = adjoint[i]
+        keywords = _arguments(args, names)
+        keywords['out'] = names[i]
+        for position, j in enumerate(args):
+            if graph.is_constant(j):
+                continue
+            partial = _OPS[op][2][position].format(**keywords)
+            if partial == '1.0':
+                term = a
+            elif partial == '-1.0':
+                term = f'-{a}'
+            else:
+                term = f'({partial}) * {a}'
+            name = f'a{k}_{j}'
+            lines.append(f'{name} = {name} + {term}' if j in adjoint else f'{name} = {term}')
+            adjoint[j] = name
+
+    for j in graph.inputs:
+        # Inputs the output does not depend on
+        if j not in adjoint:
+            lines.append(f'a{k}_{j} = 0.0')
+        # The output is the input itself
+        elif adjoint[j] != f'a{k}_{j}':
+            lines.append(f'a{k}_{j} = {adjoint[j]}')
+    return lines
+
+
+def trace(functions, n_inputs):
+    '''
+        Records a list of functions once as an expression graph, to evaluate them and their
+        Jacobian many times without re-running the Python functions or building Variables.
+        Common subexpressions are merged and constants folded while recording.
+
+        Input:
+            - functions: A list of python functions to represent vector functions.
+            Each function takes a list of elements to represent variables, and outputs the defined function of those variables.
+            The functions may only use arithmetic operators and the overLoad elementary functions.
+            - n_inputs: int, number of input variables
+
+        Returns:
+            A TracedFunctions instance, callable on variable values like auto_diff.
+
+        Raises:
+            TracingError if a function depends on the values of the variables (comparisons,
+            conversions to float), which cannot be recorded.
+    '''
+    graph = Graph(n_inputs)
+    variables = [TraceNode(graph, i) for i in graph.inputs]
+    outputs = []
+    for f in functions:
+        F = f(variables)
+        outputs.append(F.index if isinstance(F, TraceNode) else graph.constant(F))
+    return TracedFunctions(graph, outputs)